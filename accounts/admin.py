@@ -1,7 +1,9 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from django.db.models import Count, Q
 from django.utils.html import format_html
-from .models import User, DealerProfile, ScrapCategory, ScrapMaterial, DealerPrice, DealerRating, DealerInquiry
+from core.exports import ExportMixin
+from .models import User, DealerProfile, ScrapCategory, ScrapMaterial, DealerPrice, DealerRating, DealerInquiry, PriceAlert
 
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
@@ -28,7 +30,8 @@ class DealerProfileAdmin(admin.ModelAdmin):
     list_display = ['business_name', 'user', 'verification_status', 'average_rating', 'total_transactions', 'created_at']
     list_filter = ['verification_status', 'pickup_available', 'delivery_available', 'created_at']
     search_fields = ['business_name', 'user__username', 'user__email', 'business_registration_number']
-    readonly_fields = ['average_rating', 'total_ratings', 'total_transactions', 'created_at', 'updated_at']
+    list_select_related = ['user']
+    readonly_fields = ['average_rating', 'total_ratings', 'total_transactions', 'last_digest_sent_at', 'created_at', 'updated_at']
     
     fieldsets = (
         ('Basic Information', {
@@ -50,6 +53,9 @@ class DealerProfileAdmin(admin.ModelAdmin):
         ('Statistics', {
             'fields': ('average_rating', 'total_ratings', 'total_transactions')
         }),
+        ('Notifications', {
+            'fields': ('digest_opt_in', 'last_digest_sent_at')
+        }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at')
         }),
@@ -79,9 +85,13 @@ class ScrapCategoryAdmin(admin.ModelAdmin):
     search_fields = ['name', 'description']
     list_editable = ['is_active', 'sort_order']
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_material_count=Count('materials'))
+    
     def material_count(self, obj):
-        return obj.materials.count()
+        return obj._material_count
     material_count.short_description = 'Materials Count'
+    material_count.admin_order_field = '_material_count'
 
 @admin.register(ScrapMaterial)
 class ScrapMaterialAdmin(admin.ModelAdmin):
@@ -89,17 +99,29 @@ class ScrapMaterialAdmin(admin.ModelAdmin):
     list_filter = ['category', 'is_active', 'unit']
     search_fields = ['name', 'description', 'category__name']
     list_editable = ['is_active']
+    list_select_related = ['category']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_dealer_count=Count(
+            'dealerprice__dealer', filter=Q(dealerprice__is_active=True), distinct=True,
+        ))
     
     def dealer_count(self, obj):
-        return obj.dealerprice_set.filter(is_active=True).values('dealer').distinct().count()
+        return obj._dealer_count
     dealer_count.short_description = 'Active Dealers'
+    dealer_count.admin_order_field = '_dealer_count'
 
 @admin.register(DealerPrice)
-class DealerPriceAdmin(admin.ModelAdmin):
+class DealerPriceAdmin(ExportMixin, admin.ModelAdmin):
     list_display = ['dealer', 'material', 'quality_grade', 'price_display', 'minimum_quantity', 'is_active', 'last_updated']
     list_filter = ['quality_grade', 'is_active', 'material__category', 'last_updated']
     search_fields = ['dealer__business_name', 'material__name', 'material__category__name']
     list_editable = ['is_active']
+    list_select_related = ['dealer', 'material__category']
+    export_fields = [
+        'id', 'dealer_id', 'dealer__business_name', 'material_id', 'material__category__name', 'material__name',
+        'quality_grade', 'price_per_unit', 'minimum_quantity', 'is_active', 'last_updated',
+    ]
     
     def price_display(self, obj):
         return format_html('₹{}/{unit}', obj.price_per_unit, unit=obj.material.unit)
@@ -110,14 +132,20 @@ class DealerRatingAdmin(admin.ModelAdmin):
     list_display = ['dealer', 'user', 'rating', 'created_at']
     list_filter = ['rating', 'created_at']
     search_fields = ['dealer__business_name', 'user__username', 'review']
+    list_select_related = ['dealer', 'user']
     readonly_fields = ['created_at']
 
 @admin.register(DealerInquiry)
-class DealerInquiryAdmin(admin.ModelAdmin):
+class DealerInquiryAdmin(ExportMixin, admin.ModelAdmin):
     list_display = ['dealer', 'user', 'subject', 'status', 'created_at']
     list_filter = ['status', 'contact_preference', 'created_at']
     search_fields = ['dealer__business_name', 'user__username', 'subject', 'message']
+    list_select_related = ['dealer', 'user']
     readonly_fields = ['created_at']
+    export_fields = [
+        'id', 'dealer_id', 'dealer__business_name', 'user__username', 'user__email', 'material__name', 'subject',
+        'message', 'quantity', 'contact_preference', 'status', 'dealer_response', 'responded_at', 'created_at',
+    ]
     
     fieldsets = (
         ('Inquiry Details', {
@@ -129,4 +157,13 @@ class DealerInquiryAdmin(admin.ModelAdmin):
         ('Timestamp', {
             'fields': ('created_at',)
         }),
-    )
\ No newline at end of file
+    )
+
+@admin.register(PriceAlert)
+class PriceAlertAdmin(admin.ModelAdmin):
+    list_display = ['user', 'material', 'quality_grade', 'direction', 'target_price', 'is_active', 'triggered_price', 'triggered_at', 'notified_at']
+    list_filter = ['direction', 'is_active', 'quality_grade', 'material__category']
+    search_fields = ['user__username', 'material__name']
+    list_select_related = ['user', 'material__category']
+    raw_id_fields = ['user', 'triggered_dealer']
+    readonly_fields = ['triggered_price', 'triggered_dealer', 'triggered_at', 'notified_at', 'created_at']
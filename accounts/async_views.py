@@ -0,0 +1,139 @@
+"""
+Async versions of the public dealer and price pages, for ASGI deployments.
+
+Django's async ORM runs each query through ``sync_to_async`` on the
+request's one thread, so a view's queries still run one after another;
+the views simply await them in turn. The cache lookups and the template
+rendering (cached fragments load their prices lazily on a cache miss) also
+run in that thread. What the event loop gains is not holding a worker for
+slow clients or long-lived connections, not faster pages.
+
+``accounts.urls`` routes to these views when ``ASYNC_VIEWS`` is on
+(``DJANGO_ASYNC_VIEWS=1``). ``manage.py bench_async`` compares them with
+the sync views under the ASGI handler.
+"""
+from asgiref.sync import sync_to_async
+from django.core.cache import InvalidCacheBackendError, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.core.paginator import Paginator
+from django.shortcuts import aget_object_or_404, render
+from django.utils.functional import SimpleLazyObject
+
+from core.conditional import conditional_page
+from core.db import read_only_view
+from core.pagecache import cache_anonymous_page
+from .clocks import dealer_list_clocks, dealer_page_clocks, dealer_versions, price_page_clocks
+from .models import DealerPrice, DealerProfile, ScrapCategory, ScrapMaterial
+from .views import directory_dealers
+
+arender = sync_to_async(render)
+
+
+async def fetched(queryset):
+    """``queryset`` with its results loaded, for templates that call its methods"""
+    async for _ in queryset:
+        pass
+    return queryset
+
+
+def fragment_cached(fragment_name, *vary_on):
+    """Whether ``{% cache ... fragment_name *vary_on %}`` would hit"""
+    try:
+        fragment_cache = caches['template_fragments']
+    except InvalidCacheBackendError:
+        fragment_cache = caches['default']
+    return fragment_cache.has_key(make_template_fragment_key(fragment_name, vary_on))
+
+
+def price_fragment(dealer_id):
+    """The version of the dealer's cached price fragment, and whether it is cached"""
+    version = dealer_versions([dealer_id])[dealer_id]
+    return version, fragment_cached('dealer_prices', dealer_id, version)
+
+
+def group_by_category(prices):
+    prices_by_category = {}
+    for price in prices:
+        prices_by_category.setdefault(price.material.category.name, []).append(price)
+    return prices_by_category
+
+
+@cache_anonymous_page(dealer_list_clocks)
+@read_only_view
+async def dealers_directory(request):
+    """Public directory of verified dealers"""
+    dealers, search, category, city = directory_dealers(request)
+    count = await dealers.acount()
+    categories = await fetched(ScrapCategory.objects.filter(is_active=True))
+    cities = await fetched(DealerProfile.objects.filter(
+        verification_status='verified'
+    ).values_list('user__city', flat=True).distinct())
+    paginator = Paginator(dealers, 12)
+    paginator.count = count
+    page = paginator.get_page(request.GET.get('page'))
+    page.object_list = await fetched(page.object_list)
+    # Dealer cards are cached fragments keyed by these versions
+    versions = await sync_to_async(dealer_versions)([dealer.id for dealer in page])
+    for dealer in page:
+        dealer.fragment_version = versions[dealer.id]
+
+    context = {
+        'dealers': page,
+        'categories': categories,
+        'cities': [city for city in cities if city],
+        'search': search,
+        'selected_category': category,
+        'selected_city': city,
+    }
+    return await arender(request, 'accounts/dealers_directory.html', context)
+
+
+@conditional_page(dealer_page_clocks)
+@cache_anonymous_page(dealer_page_clocks)
+@read_only_view
+async def dealer_detail(request, dealer_id):
+    """Dealer detail page with prices and contact form"""
+    dealer = await aget_object_or_404(DealerProfile, id=dealer_id, verification_status='verified')
+    fragment_version, prices_cached = await sync_to_async(price_fragment)(dealer.id)
+    prices = dealer.prices.filter(is_active=True).select_related('material__category').order_by('material__category', 'material__name')
+    if prices_cached:
+        # Only queried if the fragment expires before the page renders
+        prices_by_category = SimpleLazyObject(lambda: group_by_category(prices))
+    else:
+        prices_by_category = group_by_category(await fetched(prices))
+    ratings = await fetched(dealer.ratings.select_related('user')[:10])
+
+    context = {
+        'dealer': dealer,
+        'prices_by_category': prices_by_category,
+        'fragment_version': fragment_version,
+        'ratings': ratings,
+        'can_contact': request.user.is_authenticated and request.user.pk != dealer.user_id,
+    }
+    return await arender(request, 'accounts/dealer_detail.html', context)
+
+
+@conditional_page(price_page_clocks)
+@cache_anonymous_page(price_page_clocks)
+@read_only_view
+async def price_comparison(request):
+    """Compare prices across dealers for specific materials"""
+    material_id = request.GET.get('material')
+    grade = request.GET.get('grade', 'A')
+    context = {
+        'categories': await fetched(ScrapCategory.objects.filter(is_active=True).prefetch_related('materials')),
+        'selected_material': material_id,
+        'selected_grade': grade,
+        'grades': ScrapMaterial.QUALITY_GRADES,
+    }
+
+    if material_id:
+        context['material'] = await aget_object_or_404(ScrapMaterial, id=material_id)
+        context['prices'] = await fetched(DealerPrice.objects.filter(
+            material_id=material_id,
+            quality_grade=grade,
+            is_active=True,
+            dealer__verification_status='verified'
+        ).select_related('dealer__user').order_by('-price_per_unit'))
+
+    return await arender(request, 'accounts/price_comparison.html', context)
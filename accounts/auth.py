@@ -0,0 +1,65 @@
+"""
+Authentication backends that load the logged-in user from the cache.
+
+``AuthenticationMiddleware`` calls the session's backend ``get_user()`` on
+every request (``aget_user()`` for ``request.auser()`` in async views).
+These backends keep the user, annotated with ``has_dealer_profile``, in the
+cache under the user's change clock (``user:<id>``), which signals move
+whenever the user is saved or gains or loses a dealer profile. Non-dealers
+also get their ``dealer_profile`` marked missing, so
+``hasattr(request.user, 'dealer_profile')`` costs no query; dealers load
+the profile itself on first access as before.
+"""
+from allauth.account.auth_backends import AuthenticationBackend
+from asgiref.sync import sync_to_async
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+
+from core.conditional import read_clocks
+from .clocks import user_clock
+from .models import DealerProfile, User
+
+USER_PREFIX = 'auth:user:'
+USER_CACHE_TIMEOUT = 60 * 60
+
+# Sessions started before the cached backends keep working, see accounts.middleware
+CACHED_BACKENDS = {
+    'django.contrib.auth.backends.ModelBackend': 'accounts.auth.CachedModelBackend',
+    'allauth.account.auth_backends.AuthenticationBackend': 'accounts.auth.CachedAuthenticationBackend',
+}
+
+
+def cached_user(user_id):
+    """The user with ``has_dealer_profile`` set, from the cache while their clock stands still"""
+    key = f'{USER_PREFIX}{user_id}:{read_clocks(user_clock(user_id)).timestamp()}'
+    user = cache.get(key)
+    if user is None:
+        user = User.objects.annotate(
+            has_dealer_profile=Exists(DealerProfile.objects.filter(user=OuterRef('pk'))),
+        ).filter(pk=user_id).first()
+        if user is None:
+            return None
+        if not user.has_dealer_profile:
+            # Makes the reverse one-to-one raise DoesNotExist without a query
+            User.dealer_profile.related.set_cached_value(user, None)
+        cache.set(key, user, USER_CACHE_TIMEOUT)
+    return user
+
+
+class CachedUserMixin:
+    def get_user(self, user_id):
+        user = cached_user(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        # ModelBackend.aget_user queries the database itself, which request.auser() uses
+        return await sync_to_async(self.get_user)(user_id)
+
+
+class CachedModelBackend(CachedUserMixin, ModelBackend):
+    pass
+
+
+class CachedAuthenticationBackend(CachedUserMixin, AuthenticationBackend):
+    pass
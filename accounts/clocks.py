@@ -0,0 +1,56 @@
+"""
+Change clocks (``core.conditional``) for dealer and price pages.
+
+``directory`` moves with anything every page shows: dealer profiles and
+their users, categories and materials. ``dealer:<id>`` moves with one
+dealer's profile, prices and ratings; ``material:<id>`` with any dealer's
+price for that material, and ``prices`` with every price change.
+``user:<id>`` moves with a user and whether they have a dealer profile.
+"""
+from core.conditional import clock_values
+
+DIRECTORY = 'directory'
+PRICES = 'prices'
+
+
+def dealer_clock(dealer_id):
+    return f'dealer:{dealer_id}'
+
+
+def material_clock(material_id):
+    return f'material:{material_id}'
+
+
+def user_clock(user_id):
+    return f'user:{user_id}'
+
+
+def directory_clocks(request, *args, **kwargs):
+    return [DIRECTORY]
+
+
+def dealer_list_clocks(request, *args, **kwargs):
+    # Filtering by category depends on which materials dealers quote
+    if request.GET.get('category'):
+        return [DIRECTORY, PRICES]
+    return [DIRECTORY]
+
+
+def dealer_page_clocks(request, dealer_id, **kwargs):
+    return [DIRECTORY, dealer_clock(dealer_id)]
+
+
+def price_page_clocks(request, *args, **kwargs):
+    material_id = request.GET.get('material', '')
+    if material_id.isdigit():
+        return [DIRECTORY, material_clock(material_id)]
+    return [DIRECTORY]
+
+
+def dealer_versions(dealer_ids):
+    """``{dealer_id: version}`` for template fragments built from a dealer and the directory"""
+    values = clock_values(DIRECTORY, *[dealer_clock(dealer_id) for dealer_id in dealer_ids])
+    return {
+        dealer_id: max(values[DIRECTORY], values[dealer_clock(dealer_id)]).isoformat()
+        for dealer_id in dealer_ids
+    }
@@ -0,0 +1,143 @@
+"""
+Daily email digests for dealers.
+
+Every opted-in dealer's digest is assembled from the same five grouped
+queries (dealers, inquiries, ratings, own prices, market prices) no matter
+how many dealers there are, rendered from one compiled template pair, and
+sent in chunks over a single mail connection.
+"""
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .models import DealerProfile, DealerInquiry, DealerRating, DealerPrice
+
+DIGEST_CHUNK_SIZE = 100
+DIGEST_SUBJECT = "Your AkriOnline daily digest"
+
+
+def build_digests(now=None):
+    """Return digest contexts for opted-in dealers with something to report"""
+    now = now or timezone.now()
+    dealers = list(
+        DealerProfile.objects.filter(digest_opt_in=True, verification_status='verified')
+        .select_related('user')
+    )
+    if not dealers:
+        return []
+
+    since = {dealer.id: dealer.last_digest_sent_at or now - timedelta(days=1) for dealer in dealers}
+    earliest = min(since.values())
+
+    inquiries = defaultdict(list)
+    for inquiry in (DealerInquiry.objects
+                    .filter(dealer_id__in=since, created_at__gte=earliest)
+                    .select_related('user', 'material')
+                    .order_by('created_at')):
+        if inquiry.created_at >= since[inquiry.dealer_id]:
+            inquiries[inquiry.dealer_id].append(inquiry)
+
+    ratings = defaultdict(list)
+    for rating in (DealerRating.objects
+                   .filter(dealer_id__in=since, created_at__gte=earliest)
+                   .select_related('user')
+                   .order_by('created_at')):
+        if rating.created_at >= since[rating.dealer_id]:
+            ratings[rating.dealer_id].append(rating)
+
+    own_prices = defaultdict(list)
+    pairs = set()
+    for price in (DealerPrice.objects
+                  .filter(dealer_id__in=since, is_active=True)
+                  .select_related('material')
+                  .order_by('material__name', 'quality_grade')):
+        own_prices[price.dealer_id].append(price)
+        pairs.add((price.material_id, price.quality_grade))
+
+    # Market snapshot for every (material, grade) any digest dealer quotes
+    market_prices = defaultdict(list)
+    market_updates = defaultdict(list)
+    market = DealerPrice.objects.filter(
+        is_active=True,
+        dealer__verification_status='verified',
+        material_id__in={material_id for material_id, _ in pairs},
+        quality_grade__in={grade for _, grade in pairs},
+    ).values_list('dealer_id', 'material_id', 'quality_grade', 'price_per_unit', 'last_updated')
+    for dealer_id, material_id, grade, price_per_unit, last_updated in market:
+        key = (material_id, grade)
+        if key in pairs:
+            market_prices[key].append(price_per_unit)
+            market_updates[key].append((dealer_id, last_updated, price_per_unit))
+    for prices in market_prices.values():
+        prices.sort()
+
+    digests = []
+    for dealer in dealers:
+        price_changes = []
+        for price in own_prices[dealer.id]:
+            key = (price.material_id, price.quality_grade)
+            competitors = [
+                (last_updated, competitor_price)
+                for dealer_id, last_updated, competitor_price in market_updates[key]
+                if dealer_id != dealer.id
+            ]
+            if not any(last_updated >= since[dealer.id] for last_updated, _ in competitors):
+                continue
+            prices = market_prices[key]
+            price_changes.append({
+                'price': price,
+                'rank': len(prices) - bisect_right(prices, price.price_per_unit) + 1,
+                'dealers': len(prices),
+                'best_competitor_price': max(competitor_price for _, competitor_price in competitors),
+            })
+
+        if inquiries[dealer.id] or ratings[dealer.id] or price_changes:
+            digests.append({
+                'dealer': dealer,
+                'since': since[dealer.id],
+                'inquiries': inquiries[dealer.id],
+                'ratings': ratings[dealer.id],
+                'price_changes': price_changes,
+            })
+    return digests
+
+
+def send_digests(now=None, chunk_size=DIGEST_CHUNK_SIZE, connection=None):
+    """Build, render and send all due digests; return the number sent"""
+    now = now or timezone.now()
+    digests = build_digests(now)
+    if not digests:
+        return 0
+
+    # Compiled once per run and reused for every dealer
+    text_template = get_template('accounts/email/dealer_digest.txt')
+    html_template = get_template('accounts/email/dealer_digest.html')
+
+    messages = []
+    for digest in digests:
+        dealer = digest['dealer']
+        message = EmailMultiAlternatives(
+            DIGEST_SUBJECT,
+            text_template.render(digest),
+            to=[dealer.business_email or dealer.user.email],
+        )
+        message.attach_alternative(html_template.render(digest), 'text/html')
+        messages.append(message)
+
+    connection = connection or get_connection()
+    sent_ids = []
+    connection.open()
+    try:
+        for start in range(0, len(messages), chunk_size):
+            chunk = messages[start:start + chunk_size]
+            connection.send_messages(chunk)
+            sent_ids.extend(digest['dealer'].id for digest in digests[start:start + chunk_size])
+    finally:
+        connection.close()
+        # update() leaves updated_at alone, so the digest doesn't look like a profile edit
+        DealerProfile.objects.filter(id__in=sent_ids).update(last_digest_sent_at=now)
+    return len(sent_ids)
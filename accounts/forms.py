@@ -2,7 +2,7 @@ from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.forms import modelformset_factory
 from phonenumber_field.formfields import PhoneNumberField
-from .models import User, DealerProfile, DealerPrice, DealerInquiry, ScrapMaterial
+from .models import User, DealerProfile, DealerPrice, DealerInquiry, PriceAlert, ScrapMaterial
 
 class UserRegistrationForm(UserCreationForm):
     email = forms.EmailField(required=True)
@@ -95,4 +95,18 @@ class PriceSearchForm(forms.Form):
         choices=ScrapMaterial.QUALITY_GRADES,
         initial='A',
         widget=forms.Select(attrs={'class': 'form-control'})
-    )
\ No newline at end of file
+    )
+
+class PriceAlertForm(forms.ModelForm):
+    class Meta:
+        model = PriceAlert
+        fields = ['material', 'quality_grade', 'direction', 'target_price']
+        widgets = {
+            'target_price': forms.NumberInput(attrs={'step': '0.01', 'min': '0'}),
+        }
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['material'].queryset = ScrapMaterial.objects.filter(is_active=True)
+        for field in self.fields:
+            self.fields[field].widget.attrs.update({'class': 'form-control'})
@@ -0,0 +1,122 @@
+import asyncio
+import statistics
+import threading
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client, override_settings
+from django.test.utils import setup_databases, teardown_databases
+from django.urls import path
+
+from api.management.commands.bench_api import seed
+from accounts import async_views, views
+from accounts.models import User
+
+# The site's URLs plus both versions of each page side by side
+urlpatterns = [
+    path('bench/sync/dealers/', views.dealers_directory),
+    path('bench/async/dealers/', async_views.dealers_directory),
+    path('bench/sync/dealers/<int:dealer_id>/', views.dealer_detail),
+    path('bench/async/dealers/<int:dealer_id>/', async_views.dealer_detail),
+    path('bench/sync/prices/', views.price_comparison),
+    path('bench/async/prices/', async_views.price_comparison),
+] + import_module(settings.ROOT_URLCONF).urlpatterns
+
+
+async def asgi_get(application, host, url, cookie):
+    """One GET through the ASGI application, as a server would send it; returns the status"""
+    path_info, _, query = url.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path_info, 'raw_path': path_info.encode(), 'query_string': query.encode(), 'root_path': '',
+        'headers': [(b'host', host.encode()), (b'cookie', cookie.encode())],
+        'client': ('127.0.0.1', 50000), 'server': (host, 80),
+    }
+    body_sent = asyncio.Event()
+    messages = []
+
+    async def receive():
+        if not body_sent.is_set():
+            body_sent.set()
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # The client stays connected until the handler gives up listening
+        await asyncio.Future()
+
+    async def send(message):
+        messages.append(message)
+
+    await application(scope, receive, send)
+    return messages[0]['status']
+
+
+class Command(BaseCommand):
+    help = "Load the dealer and price pages through the ASGI handler, with their sync and async views"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=300, help="Requests per page and view")
+        parser.add_argument('--concurrency', type=int, default=20, help="Requests in flight at once")
+        parser.add_argument('--dealers', type=int, default=50)
+        parser.add_argument('--materials', type=int, default=10)
+
+    async def load(self, application, host, url, cookie, count, concurrency):
+        """(requests/s, p50 ms, p95 ms, peak threads) for ``count`` requests, ``concurrency`` at a time"""
+        latencies = []
+        remaining = iter(range(count))
+        peak_threads = threading.active_count()
+
+        async def client():
+            for _ in remaining:
+                started = time.perf_counter()
+                status = await asgi_get(application, host, url, cookie)
+                assert status == 200, (url, status)
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        async def watch_threads():
+            nonlocal peak_threads
+            while True:
+                peak_threads = max(peak_threads, threading.active_count())
+                await asyncio.sleep(0.005)
+
+        watcher = asyncio.create_task(watch_threads())
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        watcher.cancel()
+        quantiles = statistics.quantiles(latencies, n=20)
+        return count / elapsed, statistics.median(latencies), quantiles[18], peak_threads
+
+    def handle(self, *args, **options):
+        host = next((host for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost').lstrip('.')
+        # Each ASGI request runs its sync parts in its own thread and connection, so the
+        # benchmark rows are committed, to a throwaway test database
+        old_config = setup_databases(verbosity=0, interactive=False, aliases=set(connections))
+        try:
+            with override_settings(ROOT_URLCONF=__name__, DEBUG=False):
+                dealer, material = seed(options['dealers'], options['materials'])
+                client = Client(HTTP_HOST=host)
+                client.force_login(User.objects.create_user(username='bench-buyer', email='bench-buyer@example.com'))
+                cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+                pages = [
+                    ('dealer directory', 'dealers/'),
+                    ('dealer detail', f'dealers/{dealer.id}/'),
+                    ('price comparison', f'prices/?material={material.id}&grade=A'),
+                ]
+                application = ASGIHandler()
+                self.stdout.write(
+                    f"{'page':<18} {'view':<6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'peak threads':>13}"
+                )
+                for name, url in pages:
+                    for kind in ('sync', 'async'):
+                        full_url = f'/bench/{kind}/{url}'
+                        # Warm up templates, fragments and connections
+                        asyncio.run(self.load(application, host, full_url, cookie, 20, 4))
+                        rate, p50, p95, threads = asyncio.run(self.load(
+                            application, host, full_url, cookie, options['requests'], options['concurrency'],
+                        ))
+                        self.stdout.write(f"{name:<18} {kind:<6} {rate:>8.0f} {p50:>8.1f} {p95:>8.1f} {threads:>13}")
+        finally:
+            teardown_databases(old_config, verbosity=0)
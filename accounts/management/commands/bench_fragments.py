@@ -0,0 +1,61 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from api.management.commands.bench_api import seed
+from accounts.models import User
+
+
+class Command(BaseCommand):
+    help = "Compare logged-in render time of the dealer pages with and without template fragment caching"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Requests per page")
+        parser.add_argument('--dealers', type=int, default=100)
+        parser.add_argument('--materials', type=int, default=20)
+
+    def measure(self, client, url, count):
+        client.get(url)  # warm up templates and fill the fragment cache
+        queries = []
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_query):
+            response = client.get(url)
+        assert response.status_code == 200, (url, response.status_code)
+        started = time.perf_counter()
+        for _ in range(count):
+            client.get(url)
+        elapsed = time.perf_counter() - started
+        return elapsed / count * 1000, len(queries)
+
+    def handle(self, *args, **options):
+        host = next((host for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost').lstrip('.')
+        client = Client(HTTP_HOST=host, secure=not settings.DEBUG)
+        count = options['requests']
+        # {% cache %} uses a "template_fragments" cache when one is configured
+        without_fragments = dict(settings.CACHES, template_fragments={
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        })
+
+        # Benchmark rows are rolled back
+        with transaction.atomic():
+            dealer, _ = seed(options['dealers'], options['materials'])
+            client.force_login(User.objects.create_user(username='bench-buyer', email='bench-buyer@example.com'))
+            pages = [
+                ('dealer directory', reverse('accounts:dealers_directory')),
+                ('dealer detail', reverse('accounts:dealer_detail', args=[dealer.id])),
+            ]
+            self.stdout.write(f"{'page':<18} {'fragments':<10} {'ms/req':>8} {'queries':>8}")
+            for name, url in pages:
+                for label, caches in [('off', without_fragments), ('on', settings.CACHES)]:
+                    with override_settings(CACHES=caches):
+                        ms, queries = self.measure(client, url, count)
+                    self.stdout.write(f"{name:<18} {label:<10} {ms:>8.2f} {queries:>8}")
+            transaction.set_rollback(True)
@@ -0,0 +1,53 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import DealerProfile
+from accounts.price_upload import PriceSheetError, apply_price_sheet
+
+
+class Command(BaseCommand):
+    help = "Bulk create/update a dealer's prices from a CSV or JSON price sheet"
+
+    def add_arguments(self, parser):
+        parser.add_argument('dealer', help="Dealer profile id or the dealer's username")
+        parser.add_argument('path', help="CSV or JSON file ('-' reads stdin)")
+        parser.add_argument('--format', choices=['csv', 'json'], default=None, help="Defaults to sniffing the content")
+        parser.add_argument('--replace', action='store_true', help="Deactivate prices that are missing from the sheet")
+        parser.add_argument('--dry-run', action='store_true', help="Validate and show the diff without saving")
+
+    def handle(self, *args, **options):
+        lookup = {'pk': options['dealer']} if options['dealer'].isdigit() else {'user__username': options['dealer']}
+        dealer = DealerProfile.objects.filter(**lookup).first()
+        if dealer is None:
+            raise CommandError(f"Dealer '{options['dealer']}' not found.")
+
+        if options['path'] == '-':
+            data = sys.stdin.read()
+        else:
+            try:
+                with open(options['path'], 'rb') as handle:
+                    data = handle.read()
+            except OSError as e:
+                raise CommandError(str(e))
+
+        started = time.perf_counter()
+        try:
+            summary = apply_price_sheet(
+                dealer, data, options['format'], replace=options['replace'], dry_run=options['dry_run'],
+            )
+        except PriceSheetError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+
+        for row, message in summary['errors']:
+            self.stderr.write(f"Row {row}: {message}")
+        if summary['errors']:
+            raise CommandError(f"{len(summary['errors'])} invalid rows; nothing was saved.")
+
+        prefix = "Dry run: " if options['dry_run'] else ""
+        self.stdout.write(
+            f"{prefix}{summary['created']} created, {summary['updated']} updated, "
+            f"{summary['unchanged']} unchanged for {dealer.business_name} in {elapsed * 1000:.0f}ms."
+        )
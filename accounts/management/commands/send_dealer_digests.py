@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from accounts.digest import DIGEST_CHUNK_SIZE, build_digests, send_digests
+
+
+class Command(BaseCommand):
+    help = "Send the daily digest email to every opted-in dealer with new activity"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=DIGEST_CHUNK_SIZE, help="Messages handed to the mail connection per call")
+        parser.add_argument('--dry-run', action='store_true', help="Only report how many digests would be sent")
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            self.stdout.write(f"{len(build_digests())} digests due.")
+            return
+        sent = send_digests(chunk_size=options['chunk_size'])
+        self.stdout.write(f"Sent {sent} dealer digests.")
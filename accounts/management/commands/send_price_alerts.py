@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from accounts.price_alerts import ALERT_CHUNK_SIZE, send_price_alerts
+
+
+class Command(BaseCommand):
+    help = "Email triggered dealer price alerts, at most one message per user per hour"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=ALERT_CHUNK_SIZE, help="Messages sent per SMTP batch")
+
+    def handle(self, *args, **options):
+        sent = send_price_alerts(chunk_size=options['chunk_size'])
+        self.stdout.write(f"Sent {sent} price alert emails.")
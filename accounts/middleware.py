@@ -0,0 +1,14 @@
+from django.contrib.auth import BACKEND_SESSION_KEY
+from django.contrib.auth.middleware import AuthenticationMiddleware
+
+from .auth import CACHED_BACKENDS
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """``AuthenticationMiddleware`` that moves older sessions onto the cached backends"""
+
+    def process_request(self, request):
+        backend = request.session.get(BACKEND_SESSION_KEY)
+        if backend in CACHED_BACKENDS:
+            request.session[BACKEND_SESSION_KEY] = CACHED_BACKENDS[backend]
+        super().process_request(request)
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-19 04:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_dealerprofile_business_phone_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dealerprofile',
+            name='digest_opt_in',
+            field=models.BooleanField(default=False, help_text='Receive a daily email digest instead of per-inquiry emails'),
+        ),
+        migrations.AddField(
+            model_name='dealerprofile',
+            name='last_digest_sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-19 04:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_dealerprofile_digest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quality_grade', models.CharField(choices=[('A', 'Grade A (Excellent)'), ('B', 'Grade B (Good)'), ('C', 'Grade C (Fair)'), ('D', 'Grade D (Poor)')], max_length=1)),
+                ('direction', models.CharField(choices=[('above', 'Rises to or above'), ('below', 'Falls to or below')], default='above', max_length=5)),
+                ('target_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('is_active', models.BooleanField(default=True)),
+                ('triggered_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('triggered_at', models.DateTimeField(blank=True, null=True)),
+                ('notified_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='accounts.scrapmaterial')),
+                ('triggered_dealer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='accounts.dealerprofile')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_alerts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['triggered_at'], name='accounts_pr_trigger_b407aa_idx')],
+                'unique_together': {('user', 'material', 'quality_grade', 'direction', 'target_price')},
+            },
+        ),
+    ]
@@ -2,7 +2,8 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator, MaxValueValidator
 from phonenumber_field.modelfields import PhoneNumberField
-from PIL import Image
+from core.jobs import enqueue
+from core.models import ChangedFieldsMixin
 import os
 
 # TODO: ARCHITECTURAL IMPROVEMENT NEEDED
@@ -19,7 +20,7 @@ import os
 # 2. Or move these models to marketplace app with proper migration
 # 3. Update all imports and references accordingly
 
-class User(AbstractUser):
+class User(ChangedFieldsMixin, AbstractUser):
     """Extended User Model with dealer support"""
     USER_TYPES = [
         ('regular', 'Regular User'),
@@ -47,15 +48,22 @@ class User(AbstractUser):
         return f"{self.username} ({self.get_user_type_display()})"
 
     def save(self, *args, **kwargs):
+        new_picture = self.profile_picture and self.changed_fields(['profile_picture'], kwargs.get('update_fields'))
         super().save(*args, **kwargs)
         
-        # Resize profile picture
-        if self.profile_picture:
-            img = Image.open(self.profile_picture.path)
-            if img.height > 300 or img.width > 300:
-                output_size = (300, 300)
-                img.thumbnail(output_size)
-                img.save(self.profile_picture.path)
+        # Resize a new profile picture in the background
+        if new_picture:
+            enqueue('accounts.tasks.resize_profile_picture', self.pk)
+    
+    def resize_profile_picture(self):
+        """Shrink the profile picture to at most 300x300"""
+        from PIL import Image
+        
+        img = Image.open(self.profile_picture.path)
+        if img.height > 300 or img.width > 300:
+            output_size = (300, 300)
+            img.thumbnail(output_size)
+            img.save(self.profile_picture.path)
 
 class DealerProfile(models.Model):
     """Extended profile for verified dealers"""
@@ -97,6 +105,10 @@ class DealerProfile(models.Model):
     total_ratings = models.PositiveIntegerField(default=0)
     total_transactions = models.PositiveIntegerField(default=0)
     
+    # Notifications
+    digest_opt_in = models.BooleanField(default=False, help_text="Receive a daily email digest instead of per-inquiry emails")
+    last_digest_sent_at = models.DateTimeField(blank=True, null=True)
+    
     # Location for nearby dealer search
     latitude = models.DecimalField(max_digits=9, decimal_places=6, blank=True, null=True)
     longitude = models.DecimalField(max_digits=9, decimal_places=6, blank=True, null=True)
@@ -154,7 +166,7 @@ class ScrapMaterial(models.Model):
 
 
 
-class DealerPrice(models.Model):
+class DealerPrice(ChangedFieldsMixin, models.Model):
     """Dealer prices for different scrap materials"""
     dealer = models.ForeignKey(DealerProfile, on_delete=models.CASCADE, related_name='prices')
     material = models.ForeignKey(ScrapMaterial, on_delete=models.CASCADE)
@@ -170,6 +182,13 @@ class DealerPrice(models.Model):
     
     def __str__(self):
         return f"{self.dealer.business_name} - {self.material.name} ({self.quality_grade}) - ₹{self.price_per_unit}/{self.material.unit}"
+    
+    @property
+    def previous_price(self):
+        """Price before this save, or None for a new (or re-activated) quote; price alerts use it in ``post_save``"""
+        if not self.stored_value('is_active', False):
+            return None
+        return self.stored_value('price_per_unit')
 
 class DealerRating(models.Model):
     """User ratings for dealers"""
@@ -212,4 +231,37 @@ class DealerInquiry(models.Model):
         verbose_name_plural = "Dealer Inquiries"
     
     def __str__(self):
-        return f"Inquiry from {self.user.username} to {self.dealer.business_name}"
\ No newline at end of file
+        return f"Inquiry from {self.user.username} to {self.dealer.business_name}"
+
+class PriceAlert(models.Model):
+    """Notify a user when a verified dealer's price for a material crosses a target"""
+    DIRECTIONS = [
+        ('above', 'Rises to or above'),
+        ('below', 'Falls to or below'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='price_alerts')
+    material = models.ForeignKey(ScrapMaterial, on_delete=models.CASCADE)
+    quality_grade = models.CharField(max_length=1, choices=ScrapMaterial.QUALITY_GRADES)
+    direction = models.CharField(max_length=5, choices=DIRECTIONS, default='above')
+    target_price = models.DecimalField(max_digits=10, decimal_places=2)
+    is_active = models.BooleanField(default=True)
+    
+    # Latest crossing waiting to be emailed; kept after sending for reference
+    triggered_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    triggered_dealer = models.ForeignKey(DealerProfile, on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
+    triggered_at = models.DateTimeField(blank=True, null=True)
+    notified_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        unique_together = ['user', 'material', 'quality_grade', 'direction', 'target_price']
+        indexes = [models.Index(fields=['triggered_at'])]
+    
+    @property
+    def is_pending(self):
+        return self.triggered_at is not None and (self.notified_at is None or self.triggered_at > self.notified_at)
+    
+    def __str__(self):
+        return f"{self.user.username}: {self.material.name} ({self.quality_grade}) {self.direction} ₹{self.target_price}"
@@ -0,0 +1,148 @@
+"""
+Dealer price alerts.
+
+Active ``PriceAlert`` targets are kept in a ``ThresholdIndex``: per
+(material, grade), one sorted list of "above" targets and one of "below"
+targets. When a verified dealer's quote moves from ``old`` to ``new``, the
+alerts it crossed are exactly the targets in ``(old, new]`` (rising) or
+``[new, old)`` (falling), found with two bisects instead of a scan of every
+subscription.
+
+Crossed alerts are marked triggered in one ``UPDATE``; an alert already
+waiting to be sent keeps only its best trigger, so a burst of dealer updates
+yields a single notification. ``send_price_alerts`` then mails each user at
+most once per ``MIN_INTERVAL``, bundling all of their triggered alerts.
+"""
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import F, Max, Q
+from django.template.loader import get_template
+from django.utils import timezone
+
+from core.indexes import LocalIndex
+from .models import PriceAlert
+
+MIN_INTERVAL = timedelta(hours=1)
+ALERT_CHUNK_SIZE = 100
+ALERT_SUBJECT = "Dealer prices crossed your targets"
+
+
+class ThresholdIndex:
+    """Active alert targets sorted per (material_id, quality_grade) and direction"""
+
+    def __init__(self, thresholds):
+        self.thresholds = thresholds
+
+    @classmethod
+    def build(cls):
+        rows = defaultdict(list)
+        for alert_id, material_id, grade, direction, target in PriceAlert.objects.filter(
+            is_active=True,
+        ).values_list('id', 'material_id', 'quality_grade', 'direction', 'target_price'):
+            rows[(material_id, grade, direction)].append((target, alert_id))
+
+        thresholds = {}
+        for key, targets in rows.items():
+            targets.sort()
+            thresholds[key] = ([target for target, _ in targets], [alert_id for _, alert_id in targets])
+        return cls(thresholds)
+
+    def crossed(self, material_id, quality_grade, old_price, new_price):
+        """Return ids of alerts whose target lies between the old and the new price"""
+        if old_price is not None and new_price == old_price:
+            return []
+        crossed = []
+        if old_price is None or new_price > old_price:
+            targets, ids = self.thresholds.get((material_id, quality_grade, 'above'), ([], []))
+            start = 0 if old_price is None else bisect_right(targets, old_price)
+            crossed.extend(ids[start:bisect_right(targets, new_price)])
+        if old_price is None or new_price < old_price:
+            targets, ids = self.thresholds.get((material_id, quality_grade, 'below'), ([], []))
+            end = len(targets) if old_price is None else bisect_left(targets, old_price)
+            crossed.extend(ids[bisect_left(targets, new_price):end])
+        return crossed
+
+
+threshold_index = LocalIndex('accounts:price_alert_version', ThresholdIndex.build)
+get_index = threshold_index.get
+invalidate_index = threshold_index.invalidate
+
+
+def trigger_alerts(price, old_price, now=None):
+    """
+    Mark the alerts crossed by a saved ``DealerPrice`` as triggered.
+
+    Returns the number of alerts that gained a (better) pending trigger.
+    """
+    if not price.is_active:
+        return 0
+    alert_ids = get_index().crossed(price.material_id, price.quality_grade, old_price, price.price_per_unit)
+    if not alert_ids or price.dealer.verification_status != 'verified':
+        return 0
+
+    # An alert already waiting to be sent only moves to a better price
+    already_sent = Q(triggered_at__isnull=True) | Q(notified_at__gte=F('triggered_at'))
+    better = (
+        Q(direction='above', triggered_price__lt=price.price_per_unit)
+        | Q(direction='below', triggered_price__gt=price.price_per_unit)
+    )
+    return PriceAlert.objects.filter(id__in=alert_ids).filter(already_sent | better).update(
+        triggered_price=price.price_per_unit,
+        triggered_dealer=price.dealer_id,
+        triggered_at=now or timezone.now(),
+    )
+
+
+def send_price_alerts(now=None, chunk_size=ALERT_CHUNK_SIZE, connection=None):
+    """Email pending alerts, one message per user and at most one per ``MIN_INTERVAL``"""
+    now = now or timezone.now()
+    pending = defaultdict(list)
+    for alert in (PriceAlert.objects
+                  .filter(is_active=True, triggered_at__isnull=False)
+                  .filter(Q(notified_at__isnull=True) | Q(triggered_at__gt=F('notified_at')))
+                  .exclude(user__email='')
+                  .select_related('user', 'material', 'triggered_dealer')
+                  .order_by('triggered_at')):
+        pending[alert.user].append(alert)
+    if not pending:
+        return 0
+
+    last_sent = dict(
+        PriceAlert.objects.filter(user__in=pending)
+        .values('user_id')
+        .annotate(last=Max('notified_at'))
+        .values_list('user_id', 'last')
+    )
+    due = [(user, alerts) for user, alerts in pending.items()
+           if not last_sent.get(user.id) or now - last_sent[user.id] >= MIN_INTERVAL]
+    if not due:
+        return 0
+
+    text_template = get_template('accounts/email/price_alerts.txt')
+    html_template = get_template('accounts/email/price_alerts.html')
+
+    batches = []
+    for user, alerts in due:
+        context = {'user': user, 'alerts': alerts}
+        message = EmailMultiAlternatives(ALERT_SUBJECT, text_template.render(context), to=[user.email])
+        message.attach_alternative(html_template.render(context), 'text/html')
+        batches.append((message, [alert.id for alert in alerts]))
+
+    connection = connection or get_connection()
+    sent_ids = []
+    emails = 0
+    connection.open()
+    try:
+        for start in range(0, len(batches), chunk_size):
+            chunk = batches[start:start + chunk_size]
+            connection.send_messages([message for message, _ in chunk])
+            for _, alert_ids in chunk:
+                sent_ids.extend(alert_ids)
+            emails += len(chunk)
+    finally:
+        connection.close()
+        PriceAlert.objects.filter(id__in=sent_ids).update(notified_at=now)
+    return emails
@@ -0,0 +1,211 @@
+"""
+Bulk dealer price upload.
+
+A price sheet (CSV or a JSON list of objects) is validated in one pass
+against a material lookup built with a single query, diffed against the
+dealer's existing quotes (one more query), and applied with
+``bulk_create(update_conflicts=True)`` and ``bulk_update`` inside one
+transaction. The sheet is all-or-nothing: any invalid row rejects it.
+
+Bulk writes don't send ``post_save``, so after the transaction commits a
+single ``prices_bulk_updated`` signal carries every change, letting the
+price alert, repricing and matching receivers do their work once per upload.
+
+Columns: ``material`` (id or name), optional ``category`` (to disambiguate a
+name), ``grade``, ``price``, optional ``minimum_quantity`` and ``is_active``.
+"""
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from .models import DealerPrice, ScrapMaterial
+from .signals import prices_bulk_updated
+
+GRADES = {code for code, _ in ScrapMaterial.QUALITY_GRADES}
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'active'}
+FALSE_VALUES = {'0', 'false', 'no', 'n', 'inactive'}
+UPDATE_FIELDS = ['price_per_unit', 'minimum_quantity', 'is_active', 'last_updated']
+
+
+class PriceSheetError(Exception):
+    """The sheet could not be read at all (bad format, not a list, no header...)"""
+
+
+def read_sheet(data, format=None):
+    """Return a list of row dicts from CSV or JSON ``data`` (bytes or str)"""
+    if isinstance(data, bytes):
+        try:
+            data = data.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise PriceSheetError("The file must be UTF-8 encoded.")
+    if format is None:
+        format = 'json' if data.lstrip().startswith(('[', '{')) else 'csv'
+
+    if format == 'json':
+        try:
+            rows = json.loads(data)
+        except ValueError as e:
+            raise PriceSheetError(f"Invalid JSON: {e}")
+        if isinstance(rows, dict):
+            rows = rows.get('prices')
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise PriceSheetError('JSON must be a list of price objects (or {"prices": [...]}).')
+        return rows
+
+    reader = csv.DictReader(io.StringIO(data))
+    if not reader.fieldnames:
+        raise PriceSheetError("The CSV file is empty.")
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+    return list(reader)
+
+
+def material_lookup():
+    """Map material ids, names and (category, name) pairs to material ids, in one query"""
+    lookup = {}
+    ambiguous = set()
+    for material_id, name, category in ScrapMaterial.objects.filter(is_active=True).order_by().values_list(
+        'id', 'name', 'category__name',
+    ):
+        lookup[str(material_id)] = material_id
+        lookup[(category.strip().lower(), name.strip().lower())] = material_id
+        key = name.strip().lower()
+        if key in lookup:
+            ambiguous.add(key)
+        lookup[key] = material_id
+    for key in ambiguous:
+        lookup[key] = None
+    return lookup
+
+
+def clean_sheet(rows, lookup=None):
+    """
+    Validate every row in one pass.
+
+    Returns ``(entries, errors)``: ``entries`` maps ``(material_id, grade)`` to
+    the cleaned values, ``errors`` lists ``(row_number, message)``.
+    """
+    lookup = material_lookup() if lookup is None else lookup
+    entries = {}
+    errors = []
+    for number, row in enumerate(rows, start=1):
+        row = {str(key).strip().lower(): '' if value is None else str(value).strip() for key, value in row.items() if key}
+        material = row.get('material', '')
+        category = row.get('category', '')
+        if category:
+            material_id = lookup.get((category.lower(), material.lower()))
+        else:
+            material_id = lookup.get(material) or lookup.get(material.lower())
+        if material_id is None:
+            if not category and material.lower() in lookup:
+                errors.append((number, f"Material '{material}' exists in several categories; add a category column."))
+            else:
+                errors.append((number, f"Unknown material '{material}'."))
+            continue
+
+        grade = row.get('grade', row.get('quality_grade', '')).upper()
+        if grade not in GRADES:
+            errors.append((number, f"Grade must be one of {', '.join(sorted(GRADES))}."))
+            continue
+
+        try:
+            price = Decimal(row.get('price', row.get('price_per_unit', ''))).quantize(Decimal('0.01'))
+            minimum = Decimal(row.get('minimum_quantity') or '1').quantize(Decimal('0.01'))
+        except InvalidOperation:
+            price = minimum = None
+        if price is None or not (price.is_finite() and minimum.is_finite()):
+            errors.append((number, "Price and minimum quantity must be numbers."))
+            continue
+        if price <= 0 or minimum <= 0 or price >= Decimal('1e8') or minimum >= Decimal('1e8'):
+            errors.append((number, "Price and minimum quantity must be positive and below 100,000,000."))
+            continue
+
+        active = row.get('is_active', '').lower()
+        if active and active not in TRUE_VALUES | FALSE_VALUES:
+            errors.append((number, "is_active must be yes/no (or true/false)."))
+            continue
+
+        key = (material_id, grade)
+        if key in entries:
+            errors.append((number, f"Duplicate row for {material} grade {grade}."))
+            continue
+        entries[key] = {
+            'price_per_unit': price,
+            'minimum_quantity': minimum,
+            'is_active': active not in FALSE_VALUES,
+        }
+    return entries, errors
+
+
+def diff_prices(dealer, entries, replace=False):
+    """
+    Compare cleaned ``entries`` with the dealer's stored quotes.
+
+    Returns a dict of ``create`` and ``update`` (lists of ``DealerPrice``),
+    ``unchanged`` (count) and ``previous`` (``{pk: (price, is_active)}``
+    before the change). With ``replace`` quotes missing from the sheet are
+    deactivated.
+    """
+    existing = {(price.material_id, price.quality_grade): price for price in dealer.prices.all()}
+    create, update, previous = [], [], {}
+    unchanged = 0
+    for key, values in entries.items():
+        price = existing.get(key)
+        if price is None:
+            create.append(DealerPrice(dealer=dealer, material_id=key[0], quality_grade=key[1], **values))
+        elif any(getattr(price, field) != value for field, value in values.items()):
+            previous[price.pk] = (price.price_per_unit, price.is_active)
+            for field, value in values.items():
+                setattr(price, field, value)
+            update.append(price)
+        else:
+            unchanged += 1
+    if replace:
+        for key, price in existing.items():
+            if key not in entries and price.is_active:
+                previous[price.pk] = (price.price_per_unit, price.is_active)
+                price.is_active = False
+                update.append(price)
+    return {'create': create, 'update': update, 'unchanged': unchanged, 'previous': previous}
+
+
+def apply_price_sheet(dealer, data, format=None, replace=False, dry_run=False):
+    """
+    Validate and apply a price sheet for ``dealer``.
+
+    Returns a summary dict with ``created``, ``updated``, ``unchanged`` and
+    ``errors``; nothing is written when there are errors or ``dry_run`` is set.
+    """
+    entries, errors = clean_sheet(read_sheet(data, format))
+    summary = {'rows': len(entries) + len(errors), 'created': 0, 'updated': 0, 'unchanged': 0, 'errors': errors}
+    if errors:
+        return summary
+
+    diff = diff_prices(dealer, entries, replace=replace)
+    summary.update(created=len(diff['create']), updated=len(diff['update']), unchanged=diff['unchanged'])
+    if dry_run or not (diff['create'] or diff['update']):
+        return summary
+
+    now = timezone.now()
+    for price in diff['create'] + diff['update']:
+        price.last_updated = now
+    # update_conflicts also covers quotes added since the diff was read. MySQL's
+    # ON DUPLICATE KEY UPDATE takes no conflict target (and Django refuses one);
+    # the (dealer, material, grade) key is the only one a new quote can hit.
+    conflicts = {'update_conflicts': True, 'update_fields': UPDATE_FIELDS}
+    if connections[router.db_for_write(DealerPrice)].features.supports_update_conflicts_with_target:
+        conflicts['unique_fields'] = ['dealer', 'material', 'quality_grade']
+    with transaction.atomic():
+        DealerPrice.objects.bulk_create(diff['create'], **conflicts)
+        DealerPrice.objects.bulk_update(diff['update'], UPDATE_FIELDS)
+
+        changes = [(price, None) for price in diff['create']]
+        changes += [
+            (price, diff['previous'][price.pk][0] if diff['previous'][price.pk][1] else None)
+            for price in diff['update']
+        ]
+        transaction.on_commit(lambda: prices_bulk_updated.send(sender=DealerPrice, dealer=dealer, changes=changes))
+    return summary
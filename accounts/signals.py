@@ -0,0 +1,85 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+
+from core.conditional import move_clocks, touch_clocks
+from core.jobs import enqueue_once
+from . import price_alerts
+from .clocks import DIRECTORY, PRICES, dealer_clock, material_clock, user_clock
+from .models import User, DealerProfile, ScrapCategory, ScrapMaterial, DealerPrice, DealerRating, PriceAlert
+
+# Sent once per bulk price upload (which bypasses post_save) with
+# ``dealer`` and ``changes``: a list of ``(DealerPrice, previous_price)``.
+prices_bulk_updated = Signal()
+
+
+@receiver(post_save, sender=DealerPrice)
+def trigger_price_alerts(sender, instance, **kwargs):
+    """Flag the alerts this quote change crossed and schedule a batched send"""
+    if price_alerts.trigger_alerts(instance, instance.previous_price):
+        # The short delay lets a burst of price edits share one email per user
+        enqueue_once('accounts.tasks.send_price_alerts', delay=60)
+
+
+@receiver(prices_bulk_updated)
+def trigger_price_alerts_in_bulk(sender, dealer, changes, **kwargs):
+    triggered = sum(price_alerts.trigger_alerts(price, previous) for price, previous in changes)
+    if triggered:
+        enqueue_once('accounts.tasks.send_price_alerts', delay=60)
+
+
+@receiver([post_save, post_delete], sender=PriceAlert)
+def invalidate_price_alert_index(sender, instance, **kwargs):
+    # Triggering uses queryset.update(), so this only fires for subscription edits
+    price_alerts.invalidate_index()
+
+
+@receiver([post_save, post_delete], sender=DealerPrice)
+def touch_price_clocks(sender, instance, **kwargs):
+    touch_clocks(PRICES, dealer_clock(instance.dealer_id), material_clock(instance.material_id))
+
+
+@receiver(prices_bulk_updated)
+def touch_price_clocks_in_bulk(sender, dealer, changes, **kwargs):
+    touch_clocks(PRICES, dealer_clock(dealer.pk), *{material_clock(price.material_id) for price, _ in changes})
+
+
+@receiver([post_save, post_delete], sender=DealerRating)
+def touch_rating_clocks(sender, instance, **kwargs):
+    touch_clocks(dealer_clock(instance.dealer_id))
+
+
+@receiver([post_save, post_delete], sender=DealerProfile)
+def touch_dealer_clocks(sender, instance, **kwargs):
+    # Names, ratings and verification show up in the directory and in every price comparison
+    touch_clocks(DIRECTORY, dealer_clock(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=ScrapCategory)
+@receiver([post_save, post_delete], sender=ScrapMaterial)
+def touch_catalog_clock(sender, instance, **kwargs):
+    touch_clocks(DIRECTORY)
+
+
+@receiver(post_save, sender=User)
+def touch_dealer_user_clock(sender, instance, update_fields=None, **kwargs):
+    """Dealer cities and pictures are shown on dealer pages; logins don't matter"""
+    if instance.user_type == 'dealer' and update_fields != frozenset({'last_login'}):
+        touch_clocks(DIRECTORY)
+
+
+@receiver([post_save, post_delete], sender=User)
+def touch_user_clock(sender, instance, created=False, **kwargs):
+    """Logged-in users are served from the cache (accounts.auth)"""
+    if created:
+        # The id may have belonged to a rolled-back user whose cache entry survived
+        move_clocks(user_clock(instance.pk))
+    else:
+        touch_clocks(user_clock(instance.pk))
+
+
+@receiver(post_save, sender=DealerProfile)
+@receiver(post_delete, sender=DealerProfile)
+def touch_profile_owner_clock(sender, instance, created=True, **kwargs):
+    # Cached users only record whether a profile exists
+    if created:
+        touch_clocks(user_clock(instance.user_id))
@@ -0,0 +1,37 @@
+from django.db.models import Avg, Count
+
+from core.jobs import job
+from . import price_alerts
+from .digest import send_digests
+from .models import User, DealerProfile
+
+
+@job(max_attempts=2)
+def resize_profile_picture(user_id):
+    user = User.objects.filter(pk=user_id).first()
+    if user and user.profile_picture:
+        user.resize_profile_picture()
+
+
+@job(priority=5)
+def recompute_dealer_rating(dealer_id):
+    """Refresh a dealer's average rating and rating count"""
+    stats = DealerProfile.objects.filter(pk=dealer_id).aggregate(
+        avg_rating=Avg('ratings__rating'),
+        total=Count('ratings'),
+    )
+    dealer = DealerProfile.objects.get(pk=dealer_id)
+    dealer.average_rating = round(stats['avg_rating'] or 0, 2)
+    dealer.total_ratings = stats['total']
+    dealer.save()
+
+
+@job(max_attempts=1, timeout=1800)
+def send_dealer_digests():
+    send_digests()
+
+
+@job(timeout=600)
+def send_price_alerts():
+    """Email triggered dealer price alerts, rate-limited per user"""
+    price_alerts.send_price_alerts()
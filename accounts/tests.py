@@ -1,3 +1,596 @@
-from django.test import TestCase
+import csv
+import io
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.cache import cache
+from django.db import connection
+from django.http import Http404
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import async_views, price_alerts, views
+from core.models import Job
+from .price_upload import apply_price_sheet
+from .signals import prices_bulk_updated
+from .digest import build_digests, send_digests
+from .models import User, DealerProfile, ScrapCategory, ScrapMaterial, DealerPrice, DealerRating, DealerInquiry, PriceAlert
+
+
+class DealerFixturesMixin:
+    """Shared helpers for creating users, dealers and materials"""
+
+    def make_user(self, username, **kwargs):
+        return User.objects.create_user(username=username, email=f'{username}@example.com', **kwargs)
+
+    def make_dealer(self, username, **kwargs):
+        user = self.make_user(username, user_type='dealer')
+        defaults = {
+            'business_name': f'{username.title()} Traders',
+            'business_registration_number': f'REG-{username}',
+            'business_address': 'Market Road',
+            'business_phone': '+919876543210',
+            'business_email': f'{username}@business.example.com',
+            'specialization': 'Metals',
+            'verification_status': 'verified',
+        }
+        defaults.update(kwargs)
+        return DealerProfile.objects.create(user=user, **defaults)
+
+    def make_material(self, name='Copper', category='Metals'):
+        category, _ = ScrapCategory.objects.get_or_create(name=category)
+        return ScrapMaterial.objects.create(category=category, name=name, quality_grades=['A', 'B'])
+
+
+class DealerDigestTests(DealerFixturesMixin, TestCase):
+    def setUp(self):
+        self.copper = self.make_material()
+        self.buyer = self.make_user('buyer')
+        self.dealers = [self.make_dealer(f'dealer{i}', digest_opt_in=True) for i in range(3)]
+        for i, dealer in enumerate(self.dealers):
+            DealerPrice.objects.create(dealer=dealer, material=self.copper, quality_grade='A', price_per_unit=Decimal(500 + i * 10))
+        self.make_dealer('quiet')
+
+    def test_digests_are_built_with_a_fixed_number_of_queries(self):
+        for dealer in self.dealers:
+            DealerInquiry.objects.create(dealer=dealer, user=self.buyer, material=self.copper, subject='Copper wire', message='Hi')
+            DealerRating.objects.create(dealer=dealer, user=self.buyer, rating=5)
+
+        with self.assertNumQueries(5):
+            digests = build_digests()
+
+        self.assertEqual(len(digests), 3)
+        by_dealer = {digest['dealer']: digest for digest in digests}
+        cheapest = by_dealer[self.dealers[0]]
+        self.assertEqual(len(cheapest['inquiries']), 1)
+        self.assertEqual(len(cheapest['ratings']), 1)
+        self.assertEqual(cheapest['price_changes'][0]['rank'], 3)
+        self.assertEqual(cheapest['price_changes'][0]['best_competitor_price'], Decimal('520'))
+
+    def test_send_digests_marks_dealers_and_skips_them_next_run(self):
+        sent = send_digests(chunk_size=2)
+
+        self.assertEqual(sent, 3)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertIn('Market price changes', mail.outbox[0].body)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+        self.assertFalse(DealerProfile.objects.filter(digest_opt_in=True, last_digest_sent_at__isnull=True).exists())
+
+        self.assertEqual(send_digests(now=timezone.now() + timedelta(minutes=1)), 0)
+
+    def test_only_activity_since_last_digest_is_included(self):
+        dealer = self.dealers[0]
+        DealerInquiry.objects.create(dealer=dealer, user=self.buyer, subject='Old', message='Hi')
+        DealerProfile.objects.update(last_digest_sent_at=timezone.now())
+        DealerInquiry.objects.create(dealer=dealer, user=self.buyer, subject='New', message='Hi')
+
+        digests = build_digests()
+
+        self.assertEqual(len(digests), 1)
+        self.assertEqual([inquiry.subject for inquiry in digests[0]['inquiries']], ['New'])
+        self.assertEqual(digests[0]['price_changes'], [])
+
+
+@override_settings(JOBS_RUN_INLINE=False)
+class PriceAlertTests(DealerFixturesMixin, TestCase):
+    def setUp(self):
+        price_alerts.invalidate_index()
+        self.copper = self.make_material()
+        self.seller = self.make_user('seller')
+        self.dealer = self.make_dealer('dealer')
+        self.price = DealerPrice.objects.create(dealer=self.dealer, material=self.copper, quality_grade='A', price_per_unit=550)
+
+    def set_price(self, price, value):
+        # Reload so the stored quote is known, as it is for a form-edited price
+        price = DealerPrice.objects.get(pk=price.pk)
+        price.price_per_unit = value
+        price.save()
+        return price
+
+    def test_range_lookup_finds_only_crossed_targets(self):
+        for target in (500, 560, 600, 650):
+            PriceAlert.objects.create(user=self.seller, material=self.copper, quality_grade='A', target_price=target)
+        below = PriceAlert.objects.create(user=self.seller, material=self.copper, quality_grade='A', direction='below', target_price=520)
+
+        index = price_alerts.get_index()
+        with self.assertNumQueries(0):
+            rising = index.crossed(self.copper.id, 'A', Decimal('550'), Decimal('600'))
+            falling = index.crossed(self.copper.id, 'A', Decimal('550'), Decimal('500'))
+            unchanged = index.crossed(self.copper.id, 'A', Decimal('550'), Decimal('550'))
+
+        targets = dict(PriceAlert.objects.values_list('id', 'target_price'))
+        self.assertEqual(sorted(targets[alert_id] for alert_id in rising), [Decimal('560'), Decimal('600')])
+        self.assertEqual(falling, [below.id])
+        self.assertEqual(unchanged, [])
+
+    def test_only_verified_active_quotes_trigger(self):
+        alert = PriceAlert.objects.create(user=self.seller, material=self.copper, quality_grade='A', target_price=600)
+        pending = self.make_dealer('pending', verification_status='pending')
+        DealerPrice.objects.create(dealer=pending, material=self.copper, quality_grade='A', price_per_unit=700)
+        DealerPrice.objects.create(dealer=self.make_dealer('other'), material=self.copper, quality_grade='A', price_per_unit=700, is_active=False)
+        self.set_price(self.price, 590)
+        alert.refresh_from_db()
+        self.assertIsNone(alert.triggered_at)
+
+        self.set_price(self.price, 610)
+
+        alert.refresh_from_db()
+        self.assertEqual(alert.triggered_price, Decimal('610'))
+        self.assertEqual(alert.triggered_dealer, self.dealer)
+
+    def test_alerts_are_deduplicated_and_rate_limited_per_user(self):
+        now = timezone.now()
+        alert = PriceAlert.objects.create(user=self.seller, material=self.copper, quality_grade='A', target_price=600)
+        PriceAlert.objects.create(user=self.seller, material=self.copper, quality_grade='A', direction='below', target_price=450)
+        self.set_price(self.price, 620)
+        DealerPrice.objects.create(dealer=self.make_dealer('rival'), material=self.copper, quality_grade='A', price_per_unit=640)
+
+        self.assertEqual(price_alerts.send_price_alerts(now=now), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('640', mail.outbox[0].body)
+        self.assertEqual(price_alerts.send_price_alerts(now=now), 0)
+
+        # Crossing again soon after is held back, then sent once the interval has passed
+        self.set_price(self.price, 400)
+        self.assertEqual(price_alerts.send_price_alerts(now=now + timedelta(minutes=10)), 0)
+        self.assertEqual(price_alerts.send_price_alerts(now=now + price_alerts.MIN_INTERVAL), 1)
+        self.assertIn('450', mail.outbox[1].body)
+        alert.refresh_from_db()
+        self.assertFalse(alert.is_pending)
+
+
+@override_settings(JOBS_RUN_INLINE=False)
+class PriceUploadTests(DealerFixturesMixin, TestCase):
+    def setUp(self):
+        price_alerts.invalidate_index()
+        self.dealer = self.make_dealer('dealer')
+        self.materials = [self.make_material(f'Material {i}') for i in range(50)]
+        self.copper = self.materials[0]
+        DealerPrice.objects.create(dealer=self.dealer, material=self.copper, quality_grade='A', price_per_unit=500)
+        DealerPrice.objects.create(dealer=self.dealer, material=self.copper, quality_grade='B', price_per_unit=400)
+        Job.objects.all().delete()
+
+    def sheet(self, rows):
+        return 'material,grade,price,minimum_quantity\n' + ''.join(f'{m},{g},{p},{q}\n' for m, g, p, q in rows)
+
+    def upload(self, data, **kwargs):
+        batches = []
+        def receiver(sender, changes, **kwargs):
+            batches.append(changes)
+        prices_bulk_updated.connect(receiver)
+        self.addCleanup(prices_bulk_updated.disconnect, receiver)
+        with self.captureOnCommitCallbacks(execute=True):
+            summary = apply_price_sheet(self.dealer, data, **kwargs)
+        return summary, batches
+
+    def test_full_sheet_is_diffed_and_applied_in_bulk(self):
+        rows = [(material.name, grade, 100 + i, 1) for i, material in enumerate(self.materials) for grade in 'ABCD']
+        rows[0] = ('Material 0', 'A', '500.00', 1)
+        data = self.sheet(rows)
+
+        # Lookup, diff, two insert batches, one update, savepoint/release and two enqueue_once()
+        # calls: the same however many rows the sheet has
+        with self.assertNumQueries(11):
+            summary, batches = self.upload(data)
+
+        self.assertEqual((summary['created'], summary['updated'], summary['unchanged']), (198, 1, 1))
+        self.assertEqual(DealerPrice.objects.filter(dealer=self.dealer).count(), 200)
+        self.assertEqual(DealerPrice.objects.get(material=self.copper, quality_grade='B').price_per_unit, Decimal('100'))
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(len(batches[0]), 199)
+        self.assertEqual(Job.objects.filter(name='marketplace.tasks.reprice_listings').count(), 1)
+
+        summary, batches = self.upload(data)
+        self.assertEqual((summary['created'], summary['updated'], summary['unchanged']), (0, 0, 200))
+        self.assertEqual(batches, [])
+
+    def test_backends_without_a_conflict_target_upsert_too(self):
+        # MySQL: ON DUPLICATE KEY UPDATE, and Django rejects unique_fields
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False):
+            summary, _ = self.upload(self.sheet([('Material 1', 'A', 120, 1), ('Material 0', 'A', 510, 1)]))
+
+        self.assertEqual((summary['created'], summary['updated']), (1, 1))
+        self.assertEqual(DealerPrice.objects.get(material=self.materials[1]).price_per_unit, Decimal('120'))
+
+    def test_any_invalid_row_rejects_the_sheet(self):
+        data = self.sheet([
+            ('Material 1', 'A', 100, 1),
+            ('Unobtainium', 'A', 100, 1),
+            ('Material 2', 'Z', 100, 1),
+            ('Material 3', 'A', 'cheap', 1),
+            ('Material 1', 'A', 120, 1),
+        ])
+
+        summary, batches = self.upload(data)
+
+        self.assertEqual([row for row, _ in summary['errors']], [2, 3, 4, 5])
+        self.assertEqual(DealerPrice.objects.count(), 2)
+        self.assertEqual(batches, [])
+
+    def test_json_replace_deactivates_missing_prices_and_triggers_alerts(self):
+        seller = self.make_user('seller')
+        alert = PriceAlert.objects.create(user=seller, material=self.copper, quality_grade='A', target_price=550)
+        data = '[{"material": "%s", "grade": "A", "price": 600}]' % self.copper.id
+
+        summary, _ = self.upload(data, replace=True)
+
+        self.assertEqual((summary['created'], summary['updated']), (0, 2))
+        self.assertFalse(DealerPrice.objects.get(material=self.copper, quality_grade='B').is_active)
+        alert.refresh_from_db()
+        self.assertEqual(alert.triggered_price, Decimal('600'))
+
+    def test_upload_endpoint_accepts_json(self):
+        self.client.force_login(self.dealer.user)
+        response = self.client.post(
+            reverse('accounts:upload_prices') + '?dry_run=1',
+            data='{"prices": [{"material": "Material 1", "grade": "C", "price": "75.5"}]}',
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 1)
+        self.assertTrue(response.json()['dry_run'])
+        self.assertFalse(DealerPrice.objects.filter(material=self.materials[1]).exists())
+
+
+class InquiryExportTests(DealerFixturesMixin, TestCase):
+    def setUp(self):
+        self.dealer = self.make_dealer('dealer')
+        self.other = self.make_dealer('other')
+        self.buyer = self.make_user('buyer')
+        self.copper = self.make_material()
+        for i in range(30):
+            DealerInquiry.objects.create(
+                dealer=self.dealer, user=self.buyer, material=self.copper, subject=f'Lot {i}', message='Price?',
+            )
+        DealerInquiry.objects.create(dealer=self.other, user=self.buyer, subject='Elsewhere', message='Hi')
+
+    def read_csv(self, response):
+        return list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+
+    def test_dealer_downloads_only_their_inquiries(self):
+        self.client.force_login(self.dealer.user)
+
+        response = self.client.get(reverse('accounts:download_inquiries'))
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = self.read_csv(response)
+        self.assertEqual(len(rows), 30)
+        self.assertEqual(rows[0]['subject'], 'Lot 29')
+        self.assertEqual(rows[0]['user__email'], 'buyer@example.com')
+
+    def test_non_dealers_cannot_download(self):
+        self.client.force_login(self.buyer)
+
+        response = self.client.get(reverse('accounts:download_inquiries'))
+
+        self.assertRedirects(response, reverse('home:home'), fetch_redirect_response=False)
+
+    def test_admin_export_action_streams_selected_rows(self):
+        admin = self.make_user('admin', is_staff=True, is_superuser=True)
+        self.client.force_login(admin)
+        selected = list(DealerInquiry.objects.filter(dealer=self.other).values_list('pk', flat=True))
+
+        response = self.client.post(reverse('admin:accounts_dealerinquiry_changelist'), {
+            'action': 'export_as_csv', '_selected_action': selected,
+        })
+
+        rows = self.read_csv(response)
+        self.assertEqual([row['subject'] for row in rows], ['Elsewhere'])
+        self.assertEqual(rows[0]['dealer__business_name'], 'Other Traders')
+
+
+class AdminChangelistTests(DealerFixturesMixin, TestCase):
+    def setUp(self):
+        self.client.force_login(self.make_user('admin', is_staff=True, is_superuser=True))
+        self.dealers = [self.make_dealer(f'dealer{i}') for i in range(3)]
+
+    def add_materials(self, count):
+        for i in range(count):
+            material = self.make_material(f'Material {self.materials}', category=f'Category {self.materials % 4}')
+            self.materials += 1
+            for dealer in self.dealers:
+                DealerPrice.objects.create(dealer=dealer, material=material, quality_grade='A', price_per_unit=100)
+                DealerPrice.objects.create(dealer=dealer, material=material, quality_grade='B', price_per_unit=90)
+
+    def changelist_queries(self, model_name):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(f'admin:accounts_{model_name}_changelist'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_changelists_use_a_fixed_number_of_queries(self):
+        self.materials = 0
+        self.add_materials(2)
+        self.client.get(reverse('admin:index'))  # caches the logged-in user
+        small = {name: self.changelist_queries(name)[0] for name in ['scrapcategory', 'scrapmaterial', 'dealerprice']}
+
+        self.add_materials(8)
+        for name, expected in small.items():
+            self.assertEqual(self.changelist_queries(name)[0], expected, name)
+
+    def test_annotated_counts(self):
+        self.materials = 0
+        self.add_materials(1)
+        DealerPrice.objects.filter(dealer=self.dealers[0]).update(is_active=False)
+
+        _, response = self.changelist_queries('scrapmaterial')
+
+        material = response.context['cl'].result_list[0]
+        self.assertEqual(material._dealer_count, 2)
+        _, response = self.changelist_queries('scrapcategory')
+        self.assertEqual(response.context['cl'].result_list[0]._material_count, 1)
+
+
+class ConditionalPageTests(DealerFixturesMixin, TestCase):
+    def setUp(self):
+        # Clocks and cached pages outlive the rolled-back rows of earlier tests
+        cache.clear()
+        self.dealer = self.make_dealer('dealer')
+        self.copper = self.make_material()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.price = DealerPrice.objects.create(dealer=self.dealer, material=self.copper, quality_grade='A', price_per_unit=500)
+        self.url = reverse('accounts:dealer_detail', args=[self.dealer.id])
+
+    def test_dealer_page_is_not_modified_until_its_prices_change(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('no-cache', first['Cache-Control'])
+
+        with self.assertNumQueries(0):
+            repeat = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(repeat.status_code, 304)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.price.price_per_unit = 520
+            self.price.save()
+
+        changed = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], first['ETag'])
+
+    def test_logged_in_pages_are_private_and_validated_per_user(self):
+        anonymous = self.client.get(self.url)
+        self.client.force_login(self.make_user('buyer'))
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=anonymous['ETag'])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertIn('private', response['Cache-Control'])
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_price_comparison_only_tracks_its_material(self):
+        url = reverse('accounts:price_comparison') + f'?material={self.copper.id}&grade=A'
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            other = self.make_material('Brass')
+            unrelated = self.make_dealer('unrelated')
+            DealerPrice.objects.create(dealer=self.dealer, material=other, quality_grade='A', price_per_unit=300)
+
+        # Creating a material and a dealer moved the directory clock, a brass price didn't matter
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            DealerPrice.objects.create(dealer=unrelated, material=other, quality_grade='B', price_per_unit=250)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+class AnonymousPageCacheTests(DealerFixturesMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.dealers = [self.make_dealer(f'dealer{i}', specialization='Copper and brass') for i in range(3)]
+
+    def test_directory_is_served_from_cache_until_a_dealer_changes(self):
+        url = reverse('accounts:dealers_directory')
+        self.client.get(url + '?search=copper&city=')
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(url + '?city=&search=copper&utm_campaign=digest')
+        self.assertContains(cached, 'Dealer0 Traders')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dealers[0].business_name = 'Renamed Metals'
+            self.dealers[0].save()
+        self.assertContains(self.client.get(url + '?search=copper'), 'Renamed Metals')
+
+    def test_logged_in_users_get_a_fresh_page(self):
+        url = reverse('accounts:dealers_directory')
+        self.client.get(url)
+        self.client.force_login(self.make_user('buyer'))
+
+        response = self.client.get(url)
+
+        self.assertContains(response, 'buyer')
+
+
+class FragmentCacheTests(DealerFixturesMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.dealers = [self.make_dealer(f'dealer{i}') for i in range(3)]
+        self.copper = self.make_material()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.price = DealerPrice.objects.create(dealer=self.dealers[0], material=self.copper, quality_grade='A', price_per_unit=500)
+        self.client.force_login(self.make_user('buyer'))
+
+    def test_price_tables_are_not_queried_once_cached(self):
+        url = reverse('accounts:dealer_detail', args=[self.dealers[0].id])
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertContains(response, '₹500.00/kg')
+        self.assertContains(response, f'<option value="{self.copper.id}">Copper</option>', html=True)
+        self.assertFalse([query for query in queries if 'accounts_dealerprice' in query['sql']])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.price.price_per_unit = 520
+            self.price.save()
+        self.assertContains(self.client.get(url), '₹520.00/kg')
+
+    def test_dealer_cards_are_rendered_once_per_version(self):
+        url = reverse('accounts:dealers_directory')
+        self.client.get(reverse('accounts:profile'))  # caches the logged-in user
+        with CaptureQueriesContext(connection) as cold:
+            self.client.get(url)
+        with CaptureQueriesContext(connection) as warm:
+            response = self.client.get(url)
+
+        # Cached cards no longer load each dealer's user for the city
+        self.assertEqual(len(cold) - len(warm), len(self.dealers))
+        self.assertContains(response, 'buyer')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dealers[1].business_name = 'Renamed Metals'
+            self.dealers[1].save()
+        response = self.client.get(url)
+        self.assertContains(response, 'Renamed Metals')
+        self.assertContains(response, 'Dealer2 Traders')
+
+
+class CachedAuthTests(DealerFixturesMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = self.make_user('buyer', first_name='Asha')
+
+    def auth_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in queries if 'accounts_user' in query['sql'] or 'accounts_dealerprofile' in query['sql']]
+
+    def test_logged_in_user_is_loaded_from_the_cache_until_saved(self):
+        self.client.force_login(self.user)
+        url = reverse('accounts:profile')
+        self.client.get(url)
+
+        self.assertEqual(self.auth_queries(url), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = 'Asha Rao'
+            self.user.save()
+        self.assertContains(self.client.get(url), 'Asha Rao')
+
+    def test_dealer_profile_flag_follows_profile_creation(self):
+        dealer = self.make_user('dealer', user_type='dealer')
+        self.client.force_login(dealer)
+        url = reverse('accounts:dealer_register')
+        self.client.get(url)
+
+        self.assertEqual(self.auth_queries(url), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DealerProfile.objects.create(
+                user=dealer, business_name='Dealer Traders', business_registration_number='REG-dealer',
+                business_address='Market Road', business_phone='+919876543210', business_email='dealer@business.example.com',
+            )
+        self.assertRedirects(self.client.get(url), reverse('accounts:dealer_dashboard'))
+
+    def test_async_requests_load_the_user_from_the_cache(self):
+        self.client.force_login(self.user)
+        self.assertEqual(async_to_sync(self.auser)(), self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            user = async_to_sync(self.auser)()
+            self.assertFalse(hasattr(user, 'dealer_profile'))
+        self.assertEqual(user, self.user)
+        self.assertEqual([query['sql'] for query in queries if 'accounts_' in query['sql']], [])
+
+    async def auser(self):
+        request = RequestFactory().get('/')
+        request.session = self.client.session
+        AuthenticationMiddleware(lambda request: None).process_request(request)
+        return await request.auser()
+
+    def test_sessions_from_the_uncached_backend_stay_logged_in(self):
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+
+        self.assertContains(self.client.get(reverse('accounts:profile')), 'Asha')
+        self.assertEqual(self.client.session['_auth_user_backend'], 'accounts.auth.CachedModelBackend')
+
+
+@override_settings(JOBS_RUN_INLINE=False)
+class ProfilePictureJobTests(TestCase):
+    def resize_jobs(self):
+        return Job.objects.filter(name='accounts.tasks.resize_profile_picture').count()
+
+    def test_only_a_new_picture_is_resized(self):
+        user = User.objects.create_user(username='buyer', email='buyer@example.com', profile_picture='profile_pics/a.jpg')
+        self.assertEqual(self.resize_jobs(), 1)
+
+        user.last_login = timezone.now()
+        user.save(update_fields=['last_login'])
+        user = User.objects.get(pk=user.pk)
+        user.city = 'Pune'
+        user.save()
+        self.assertEqual(self.resize_jobs(), 1)
+
+        user.profile_picture = 'profile_pics/b.jpg'
+        user.save()
+        self.assertEqual(self.resize_jobs(), 2)
+
+
+class AsyncViewTests(DealerFixturesMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.copper = self.make_material()
+        self.dealer = self.make_dealer('metalco')
+        DealerPrice.objects.create(dealer=self.dealer, material=self.copper, quality_grade='A', price_per_unit=Decimal('520'))
+        DealerRating.objects.create(dealer=self.dealer, user=self.make_user('buyer'), rating=4, review='Fair weights')
+
+    def get(self, url):
+        request = self.factory.get(url)
+        request.user = AnonymousUser()
+        return request
+
+    async def assertSamePage(self, name, url, *args):
+        sync_response = await sync_to_async(getattr(views, name))(self.get(url), *args)
+        # Otherwise the async view would be served the sync one's page from the cache
+        await sync_to_async(cache.clear)()
+        async_response = await getattr(async_views, name)(self.get(url), *args)
+
+        self.assertEqual(async_response.status_code, 200)
+        self.assertEqual(async_response.content.decode(), sync_response.content.decode())
+
+    async def test_dealers_directory(self):
+        await self.assertSamePage('dealers_directory', '/accounts/dealers/?city=')
+
+    async def test_dealer_detail(self):
+        await self.assertSamePage('dealer_detail', f'/accounts/dealers/{self.dealer.id}/', self.dealer.id)
+
+    async def test_price_comparison(self):
+        await self.assertSamePage('price_comparison', f'/accounts/prices/?material={self.copper.id}')
+
+    async def test_missing_dealer_is_a_404(self):
+        with self.assertRaises(Http404):
+            await async_views.dealer_detail(self.get('/accounts/dealers/0/'), 0)
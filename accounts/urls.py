@@ -1,8 +1,12 @@
+from django.conf import settings
 from django.urls import path, include
-from . import views
+from . import async_views, views
 
 app_name = 'accounts'
 
+# With ASYNC_VIEWS (opt-in, for ASGI) the public read-only pages are async views
+read_views = async_views if settings.ASYNC_VIEWS else views
+
 urlpatterns = [
     # Authentication URLs
     path('login/', views.login_view, name='login'),
@@ -16,15 +20,20 @@ urlpatterns = [
     path('dealer/register/', views.dealer_register_view, name='dealer_register'),
     path('dealer/dashboard/', views.dealer_dashboard, name='dealer_dashboard'),
     path('dealer/prices/', views.manage_prices, name='manage_prices'),
+    path('dealer/prices/upload/', views.upload_prices, name='upload_prices'),
+    path('dealer/inquiries/download/', views.download_inquiries, name='download_inquiries'),
+    path('dealer/digest/', views.toggle_digest, name='toggle_digest'),
     
     # Public dealer directory
-    path('dealers/', views.dealers_directory, name='dealers_directory'),
-    path('dealers/<int:dealer_id>/', views.dealer_detail, name='dealer_detail'),
+    path('dealers/', read_views.dealers_directory, name='dealers_directory'),
+    path('dealers/<int:dealer_id>/', read_views.dealer_detail, name='dealer_detail'),
     path('dealers/<int:dealer_id>/contact/', views.contact_dealer, name='contact_dealer'),
     path('dealers/<int:dealer_id>/rate/', views.rate_dealer, name='rate_dealer'),
     
     # Price comparison
-    path('prices/', views.price_comparison, name='price_comparison'),
+    path('prices/', read_views.price_comparison, name='price_comparison'),
+    path('prices/alerts/', views.price_alerts, name='price_alerts'),
+    path('prices/alerts/<int:alert_id>/delete/', views.delete_price_alert, name='delete_price_alert'),
     
     # Profile management
     path('profile/', views.profile_view, name='profile'),
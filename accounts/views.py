@@ -3,13 +3,27 @@ from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Avg, Q
+from django.db.models import Q
 from django.core.paginator import Paginator
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.urls import reverse
-from .models import User, DealerProfile, ScrapCategory, ScrapMaterial, DealerPrice, DealerRating, DealerInquiry
-from .forms import UserRegistrationForm, DealerRegistrationForm, DealerPriceFormSet, DealerInquiryForm
+from django.utils.functional import SimpleLazyObject
+from .models import User, DealerProfile, ScrapCategory, ScrapMaterial, DealerPrice, DealerRating, DealerInquiry, PriceAlert
+from .forms import UserRegistrationForm, DealerRegistrationForm, DealerPriceFormSet, DealerInquiryForm, PriceAlertForm
+from .price_upload import PriceSheetError, apply_price_sheet
+from core.conditional import conditional_page
+from core.db import read_only_view
+from core.pagecache import cache_anonymous_page
+from core.exports import FORMATS, streaming_export
+from .clocks import dealer_list_clocks, dealer_page_clocks, dealer_versions, price_page_clocks
+from .tasks import recompute_dealer_rating
+
+MAX_PRICE_SHEET_BYTES = 2 * 1024 * 1024
+INQUIRY_EXPORT_FIELDS = [
+    'id', 'created_at', 'user__username', 'user__email', 'material__name', 'subject', 'message',
+    'quantity', 'contact_preference', 'status', 'dealer_response', 'responded_at',
+]
 
 def login_view(request):
     """Login view"""
@@ -20,7 +34,7 @@ def login_view(request):
             password = form.cleaned_data.get('password')
             user = authenticate(username=username, password=password)
             if user is not None:
-                login(request, user, backend='django.contrib.auth.backends.ModelBackend')
+                login(request, user, backend='accounts.auth.CachedModelBackend')
                 messages.success(request, f'Welcome back, {username}!')
                 next_url = request.GET.get('next', 'home:home')
                 return redirect(next_url)
@@ -37,7 +51,7 @@ def register_view(request):
             user = form.save()
             username = form.cleaned_data.get('username')
             messages.success(request, f'Account created for {username}!')
-            login(request, user, backend='django.contrib.auth.backends.ModelBackend')
+            login(request, user, backend='accounts.auth.CachedModelBackend')
             
             # Redirect to dealer registration if user selected dealer type
             if user.user_type == 'dealer':
@@ -118,17 +132,52 @@ def dealer_dashboard(request):
     prices = dealer.prices.filter(is_active=True).select_related('material__category')
     recent_inquiries = dealer.inquiries.all()[:5]
     recent_ratings = dealer.ratings.all()[:5]
+    matched_listings = dealer.listing_matches.filter(
+        listing__status='active'
+    ).select_related('listing__material').order_by('rank', '-net_offer')[:5]
     
     context = {
         'dealer': dealer,
         'prices': prices,
         'recent_inquiries': recent_inquiries,
         'recent_ratings': recent_ratings,
+        'matched_listings': matched_listings,
         'total_materials': prices.count(),
         'avg_rating': dealer.average_rating,
     }
     return render(request, 'accounts/dealer_dashboard.html', context)
 
+@login_required
+@require_http_methods(["POST"])
+def toggle_digest(request):
+    """Opt in or out of the daily dealer digest email"""
+    if request.user.user_type != 'dealer' or not hasattr(request.user, 'dealer_profile'):
+        messages.error(request, 'Access denied.')
+        return redirect('home:home')
+    
+    dealer = request.user.dealer_profile
+    dealer.digest_opt_in = request.POST.get('digest_opt_in') == 'on'
+    dealer.save(update_fields=['digest_opt_in'])
+    
+    if dealer.digest_opt_in:
+        messages.success(request, 'You will receive a daily digest of inquiries, ratings and market prices.')
+    else:
+        messages.info(request, 'Daily digest emails turned off.')
+    return redirect('accounts:dealer_dashboard')
+
+@login_required
+def download_inquiries(request):
+    """Stream all of the dealer's inquiries as CSV (or JSON with ?format=json)"""
+    if request.user.user_type != 'dealer' or not hasattr(request.user, 'dealer_profile'):
+        messages.error(request, 'Access denied.')
+        return redirect('home:home')
+    
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in FORMATS:
+        export_format = 'csv'
+    inquiries = request.user.dealer_profile.inquiries.order_by('-created_at', '-id')
+    return streaming_export(inquiries, INQUIRY_EXPORT_FIELDS, 'inquiries', export_format)
+
 @login_required
 def manage_prices(request):
     """Manage dealer prices"""
@@ -142,13 +191,18 @@ def manage_prices(request):
         return redirect('accounts:dealer_dashboard')
     
     if request.method == 'POST':
-        formset = DealerPriceFormSet(request.POST, instance=dealer)
+        formset = DealerPriceFormSet(request.POST, queryset=dealer.prices.all())
         if formset.is_valid():
-            formset.save()
+            prices = formset.save(commit=False)
+            for price in prices:
+                price.dealer = dealer
+                price.save()
+            for price in formset.deleted_objects:
+                price.delete()
             messages.success(request, 'Prices updated successfully!')
             return redirect('accounts:manage_prices')
     else:
-        formset = DealerPriceFormSet(instance=dealer)
+        formset = DealerPriceFormSet(queryset=dealer.prices.all())
     
     categories = ScrapCategory.objects.filter(is_active=True).prefetch_related('materials')
     
@@ -159,11 +213,62 @@ def manage_prices(request):
     }
     return render(request, 'accounts/manage_prices.html', context)
 
-def dealers_directory(request):
-    """Public directory of verified dealers"""
-    dealers = DealerProfile.objects.filter(verification_status='verified')
+@login_required
+@require_http_methods(["POST"])
+def upload_prices(request):
+    """Bulk create/update dealer prices from a CSV or JSON price sheet"""
+    wants_json = request.content_type == 'application/json'
+    dealer = getattr(request.user, 'dealer_profile', None)
+    if request.user.user_type != 'dealer' or dealer is None or not dealer.is_verified:
+        if wants_json:
+            return JsonResponse({'error': 'Access denied.'}, status=403)
+        messages.error(request, 'Access denied.')
+        return redirect('home:home')
     
-    # Search and filters
+    replace = request.POST.get('replace') == 'on' or request.GET.get('replace') == '1'
+    dry_run = request.POST.get('dry_run') == 'on' or request.GET.get('dry_run') == '1'
+    if wants_json:
+        data, sheet_format = request.body, 'json'
+    else:
+        upload = request.FILES.get('price_file')
+        if upload is None:
+            messages.error(request, 'Choose a CSV or JSON file to upload.')
+            return redirect('accounts:manage_prices')
+        if upload.size > MAX_PRICE_SHEET_BYTES:
+            messages.error(request, 'Price sheets are limited to 2 MB.')
+            return redirect('accounts:manage_prices')
+        data = upload.read()
+        sheet_format = 'json' if upload.name.lower().endswith('.json') else None
+    
+    try:
+        summary = apply_price_sheet(dealer, data, sheet_format, replace=replace, dry_run=dry_run)
+    except PriceSheetError as e:
+        if wants_json:
+            return JsonResponse({'error': str(e)}, status=400)
+        messages.error(request, str(e))
+        return redirect('accounts:manage_prices')
+    
+    if wants_json:
+        summary['errors'] = [{'row': row, 'message': message} for row, message in summary['errors']]
+        summary['dry_run'] = dry_run
+        return JsonResponse(summary, status=400 if summary['errors'] else 200)
+    
+    if summary['errors']:
+        for row, message in summary['errors'][:10]:
+            messages.error(request, f'Row {row}: {message}')
+        if len(summary['errors']) > 10:
+            messages.error(request, f"...and {len(summary['errors']) - 10} more errors. Nothing was saved.")
+    else:
+        verb = 'would be' if dry_run else 'were'
+        messages.success(
+            request,
+            f"{summary['created']} prices {verb} added, {summary['updated']} updated and {summary['unchanged']} left unchanged."
+        )
+    return redirect('accounts:manage_prices')
+
+def directory_dealers(request):
+    """Verified dealers matching the directory's search, category and city filters, and those filters"""
+    dealers = DealerProfile.objects.filter(verification_status='verified')
     search = request.GET.get('search', '')
     category = request.GET.get('category', '')
     city = request.GET.get('city', '')
@@ -180,11 +285,22 @@ def dealers_directory(request):
     
     if city:
         dealers = dealers.filter(user__city__icontains=city)
+    return dealers, search, category, city
+
+@cache_anonymous_page(dealer_list_clocks)
+@read_only_view
+def dealers_directory(request):
+    """Public directory of verified dealers"""
+    dealers, search, category, city = directory_dealers(request)
     
     # Pagination
     paginator = Paginator(dealers, 12)
     page_number = request.GET.get('page')
     dealers = paginator.get_page(page_number)
+    # Dealer cards are cached fragments keyed by these versions
+    versions = dealer_versions([dealer.id for dealer in dealers])
+    for dealer in dealers:
+        dealer.fragment_version = versions[dealer.id]
     
     categories = ScrapCategory.objects.filter(is_active=True)
     cities = DealerProfile.objects.filter(
@@ -201,23 +317,30 @@ def dealers_directory(request):
     }
     return render(request, 'accounts/dealers_directory.html', context)
 
+@conditional_page(dealer_page_clocks)
+@cache_anonymous_page(dealer_page_clocks)
+@read_only_view
 def dealer_detail(request, dealer_id):
     """Dealer detail page with prices and contact form"""
     dealer = get_object_or_404(DealerProfile, id=dealer_id, verification_status='verified')
     prices = dealer.prices.filter(is_active=True).select_related('material__category').order_by('material__category', 'material__name')
     ratings = dealer.ratings.all()[:10]
     
-    # Group prices by category
-    prices_by_category = {}
-    for price in prices:
-        category = price.material.category.name
-        if category not in prices_by_category:
-            prices_by_category[category] = []
-        prices_by_category[category].append(price)
+    def group_prices():
+        # Group prices by category
+        prices_by_category = {}
+        for price in prices:
+            category = price.material.category.name
+            if category not in prices_by_category:
+                prices_by_category[category] = []
+            prices_by_category[category].append(price)
+        return prices_by_category
     
     context = {
         'dealer': dealer,
-        'prices_by_category': prices_by_category,
+        # Only queried when the cached price fragments miss
+        'prices_by_category': SimpleLazyObject(group_prices),
+        'fragment_version': dealer_versions([dealer.id])[dealer.id],
         'ratings': ratings,
         'can_contact': request.user.is_authenticated and request.user != dealer.user,
     }
@@ -265,10 +388,7 @@ def rate_dealer(request, dealer_id):
             )
             
             # Update dealer's average rating
-            avg_rating = dealer.ratings.aggregate(Avg('rating'))['rating__avg'] or 0
-            dealer.average_rating = round(avg_rating, 2)
-            dealer.total_ratings = dealer.ratings.count()
-            dealer.save()
+            recompute_dealer_rating.enqueue(dealer.id)
             
             action = 'updated' if not created else 'submitted'
             messages.success(request, f'Your rating has been {action}!')
@@ -283,6 +403,9 @@ def logout_view(request):
     messages.info(request, 'You have been logged out.')
     return redirect('home:home')
 
+@conditional_page(price_page_clocks)
+@cache_anonymous_page(price_page_clocks)
+@read_only_view
 def price_comparison(request):
     """Compare prices across dealers for specific materials"""
     material_id = request.GET.get('material')
@@ -309,4 +432,36 @@ def price_comparison(request):
             'prices': prices,
         })
     
-    return render(request, 'accounts/price_comparison.html', context)
\ No newline at end of file
+    return render(request, 'accounts/price_comparison.html', context)
+
+@login_required
+def price_alerts(request):
+    """List and create dealer price alerts"""
+    if request.method == 'POST':
+        form = PriceAlertForm(request.POST)
+        if form.is_valid():
+            alert, created = PriceAlert.objects.get_or_create(user=request.user, **form.cleaned_data)
+            if not created and not alert.is_active:
+                alert.is_active = True
+                alert.save(update_fields=['is_active'])
+            messages.success(request, f"We'll email you when {alert.material.name} (Grade {alert.quality_grade}) {alert.get_direction_display().lower()} ₹{alert.target_price}.")
+            return redirect('accounts:price_alerts')
+    else:
+        form = PriceAlertForm(initial=request.GET.dict())
+    
+    alerts = request.user.price_alerts.select_related('material', 'triggered_dealer')
+    
+    context = {
+        'form': form,
+        'alerts': alerts,
+    }
+    return render(request, 'accounts/price_alerts.html', context)
+
+@login_required
+@require_http_methods(["POST"])
+def delete_price_alert(request, alert_id):
+    """Delete a price alert"""
+    alert = get_object_or_404(PriceAlert, id=alert_id, user=request.user)
+    alert.delete()
+    messages.info(request, 'Price alert deleted.')
+    return redirect('accounts:price_alerts')
\ No newline at end of file
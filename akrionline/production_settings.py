@@ -4,6 +4,7 @@ This file contains production-specific settings for deployment on GoDaddy cPanel
 """
 
 import os
+from datetime import timedelta
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -21,6 +22,8 @@ ALLOWED_HOSTS = ['akrionline.com', 'www.akrionline.com']
 
 # Application definition
 INSTALLED_APPS = [
+    # Overrides collectstatic, so it comes before django.contrib.staticfiles
+    'core',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -35,19 +38,24 @@ INSTALLED_APPS = [
     'allauth.account',
     'allauth.socialaccount',
     'allauth.socialaccount.providers.google',
+    'rest_framework',
     
     # Local apps
     'home',
     'accounts',
     'marketplace',
+    'api',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.CachedAuthenticationMiddleware',
+    'core.db.PinAfterWriteMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
@@ -59,7 +67,6 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -67,12 +74,23 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Each worker parses a template once; passenger_wsgi precompiles templates/ at start
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'akrionline.wsgi.application'
 
+# Serve the public dealer and price pages from accounts.async_views (opt-in, for ASGI;
+# compare them with manage.py bench_async first)
+ASYNC_VIEWS = os.environ.get('DJANGO_ASYNC_VIEWS') == '1'
+
 # Database - MySQL for production (cPanel)
 DATABASES = {
     'default': {
@@ -85,9 +103,25 @@ DATABASES = {
         'OPTIONS': {
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
         },
+        # Keep connections open between requests, checking them before reuse
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Optional read replica: GET requests to the directory, dealer and price pages read from it
+# (core/db.py), except for 15 seconds after the visitor's last POST
+DATABASE_ROUTERS = ['core.db.ReadOnlyRouter']
+if os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['DB_REPLICA_HOST'],
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_READ_ONLY_ALIAS = 'replica'
+DATABASE_PIN_SECONDS = 15
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -117,6 +151,16 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# collectstatic builds the purged Tailwind stylesheet (core.assets), then stores
+# every file under a content-hashed name with .gz and .br variants. WhiteNoise
+# serves the hashed names with a one-year "immutable" Cache-Control.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
+TAILWIND_CLI = os.environ.get('TAILWIND_CLI', 'tailwindcss')
+TAILWIND_CDN = False
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -130,7 +174,13 @@ LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
 
 # Email configuration for production
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Messages are queued in the database and delivered by the `deliver_outbox` periodic
+# job (or `manage.py send_queued_mail` from cron), so requests never wait on SMTP.
+EMAIL_BACKEND = 'core.mail.OutboxEmailBackend'
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_BACKOFF = 60  # seconds, doubled on every failed attempt
+EMAIL_TIMEOUT = 30
 EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
 EMAIL_PORT = int(os.environ.get('EMAIL_PORT', '587'))
 EMAIL_USE_TLS = True
@@ -138,6 +188,51 @@ EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', 'your-email@gmail.com')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', 'your-app-password')
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
+# Background jobs (core.jobs), processed by `manage.py run_workers`
+JOBS_RUN_INLINE = False
+JOBS_RETRY_BACKOFF = 30  # seconds, doubled on every failed attempt
+JOBS_LEASE_SECONDS = 600  # a crashed worker's jobs are retried after this (or a task's timeout plus a minute)
+JOBS_PERIODIC = {
+    'core.tasks.deliver_outbox': 60,
+    'accounts.tasks.send_dealer_digests': 24 * 60 * 60,
+    # Picks up price alerts held back by the per-user rate limit
+    'accounts.tasks.send_price_alerts': 10 * 60,
+    # Picks up dealer rating/location drift; price edits reprice immediately
+    'marketplace.tasks.reprice_listings': 60 * 60,
+    'marketplace.tasks.match_listings': 60 * 60,
+    'marketplace.tasks.send_search_alerts': 10 * 60,
+    'core.tasks.clear_expired_sessions': 60 * 60,
+}
+
+# REST API (api app), served under /api/v1/. Mobile clients authenticate with short-lived
+# JWTs that are verified without a session or user lookup per request.
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework_simplejwt.authentication.JWTStatelessUserAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': [
+        'rest_framework.permissions.AllowAny',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+    ],
+    'DEFAULT_VERSIONING_CLASS': 'rest_framework.versioning.NamespaceVersioning',
+    'ALLOWED_VERSIONS': ['v1'],
+}
+
+SIMPLE_JWT = {
+    # Stateless tokens can't be revoked, so access tokens stay short-lived
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=15),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
+}
+
+# AI image assessment (marketplace.assessment)
+AI_ASSESSMENT_MODEL = 'marketplace.assessment.ColorStatsModel'
+AI_ASSESSMENT_BATCH_SIZE = 16
+
 # Custom User Model
 AUTH_USER_MODEL = 'accounts.User'
 
@@ -145,9 +240,10 @@ AUTH_USER_MODEL = 'accounts.User'
 SITE_ID = 1
 
 # Django Allauth Configuration
+# ModelBackend and allauth's backend, loading the logged-in user from the cache
 AUTHENTICATION_BACKENDS = [
-    'django.contrib.auth.backends.ModelBackend',
-    'allauth.account.auth_backends.AuthenticationBackend',
+    'accounts.auth.CachedModelBackend',
+    'accounts.auth.CachedAuthenticationBackend',
 ]
 
 # Allauth settings for production
@@ -208,6 +304,11 @@ SESSION_COOKIE_SECURE = True
 SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_AGE = 3600  # 1 hour
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
+# Cached sessions (core/sessions.py); the hour counts from the last request, and
+# refreshing it only reaches the database every SESSION_DB_WRITE_INTERVAL seconds
+SESSION_ENGINE = 'core.sessions'
+SESSION_SAVE_EVERY_REQUEST = True
+SESSION_DB_WRITE_INTERVAL = 5 * 60
 
 # CSRF security
 CSRF_COOKIE_SECURE = True
@@ -236,7 +337,13 @@ LOGGING = {
 # Cache configuration (optional - for better performance)
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
-        'LOCATION': BASE_DIR / 'cache',
+        # One SQLite file shared by every Passenger process (see core/sqlite_cache.py)
+        'BACKEND': 'core.sqlite_cache.SQLiteCache',
+        'LOCATION': BASE_DIR / 'cache' / 'cache.sqlite3',
+        # Anonymous pages (core.pagecache) and change clocks live here too
+        'OPTIONS': {'MAX_ENTRIES': 10000},
     }
 }
+
+# Anonymous full-page cache lifetime; pages are also invalidated by model signals
+PAGE_CACHE_TIMEOUT = 10 * 60
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+from datetime import timedelta
 from pathlib import Path
 import os
 
@@ -32,6 +33,8 @@ ALLOWED_HOSTS = ['*']
 # Application definition
 
 INSTALLED_APPS = [
+    # Overrides collectstatic, so it comes before django.contrib.staticfiles
+    'core',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -46,19 +49,23 @@ INSTALLED_APPS = [
     'allauth.account',
     'allauth.socialaccount',
     'allauth.socialaccount.providers.google',
+    'rest_framework',
     
     # Local apps
     'home',
     'accounts',
     'marketplace',
+    'api',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.CachedAuthenticationMiddleware',
+    'core.db.PinAfterWriteMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
@@ -84,16 +91,41 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'akrionline.wsgi.application'
 
+# Serve the public dealer and price pages from accounts.async_views (opt-in, for ASGI;
+# compare them with manage.py bench_async first)
+ASYNC_VIEWS = os.environ.get('DJANGO_ASYNC_VIEWS') == '1'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite runs with tuned pragmas (core/db.py). Writers take the lock up front and wait
+# for it; read-heavy GET views read through a separate query-only connection.
+# The journal mode is stored in the database file itself, so the dev database, which is
+# tracked in git, keeps its rollback journal instead of switching to WAL.
+DEV_SQLITE_PRAGMAS = {
+    'busy_timeout': 20000,  # ms
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -20000,  # KiB
+    'temp_store': 'MEMORY',
+}
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
+        'PRAGMAS': DEV_SQLITE_PRAGMAS,
+    },
+    'readonly': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        'READ_ONLY': True,
+        'PRAGMAS': DEV_SQLITE_PRAGMAS,
+        'TEST': {'MIRROR': 'default'},
+    },
 }
+DATABASE_ROUTERS = ['core.db.ReadOnlyRouter']
+DATABASE_READ_ONLY_ALIAS = 'readonly'
 
 # For production MySQL (uncomment and configure for cPanel)
 # DATABASES = {
@@ -149,6 +181,10 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# Until `manage.py build_css` has produced static/css/app.css, templates load
+# Tailwind from the Play CDN (see core.assets)
+TAILWIND_CDN = not (BASE_DIR / 'static' / 'css' / 'app.css').exists()
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -166,6 +202,41 @@ LOGOUT_REDIRECT_URL = '/'
 # Email configuration (for development)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
+# Cached sessions, written behind the cache (core/sessions.py)
+SESSION_ENGINE = 'core.sessions'
+
+# Background jobs run inline during development; production uses `manage.py run_workers`
+JOBS_RUN_INLINE = True
+
+# REST API (api app), served under /api/v1/. Mobile clients authenticate with short-lived
+# JWTs that are verified without a session or user lookup per request.
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework_simplejwt.authentication.JWTStatelessUserAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': [
+        'rest_framework.permissions.AllowAny',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+    ],
+    'DEFAULT_VERSIONING_CLASS': 'rest_framework.versioning.NamespaceVersioning',
+    'ALLOWED_VERSIONS': ['v1'],
+}
+
+SIMPLE_JWT = {
+    # Stateless tokens can't be revoked, so access tokens stay short-lived
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=15),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
+}
+
+# AI image assessment (marketplace.assessment)
+AI_ASSESSMENT_MODEL = 'marketplace.assessment.ColorStatsModel'
+AI_ASSESSMENT_BATCH_SIZE = 16
+
 # Custom User Model
 AUTH_USER_MODEL = 'accounts.User'
 
@@ -173,9 +244,10 @@ AUTH_USER_MODEL = 'accounts.User'
 SITE_ID = 1
 
 # Django Allauth Configuration
+# ModelBackend and allauth's backend, loading the logged-in user from the cache
 AUTHENTICATION_BACKENDS = [
-    'django.contrib.auth.backends.ModelBackend',
-    'allauth.account.auth_backends.AuthenticationBackend',
+    'accounts.auth.CachedModelBackend',
+    'accounts.auth.CachedAuthenticationBackend',
 ]
 
 # Allauth settings (updated to use new format)
@@ -25,6 +25,7 @@ urlpatterns = [
     path('accounts/', include('accounts.urls')),
     path('accounts/', include('allauth.urls')),  # Add allauth URLs at main level
     path('marketplace/', include('marketplace.urls')),
+    path('api/v1/', include('api.urls', namespace='v1')),
 ]
 
 # Serve media files in development
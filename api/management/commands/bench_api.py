@@ -0,0 +1,88 @@
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import reverse
+
+from accounts.models import DealerPrice, DealerProfile, ScrapCategory, ScrapMaterial, User
+
+
+def seed(dealers, materials):
+    """Verified dealers quoting every material in grades A and B, created in bulk"""
+    category, _ = ScrapCategory.objects.get_or_create(name='Benchmark Metals')
+    material_rows = ScrapMaterial.objects.bulk_create([
+        ScrapMaterial(category=category, name=f'Bench material {i}', quality_grades=['A', 'B']) for i in range(materials)
+    ])
+    users = User.objects.bulk_create([
+        User(username=f'bench-dealer-{i}', email=f'bench{i}@example.com', user_type='dealer', city=f'City {i % 10}')
+        for i in range(dealers)
+    ])
+    profiles = DealerProfile.objects.bulk_create([
+        DealerProfile(
+            user=user, business_name=f'Bench Traders {i}', business_registration_number=f'BENCH-{i}',
+            business_address='Market Road', business_phone='+919876543210', business_email=user.email,
+            specialization='Metals', verification_status='verified',
+        )
+        for i, user in enumerate(users)
+    ])
+    DealerPrice.objects.bulk_create([
+        DealerPrice(dealer=profile, material=material, quality_grade=grade,
+                    price_per_unit=Decimal(100 + (i * 7 + j) % 50))
+        for i, profile in enumerate(profiles)
+        for j, material in enumerate(material_rows)
+        for grade in 'AB'
+    ], batch_size=1000)
+    return profiles[0], material_rows[0]
+
+
+class Command(BaseCommand):
+    help = "Compare requests/sec and queries/request of the HTML pages and the JSON API"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Requests per endpoint")
+        parser.add_argument('--dealers', type=int, default=100)
+        parser.add_argument('--materials', type=int, default=20)
+
+    def measure(self, client, url, count):
+        client.get(url)  # warm up templates, URL resolver and connection
+        queries = []
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        # An execute wrapper, since each request resets connection.queries
+        with connection.execute_wrapper(count_query):
+            response = client.get(url)
+        assert response.status_code == 200, (url, response.status_code)
+        started = time.perf_counter()
+        size = 0
+        for _ in range(count):
+            size += len(client.get(url).content)
+        elapsed = time.perf_counter() - started
+        return count / elapsed, len(queries), size // count
+
+    def handle(self, *args, **options):
+        host = next((host for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost').lstrip('.')
+        client = Client(HTTP_HOST=host, secure=not settings.DEBUG)
+        count = options['requests']
+
+        # Benchmark rows are rolled back
+        with transaction.atomic():
+            dealer, material = seed(options['dealers'], options['materials'])
+            pairs = [
+                ('dealer directory', reverse('accounts:dealers_directory'), reverse('v1:dealers')),
+                ('dealer detail', reverse('accounts:dealer_detail', args=[dealer.id]),
+                 reverse('v1:dealer_detail', args=[dealer.id])),
+                ('price comparison', f"{reverse('accounts:price_comparison')}?material={material.id}&grade=A",
+                 f"{reverse('v1:price_comparison')}?material={material.id}&grade=A"),
+            ]
+            self.stdout.write(f"{'endpoint':<18} {'':<5} {'req/s':>8} {'queries':>8} {'bytes':>8}")
+            for name, html_url, api_url in pairs:
+                for label, url in [('html', html_url), ('api', api_url)]:
+                    rate, queries, size = self.measure(client, url, count)
+                    self.stdout.write(f"{name:<18} {label:<5} {rate:>8.1f} {queries:>8} {size:>8}")
+            transaction.set_rollback(True)
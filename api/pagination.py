@@ -0,0 +1,20 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ApiCursorPagination(CursorPagination):
+    """
+    Opaque-cursor pagination.
+
+    Unlike page numbers there is no ``COUNT(*)`` and no growing ``OFFSET``:
+    each page is an indexed range scan starting after the last row of the
+    previous one, so page 500 costs the same as page 1 and rows added while
+    a client scrolls are never shown twice.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-created_at'
+
+    def __init__(self, ordering=None):
+        if ordering is not None:
+            self.ordering = ordering
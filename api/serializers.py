@@ -0,0 +1,193 @@
+"""
+Read serializers over ``values()`` rows.
+
+Each ``ValuesSerializer`` names the lookups it needs, so a view fetches
+exactly those columns (joins included) as dicts in one query, and
+``to_representation`` only renames keys. There is no model instance,
+field object or ``source`` resolution per row. Input still goes through
+regular DRF serializers (``InquiryCreateSerializer``).
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from rest_framework import serializers
+
+from accounts.models import DealerInquiry, DealerProfile, ScrapMaterial
+
+
+class ValuesSerializer(serializers.BaseSerializer):
+    """Read-only serializer mapping output names to ``values()`` lookups"""
+    fields = {}
+    media_fields = ()
+
+    @classmethod
+    def lookups(cls):
+        return list(cls.fields.values())
+
+    @classmethod
+    def values(cls, queryset):
+        return queryset.values(*cls.lookups())
+
+    def to_representation(self, row):
+        data = {}
+        for name, lookup in self.fields.items():
+            value = row[lookup]
+            # Money stays exact in JSON, as DRF's DecimalField would render it
+            data[name] = str(value) if isinstance(value, Decimal) else value
+        for name in self.media_fields:
+            data[name] = settings.MEDIA_URL + data[name] if data[name] else None
+        return data
+
+
+class MaterialSerializer(ValuesSerializer):
+    fields = {
+        'id': 'id',
+        'name': 'name',
+        'category': 'category__name',
+        'unit': 'unit',
+        'grades': 'quality_grades',
+    }
+
+
+class DealerSerializer(ValuesSerializer):
+    fields = {
+        'id': 'id',
+        'business_name': 'business_name',
+        'city': 'user__city',
+        'specialization': 'specialization',
+        'average_rating': 'average_rating',
+        'total_ratings': 'total_ratings',
+        'pickup_available': 'pickup_available',
+        'delivery_available': 'delivery_available',
+    }
+
+
+class DealerDetailSerializer(ValuesSerializer):
+    fields = dict(DealerSerializer.fields, **{
+        'business_address': 'business_address',
+        'business_phone': 'business_phone',
+        'business_email': 'business_email',
+        'website': 'website',
+        'operating_hours': 'operating_hours',
+        'minimum_quantity': 'minimum_quantity',
+        'years_in_business': 'years_in_business',
+        'total_transactions': 'total_transactions',
+        'latitude': 'latitude',
+        'longitude': 'longitude',
+    })
+
+    def to_representation(self, row):
+        data = super().to_representation(row)
+        # PhoneNumberField values are PhoneNumber objects; E.164 is what dialers expect
+        phone = data['business_phone']
+        data['business_phone'] = getattr(phone, 'as_e164', phone) or ''
+        return data
+
+
+class DealerPriceSerializer(ValuesSerializer):
+    """A dealer's own price list"""
+    fields = {
+        'material_id': 'material_id',
+        'material': 'material__name',
+        'category': 'material__category__name',
+        'unit': 'material__unit',
+        'grade': 'quality_grade',
+        'price_per_unit': 'price_per_unit',
+        'minimum_quantity': 'minimum_quantity',
+        'last_updated': 'last_updated',
+    }
+
+
+class PriceComparisonSerializer(ValuesSerializer):
+    """One dealer's quote for the compared material and grade"""
+    fields = {
+        'id': 'id',
+        'dealer_id': 'dealer_id',
+        'dealer': 'dealer__business_name',
+        'city': 'dealer__user__city',
+        'average_rating': 'dealer__average_rating',
+        'price_per_unit': 'price_per_unit',
+        'minimum_quantity': 'minimum_quantity',
+        'last_updated': 'last_updated',
+    }
+
+
+class RatingSerializer(ValuesSerializer):
+    fields = {
+        'user': 'user__username',
+        'rating': 'rating',
+        'review': 'review',
+        'created_at': 'created_at',
+    }
+
+
+class ScrapListingSerializer(ValuesSerializer):
+    fields = {
+        'id': 'id',
+        'title': 'title',
+        'material_id': 'material_id',
+        'material': 'material__name',
+        'unit': 'material__unit',
+        'grade': 'quality_grade',
+        'quantity': 'quantity',
+        'expected_price': 'expected_price',
+        'suggested_price': 'ai_suggested_price',
+        'city': 'city',
+        'state': 'state',
+        'image': 'image1',
+        'created_at': 'created_at',
+    }
+    media_fields = ('image',)
+
+
+class ReusableListingSerializer(ValuesSerializer):
+    fields = {
+        'id': 'id',
+        'title': 'title',
+        'category_id': 'category_id',
+        'category': 'category__name',
+        'brand': 'brand',
+        'condition': 'condition',
+        'transaction_type': 'transaction_type',
+        'price': 'price',
+        'city': 'city',
+        'state': 'state',
+        'image': 'image1',
+        'created_at': 'created_at',
+    }
+    media_fields = ('image',)
+
+
+class InquirySerializer(ValuesSerializer):
+    fields = {
+        'id': 'id',
+        'dealer_id': 'dealer_id',
+        'dealer': 'dealer__business_name',
+        'user': 'user__username',
+        'material_id': 'material_id',
+        'subject': 'subject',
+        'message': 'message',
+        'quantity': 'quantity',
+        'contact_preference': 'contact_preference',
+        'status': 'status',
+        'dealer_response': 'dealer_response',
+        'responded_at': 'responded_at',
+        'created_at': 'created_at',
+    }
+
+
+class InquiryCreateSerializer(serializers.ModelSerializer):
+    dealer = serializers.PrimaryKeyRelatedField(queryset=DealerProfile.objects.filter(verification_status='verified'))
+    material = serializers.PrimaryKeyRelatedField(
+        queryset=ScrapMaterial.objects.filter(is_active=True), required=False, allow_null=True,
+    )
+
+    class Meta:
+        model = DealerInquiry
+        fields = ['id', 'dealer', 'material', 'subject', 'message', 'quantity', 'contact_preference', 'status', 'created_at']
+        read_only_fields = ['status', 'created_at']
+
+    def validate_dealer(self, dealer):
+        if dealer.user_id == self.context['request'].user.id:
+            raise serializers.ValidationError("You cannot contact yourself.")
+        return dealer
@@ -0,0 +1,148 @@
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import User, DealerProfile, ScrapCategory, ScrapMaterial, DealerPrice, DealerRating, DealerInquiry
+from marketplace.models import ScrapListing
+
+
+class ApiFixturesMixin:
+    def setUp(self):
+        self.client = APIClient()
+        self.category = ScrapCategory.objects.create(name='Metals')
+        self.copper = ScrapMaterial.objects.create(category=self.category, name='Copper', quality_grades=['A', 'B'])
+        self.buyer = User.objects.create_user(username='buyer', email='buyer@example.com', password='secret-pass-123')
+
+    def make_dealer(self, username, **kwargs):
+        user = User.objects.create_user(username=username, email=f'{username}@example.com', user_type='dealer', city='Pune')
+        defaults = {
+            'business_name': f'{username.title()} Traders',
+            'business_registration_number': f'REG-{username}',
+            'business_address': 'Market Road',
+            'business_phone': '+919876543210',
+            'business_email': f'{username}@business.example.com',
+            'specialization': 'Metals',
+            'verification_status': 'verified',
+        }
+        defaults.update(kwargs)
+        return DealerProfile.objects.create(user=user, **defaults)
+
+    def authenticate(self, username='buyer', password='secret-pass-123'):
+        response = self.client.post(reverse('v1:token_obtain_pair'), {'username': username, 'password': password}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.json()['access']}")
+
+
+class DirectoryApiTests(ApiFixturesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.dealers = [self.make_dealer(f'dealer{i}') for i in range(25)]
+        self.make_dealer('pending', verification_status='pending')
+        for i, dealer in enumerate(self.dealers[:5]):
+            DealerPrice.objects.create(dealer=dealer, material=self.copper, quality_grade='A', price_per_unit=500 + i)
+
+    def test_dealers_are_cursor_paginated_with_one_query_per_page(self):
+        seen = []
+        url = reverse('v1:dealers') + '?page_size=10'
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            data = response.json()
+            seen.extend(dealer['id'] for dealer in data['results'])
+            url = data['next']
+
+        self.assertEqual(sorted(seen), sorted(dealer.id for dealer in self.dealers))
+        self.assertNotIn('count', data)
+
+    def test_dealer_detail_includes_prices_and_ratings(self):
+        dealer = self.dealers[0]
+        DealerRating.objects.create(dealer=dealer, user=self.buyer, rating=4, review='Fair weights')
+
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('v1:dealer_detail', args=[dealer.id]))
+
+        data = response.json()
+        self.assertEqual(data['business_phone'], '+919876543210')
+        self.assertEqual(data['prices'][0]['price_per_unit'], '500.00')
+        self.assertEqual(data['ratings'][0]['review'], 'Fair weights')
+        pending = DealerProfile.objects.get(business_name='Pending Traders')
+        self.assertEqual(self.client.get(reverse('v1:dealer_detail', args=[pending.id])).status_code, 404)
+
+    def test_price_comparison_orders_best_price_first(self):
+        response = self.client.get(reverse('v1:price_comparison'), {'material': self.copper.id, 'grade': 'A', 'page_size': 3})
+
+        data = response.json()
+        self.assertEqual([row['price_per_unit'] for row in data['results']], ['504.00', '503.00', '502.00'])
+        next_page = self.client.get(data['next']).json()
+        self.assertEqual([row['price_per_unit'] for row in next_page['results']], ['501.00', '500.00'])
+        self.assertEqual(self.client.get(reverse('v1:price_comparison')).status_code, 400)
+
+    def test_unchanged_prices_are_answered_with_304(self):
+        url = reverse('v1:price_comparison') + f'?material={self.copper.id}&grade=A&page_size=3'
+        first = self.client.get(url)
+        next_page = self.client.get(first.json()['next'])
+
+        with self.assertNumQueries(0):
+            repeat = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(repeat.status_code, 304)
+        self.assertNotEqual(next_page['ETag'], first['ETag'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DealerPrice.objects.filter(dealer=self.dealers[0]).get().delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+
+    @override_settings(JOBS_RUN_INLINE=False)
+    def test_scrap_listings_only_lists_active(self):
+        for status in ['active', 'sold']:
+            ScrapListing.objects.create(
+                seller=self.buyer, material=self.copper, title=f'{status} wire', description='Wire',
+                quantity=Decimal('10'), expected_price=Decimal('450'), pickup_address='Road',
+                city='Pune', state='MH', pincode='411001', status=status,
+            )
+
+        data = self.client.get(reverse('v1:scrap_listings'), {'city': 'pune'}).json()
+
+        self.assertEqual([row['title'] for row in data['results']], ['active wire'])
+        self.assertIsNone(data['results'][0]['image'])
+
+
+class InquiryApiTests(ApiFixturesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.dealer = self.make_dealer('dealer')
+
+    def test_inquiries_require_a_token(self):
+        self.assertEqual(self.client.get(reverse('v1:inquiries')).status_code, 401)
+
+    def test_send_and_list_inquiries_without_loading_the_user(self):
+        self.authenticate()
+
+        response = self.client.post(reverse('v1:inquiries'), {
+            'dealer': self.dealer.id, 'material': self.copper.id, 'subject': 'Copper', 'message': 'Best price for 50kg?',
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        inquiry = DealerInquiry.objects.get()
+        self.assertEqual((inquiry.user, inquiry.dealer), (self.buyer, self.dealer))
+
+        # JWT auth is stateless: listing costs the inquiries query only
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('v1:inquiries'))
+        self.assertEqual(response.json()['results'][0]['subject'], 'Copper')
+
+    def test_dealers_see_received_inquiries_and_cannot_contact_themselves(self):
+        DealerInquiry.objects.create(dealer=self.dealer, user=self.buyer, subject='Hello', message='Hi')
+        self.dealer.user.set_password('dealer-pass-123')
+        self.dealer.user.save()
+        self.authenticate('dealer', 'dealer-pass-123')
+
+        received = self.client.get(reverse('v1:inquiries'), {'received': '1'}).json()
+        response = self.client.post(reverse('v1:inquiries'), {
+            'dealer': self.dealer.id, 'subject': 'Me', 'message': 'Myself',
+        }, format='json')
+
+        self.assertEqual([row['subject'] for row in received['results']], ['Hello'])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('dealer', response.json())
@@ -0,0 +1,19 @@
+from django.urls import path
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    # JWT: POST username/password for an access/refresh pair, then refresh
+    path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+
+    path('materials/', views.materials, name='materials'),
+    path('dealers/', views.dealers, name='dealers'),
+    path('dealers/<int:dealer_id>/', views.dealer_detail, name='dealer_detail'),
+    path('prices/', views.price_comparison, name='price_comparison'),
+    path('listings/scrap/', views.scrap_listings, name='scrap_listings'),
+    path('listings/reusable/', views.reusable_listings, name='reusable_listings'),
+    path('inquiries/', views.inquiries, name='inquiries'),
+]
@@ -0,0 +1,152 @@
+from django.db.models import Q
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from accounts.clocks import dealer_list_clocks, dealer_page_clocks, directory_clocks, price_page_clocks
+from accounts.models import DealerInquiry, DealerPrice, DealerProfile, DealerRating, ScrapMaterial
+from core.conditional import conditional_page
+from core.db import read_only_view
+from marketplace.models import ReusableItemListing, ScrapListing
+from .pagination import ApiCursorPagination
+from .serializers import (
+    DealerDetailSerializer, DealerPriceSerializer, DealerSerializer, InquiryCreateSerializer, InquirySerializer,
+    MaterialSerializer, PriceComparisonSerializer, RatingSerializer, ReusableListingSerializer, ScrapListingSerializer,
+)
+
+
+def paginated(request, queryset, serializer_class, ordering):
+    """Cursor-paginate ``serializer_class``'s ``values()`` rows of ``queryset``"""
+    paginator = ApiCursorPagination(ordering)
+    page = paginator.paginate_queryset(serializer_class.values(queryset), request)
+    return paginator.get_paginated_response(serializer_class(page, many=True).data)
+
+
+@conditional_page(directory_clocks, per_user=False)
+@read_only_view
+@api_view(['GET'])
+def materials(request):
+    """Active materials with their category, unit and grades"""
+    rows = MaterialSerializer.values(
+        ScrapMaterial.objects.filter(is_active=True, category__is_active=True).order_by('category__sort_order', 'category__name', 'name')
+    )
+    return Response(MaterialSerializer(rows, many=True).data)
+
+
+@conditional_page(dealer_list_clocks, per_user=False)
+@read_only_view
+@api_view(['GET'])
+def dealers(request):
+    """Verified dealers, filterable by ?search=, ?category= and ?city="""
+    queryset = DealerProfile.objects.filter(verification_status='verified')
+    search = request.query_params.get('search', '')
+    category = request.query_params.get('category', '')
+    city = request.query_params.get('city', '')
+    if search:
+        queryset = queryset.filter(
+            Q(business_name__icontains=search) |
+            Q(specialization__icontains=search) |
+            Q(user__city__icontains=search)
+        )
+    if category:
+        queryset = queryset.filter(prices__material__category__name=category).distinct()
+    if city:
+        queryset = queryset.filter(user__city__icontains=city)
+    return paginated(request, queryset, DealerSerializer, '-id')
+
+
+@conditional_page(dealer_page_clocks, per_user=False)
+@read_only_view
+@api_view(['GET'])
+def dealer_detail(request, dealer_id):
+    """A verified dealer with their active prices and latest ratings"""
+    dealer = get_object_or_404(
+        DealerDetailSerializer.values(DealerProfile.objects.filter(verification_status='verified')), id=dealer_id,
+    )
+    prices = DealerPriceSerializer.values(
+        DealerPrice.objects.filter(dealer_id=dealer_id, is_active=True)
+        .order_by('material__category__name', 'material__name', 'quality_grade')
+    )
+    ratings = RatingSerializer.values(DealerRating.objects.filter(dealer_id=dealer_id).order_by('-created_at')[:10])
+
+    data = DealerDetailSerializer(dealer).data
+    data['prices'] = DealerPriceSerializer(prices, many=True).data
+    data['ratings'] = RatingSerializer(ratings, many=True).data
+    return Response(data)
+
+
+@conditional_page(price_page_clocks, per_user=False)
+@read_only_view
+@api_view(['GET'])
+def price_comparison(request):
+    """Verified dealers' quotes for ?material=<id>&grade=<A-D>, best price first"""
+    material_id = request.query_params.get('material', '')
+    grade = request.query_params.get('grade', 'A')
+    if not material_id.isdigit():
+        raise ValidationError({'material': "A material id is required."})
+    if grade not in dict(ScrapMaterial.QUALITY_GRADES):
+        raise ValidationError({'grade': "Grade must be one of A, B, C or D."})
+    get_object_or_404(ScrapMaterial.objects.values('id'), id=material_id)
+
+    queryset = DealerPrice.objects.filter(
+        material_id=material_id,
+        quality_grade=grade,
+        is_active=True,
+        dealer__verification_status='verified',
+    )
+    return paginated(request, queryset, PriceComparisonSerializer, ('-price_per_unit', 'id'))
+
+
+@api_view(['GET'])
+def scrap_listings(request):
+    """Active scrap listings, filterable by ?material=, ?grade= and ?city="""
+    queryset = ScrapListing.objects.filter(status='active')
+    material_id = request.query_params.get('material', '')
+    grade = request.query_params.get('grade', '')
+    city = request.query_params.get('city', '')
+    if material_id.isdigit():
+        queryset = queryset.filter(material_id=material_id)
+    if grade:
+        queryset = queryset.filter(quality_grade=grade)
+    if city:
+        queryset = queryset.filter(city__iexact=city)
+    return paginated(request, queryset, ScrapListingSerializer, '-created_at')
+
+
+@api_view(['GET'])
+def reusable_listings(request):
+    """Active reusable item listings, filterable by ?category=, ?condition= and ?city="""
+    queryset = ReusableItemListing.objects.filter(status='active')
+    category_id = request.query_params.get('category', '')
+    condition = request.query_params.get('condition', '')
+    city = request.query_params.get('city', '')
+    if category_id.isdigit():
+        queryset = queryset.filter(category_id=category_id)
+    if condition:
+        queryset = queryset.filter(condition=condition)
+    if city:
+        queryset = queryset.filter(city__iexact=city)
+    return paginated(request, queryset, ReusableListingSerializer, '-created_at')
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def inquiries(request):
+    """
+    GET: the caller's sent inquiries, or with ?received=1 those sent to their
+    dealer profile. POST: send an inquiry to a verified dealer.
+    """
+    if request.method == 'POST':
+        serializer = InquiryCreateSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        serializer.save(user_id=request.user.id)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    if request.query_params.get('received') == '1':
+        queryset = DealerInquiry.objects.filter(dealer__user_id=request.user.id)
+    else:
+        queryset = DealerInquiry.objects.filter(user_id=request.user.id)
+    return paginated(request, queryset, InquirySerializer, '-created_at')
@@ -0,0 +1,40 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import OutboundEmail, Job
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'from_email', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['subject', 'from_email', 'recipients']
+    readonly_fields = ['from_email', 'recipients', 'subject', 'attempts', 'last_error', 'created_at', 'sent_at']
+    exclude = ['message']
+    
+    actions = ['requeue_emails']
+    
+    def requeue_emails(self, request, queryset):
+        updated = queryset.exclude(status='sent').update(
+            status='queued',
+            attempts=0,
+            next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f'{updated} emails requeued.')
+    requeue_emails.short_description = "Requeue selected emails"
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'priority', 'attempts', 'run_at', 'wait_ms', 'duration_ms', 'locked_by']
+    list_filter = ['status', 'name']
+    search_fields = ['name', 'last_error']
+    readonly_fields = ['attempts', 'locked_by', 'locked_until', 'last_error', 'created_at', 'started_at', 'finished_at', 'wait_ms', 'duration_ms']
+    
+    actions = ['retry_jobs']
+    
+    def retry_jobs(self, request, queryset):
+        updated = queryset.exclude(status='running').update(
+            status='queued',
+            attempts=0,
+            run_at=timezone.now()
+        )
+        self.message_user(request, f'{updated} jobs requeued.')
+    retry_jobs.short_description = "Retry selected jobs"
@@ -0,0 +1,39 @@
+"""
+The purged Tailwind stylesheet.
+
+``build_stylesheet()`` runs the Tailwind CLI over ``assets/tailwind.css``.
+The CLI scans the files listed in ``tailwind.config.js`` and keeps only the
+classes they use, writing a minified ``static/css/app.css``. ``TAILWIND_CLI``
+defaults to the standalone ``tailwindcss`` binary, so the server needs no
+Node. ``manage.py collectstatic`` builds the stylesheet first, then the
+static files storage hashes and compresses it with everything else.
+
+``{% tailwind_stylesheet %}`` links the built file, or loads the Play CDN
+while ``TAILWIND_CDN`` is on, so a checkout works before its first build.
+"""
+import shlex
+import subprocess
+
+from django.conf import settings
+
+STYLESHEET = 'css/app.css'
+CDN_URL = 'https://cdn.tailwindcss.com'
+
+
+def tailwind_setting(name, default):
+    return getattr(settings, f'TAILWIND_{name}', default)
+
+
+def build_stylesheet():
+    """Run the Tailwind CLI and return the path of the built stylesheet"""
+    output = settings.BASE_DIR / 'static' / STYLESHEET
+    subprocess.run(
+        shlex.split(tailwind_setting('CLI', 'tailwindcss')) + [
+            '--config', str(settings.BASE_DIR / 'tailwind.config.js'),
+            '--input', str(settings.BASE_DIR / 'assets' / 'tailwind.css'),
+            '--output', str(output),
+            '--minify',
+        ],
+        cwd=settings.BASE_DIR, check=True,
+    )
+    return output
@@ -0,0 +1,193 @@
+"""
+Brotli/gzip response compression.
+
+``CompressionMiddleware`` compresses text responses (HTML, CSS, JS, JSON,
+CSV, XML, SVG) with the encoding the client ranks highest in
+``Accept-Encoding``; on a tie brotli wins, as it is smaller at a similar
+speed. Responses under ``COMPRESSION_MIN_SIZE`` bytes (1 KB) or already
+encoded are left alone. Streaming responses, such as ``core.exports``
+downloads, are compressed as their chunks are produced, so memory use stays
+flat however long the export.
+
+Gzip goes through ``django.utils.text`` with ``GZipMiddleware``'s random
+header padding against BREACH. Brotli has no such header; Django already
+masks the CSRF token differently on every response, which is what BREACH
+would go after on these pages.
+
+Original and sent bytes are counted per route (URL name) in process memory
+and added to the cache every ``COMPRESSION_STATS_FLUSH_SECONDS`` (a
+minute), so counting costs no cache write per response; see
+``manage.py compression_stats``.
+"""
+import re
+import threading
+import time
+from collections import Counter
+
+import brotli
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_sequence, compress_string
+
+STATS_PREFIX = 'compression:stats:'
+COUNTERS = ('responses', 'original', 'sent')
+UNRESOLVED = '-'
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/javascript', 'application/xml', 'image/svg+xml',
+)
+# Same as GZipMiddleware
+MAX_RANDOM_BYTES = 100
+
+_pending = Counter()
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def compression_setting(name, default):
+    return getattr(settings, f'COMPRESSION_{name}', default)
+
+
+def negotiate(accept_encoding):
+    """'br', 'gzip' or None, from an Accept-Encoding header"""
+    weights = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().lower().partition(';')
+        match = re.search(r'q=([0-9.]+)', params)
+        try:
+            weights[coding.strip()] = float(match.group(1)) if match else 1.0
+        except ValueError:
+            continue
+    best = None
+    for coding in ('br', 'gzip'):
+        weight = weights.get(coding, weights.get('*', 0))
+        if weight > 0 and (best is None or weight > best[1]):
+            best = (coding, weight)
+    return best[0] if best else None
+
+
+def brotli_compress(content):
+    return brotli.compress(content, quality=compression_setting('BROTLI_QUALITY', 5))
+
+
+def brotli_compress_sequence(sequence):
+    compressor = brotli.Compressor(quality=compression_setting('BROTLI_QUALITY', 5))
+    for chunk in sequence:
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def record(route, original, sent):
+    """Count a compressed response; the counts reach the cache with the next flush"""
+    global _last_flush
+    with _pending_lock:
+        for counter, value in zip(COUNTERS, (1, original, sent)):
+            _pending[f'{STATS_PREFIX}{route}:{counter}'] += value
+        due = time.monotonic() - _last_flush >= compression_setting('STATS_FLUSH_SECONDS', 60)
+    if due:
+        flush_compression_stats()
+
+
+def flush_compression_stats():
+    """Add this process's counts since the last flush to the shared counters"""
+    global _last_flush
+    with _pending_lock:
+        pending = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+    for key, value in pending.items():
+        if not cache.add(key, value, None):
+            try:
+                cache.incr(key, value)
+            except ValueError:
+                pass
+
+
+def compression_stats(routes):
+    """Responses, bytes before and after compression, and the share saved per route"""
+    flush_compression_stats()
+    rows = []
+    for route in list(routes) + [UNRESOLVED]:
+        keys = [f'{STATS_PREFIX}{route}:{counter}' for counter in COUNTERS]
+        counts = cache.get_many(keys)
+        row = {'route': route}
+        row.update({counter: counts.get(key, 0) for counter, key in zip(COUNTERS, keys)})
+        if not row['responses']:
+            continue
+        row['saved'] = row['original'] - row['sent']
+        row['ratio'] = row['saved'] / row['original'] if row['original'] else None
+        rows.append(row)
+    return rows
+
+
+def reset_compression_stats(routes):
+    with _pending_lock:
+        _pending.clear()
+    cache.delete_many([
+        f'{STATS_PREFIX}{route}:{counter}' for route in list(routes) + [UNRESOLVED] for counter in COUNTERS
+    ])
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compress responses with brotli or gzip; place it above anything that reads the body"""
+
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '').lower()
+        if response.has_header('Content-Encoding') or not content_type.startswith(COMPRESSIBLE_TYPES):
+            return response
+        if not response.streaming and len(response.content) < compression_setting('MIN_SIZE', 1024):
+            return response
+
+        # The response depends on the header even when the client gets it uncompressed
+        patch_vary_headers(response, ('Accept-Encoding',))
+        coding = negotiate(request.headers.get('Accept-Encoding', ''))
+        if coding is None:
+            return response
+
+        match = request.resolver_match
+        route = match.view_name if match else UNRESOLVED
+        if response.streaming:
+            if response.is_async:
+                # Compressing an async iterator would need an async compressor; send it as is
+                return response
+            response.streaming_content = self.compress_stream(coding, response.streaming_content, route)
+            del response['Content-Length']
+        else:
+            original = len(response.content)
+            if coding == 'br':
+                compressed = brotli_compress(response.content)
+            else:
+                compressed = compress_string(response.content, max_random_bytes=MAX_RANDOM_BYTES)
+            if len(compressed) >= original:
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+            record(route, original, len(compressed))
+
+        # A compressed body differs byte for byte, so the validator can only be weak
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = coding
+        return response
+
+    def compress_stream(self, coding, content, route):
+        original = sent = 0
+
+        def measured(chunks):
+            nonlocal original
+            for chunk in chunks:
+                original += len(chunk)
+                yield chunk
+
+        if coding == 'br':
+            compressed = brotli_compress_sequence(measured(content))
+        else:
+            compressed = compress_sequence(measured(content), max_random_bytes=MAX_RANDOM_BYTES)
+        for chunk in compressed:
+            sent += len(chunk)
+            yield chunk
+        record(route, original, sent)
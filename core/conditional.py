@@ -0,0 +1,122 @@
+"""
+Conditional GET (ETag / Last-Modified) backed by cached change clocks.
+
+A clock is a timestamp in the shared cache, named after what a page is
+built from (``dealer:12``, ``material:3``...). Signal receivers
+``touch_clocks()`` once the changing transaction commits, and a view
+decorated with ``conditional_page`` derives its validators from the newest
+of its clocks. A repeat visit whose ``If-None-Match`` or
+``If-Modified-Since`` still matches gets a 304 after one cache read,
+without running the view.
+
+A clock that is missing from the cache starts at "now". That costs one
+extra full response after an eviction, but it can never match a validator
+a client saw for different content.
+"""
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.middleware.csrf import get_token
+from django.views.decorators.http import condition
+
+CLOCK_PREFIX = 'clock:'
+
+
+def clock_values(*names):
+    """Return ``{name: timestamp}`` for the named clocks, starting any that are missing"""
+    keys = [CLOCK_PREFIX + name for name in names]
+    values = cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        now = timezone.now()
+        for key in missing:
+            cache.add(key, now, None)
+        # Another process may have started (or touched) the clock first
+        values.update(cache.get_many(missing))
+        values.update({key: now for key in missing if key not in values})
+    return {name: values[CLOCK_PREFIX + name] for name in names}
+
+
+def read_clocks(*names):
+    """Return the newest of the named clocks"""
+    return max(clock_values(*names).values())
+
+
+def move_clocks(*names):
+    """Move the named clocks to now"""
+    now = timezone.now()
+    cache.set_many({CLOCK_PREFIX + name: now for name in names}, None)
+
+
+def touch_clocks(*names):
+    """Move the named clocks to now once the current transaction commits"""
+    transaction.on_commit(lambda: move_clocks(*names))
+
+
+async def aresolve_user(request):
+    """
+    Load ``request.user`` through ``request.auser()``.
+
+    ``AuthenticationMiddleware`` leaves a lazy user that loads synchronously,
+    which async views and their decorators must not trigger on the event loop.
+    """
+    if hasattr(request, 'auser'):
+        request.user = await request.auser()
+
+
+def conditional_page(clocks, per_user=True):
+    """
+    Answer GET/HEAD with 304 until one of the view's clocks moves.
+
+    ``clocks(request, *args, **kwargs)`` returns the clock names the response
+    depends on. ``per_user`` pages (HTML showing who is logged in, with a
+    CSRF token) fold a logged-in user and their CSRF secret into the ETag,
+    skip Last-Modified for them and are marked private. Anonymous visitors
+    all see the same page, as in ``core.pagecache``.
+    """
+    def changed_at(request, *args, **kwargs):
+        if not hasattr(request, '_changed_at'):
+            request._changed_at = read_clocks(*clocks(request, *args, **kwargs))
+        return request._changed_at
+
+    def etag(request, *args, **kwargs):
+        parts = [request.get_full_path(), changed_at(request, *args, **kwargs).isoformat()]
+        if per_user and request.user.is_authenticated:
+            user = request.user
+            # get_token() makes sure the CSRF secret the page would embed exists before hashing it
+            get_token(request)
+            parts += [str(user.pk), user.first_name, request.META['CSRF_COOKIE']]
+        return hashlib.md5('|'.join(parts).encode(), usedforsecurity=False).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        if per_user and request.user.is_authenticated:
+            return None
+        return changed_at(request, *args, **kwargs)
+
+    def revalidate(response):
+        # Let browsers keep the page but revalidate it on every visit
+        patch_cache_control(response, no_cache=True, **({'private': True} if per_user else {}))
+        return response
+
+    def decorator(view):
+        conditional_view = condition(etag_func=etag, last_modified_func=last_modified)(view)
+
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                await aresolve_user(request)
+                # Read the clocks in a thread; the ETag and Last-Modified functions then reuse them
+                await sync_to_async(changed_at)(request, *args, **kwargs)
+                return revalidate(await conditional_view(request, *args, **kwargs))
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            return revalidate(conditional_view(request, *args, **kwargs))
+        return wrapper
+    return decorator
@@ -0,0 +1,128 @@
+"""
+SQLite tuning and read-only routing for single-host deployments.
+
+``configure_sqlite`` runs on every new SQLite connection. It switches the
+database to WAL, so readers never wait for the writer, and sets the other
+``SQLITE_PRAGMAS``. An alias may override them with a ``PRAGMAS`` dict, and
+one marked ``READ_ONLY`` refuses writes (``PRAGMA query_only``). Writers
+should also use ``'OPTIONS': {'transaction_mode': 'IMMEDIATE'}``: a
+transaction that takes the write lock up front waits out ``busy_timeout``
+instead of failing with "database is locked" when it first writes.
+
+``read_only_view`` serves a view's GET and HEAD requests from a read-only
+alias (a SQLite query-only connection, or a MySQL replica) through
+``ReadOnlyRouter``, except inside a transaction on ``default``. A replica
+lags behind, so ``PinAfterWriteMiddleware`` marks a client that just made
+a POST (or other unsafe request) and its reads stay on ``default`` for
+``DATABASE_PIN_SECONDS``, letting it see its own writes. For the same
+reason a page whose ``core.conditional`` clocks moved within that window
+(read by ``conditional_page`` or ``cache_anonymous_page`` around the view)
+is read from ``default``: the cached page, fragments and ETag stored under
+the new clock values must not be built from rows the replica lacks.
+"""
+from contextvars import ContextVar
+from datetime import timedelta
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+from django.utils.deprecation import MiddlewareMixin
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    # WAL stays consistent with NORMAL; only the last commits can be lost in a power cut
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,  # ms
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -20000,  # KiB, i.e. 20 MB per connection
+    'temp_store': 'MEMORY',
+}
+
+PIN_COOKIE = 'db_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+read_alias = ContextVar('read_alias', default=None)
+
+
+def db_setting(name, default):
+    return getattr(settings, f'DATABASE_{name}', default)
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """``connection_created`` receiver applying the alias's pragmas"""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = dict(connection.settings_dict.get('PRAGMAS', SQLITE_PRAGMAS))
+    if connection.settings_dict.get('READ_ONLY'):
+        pragmas['query_only'] = 'ON'
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+class ReadOnlyRouter:
+    """Send reads to the alias ``read_only_view`` picked for the current request"""
+
+    def db_for_read(self, model, **hints):
+        # Reads inside a transaction must see its writes
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return read_alias.get()
+
+    def allow_migrate(self, db, app_label, **hints):
+        # The read-only alias is the same database, or a replica of it
+        if db == db_setting('READ_ONLY_ALIAS', None):
+            return False
+        return None
+
+
+def changed_recently(request):
+    """Whether the clocks read for the request moved within ``DATABASE_PIN_SECONDS``"""
+    changed_at = getattr(request, '_changed_at', None)
+    return changed_at is not None and timezone.now() - changed_at < timedelta(seconds=db_setting('PIN_SECONDS', 15))
+
+
+def request_read_alias(request):
+    alias = db_setting('READ_ONLY_ALIAS', None)
+    if request.method not in ('GET', 'HEAD') or alias not in settings.DATABASES or PIN_COOKIE in request.COOKIES:
+        return None
+    if changed_recently(request):
+        return None
+    return alias
+
+
+def read_only_view(view):
+    """Serve GET and HEAD from ``DATABASE_READ_ONLY_ALIAS`` when one is configured"""
+    if iscoroutinefunction(view):
+        # The async ORM runs queries in threads, which inherit the context variable
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            token = read_alias.set(request_read_alias(request))
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                read_alias.reset(token)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        token = read_alias.set(request_read_alias(request))
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            read_alias.reset(token)
+    return wrapper
+
+
+class PinAfterWriteMiddleware(MiddlewareMixin):
+    """Keep a client's reads on ``default`` for a while after it writes"""
+
+    def process_response(self, request, response):
+        if request.method not in SAFE_METHODS:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=db_setting('PIN_SECONDS', 15),
+                secure=request.is_secure(), httponly=True, samesite='Lax',
+            )
+        return response
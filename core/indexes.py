@@ -0,0 +1,36 @@
+"""
+Process-local, lazily rebuilt in-memory indexes.
+
+Each web or worker process keeps its own copy of an index built from the
+database. A version counter in the shared cache says when it is stale:
+``invalidate()`` bumps the counter (usually from a signal), and the next
+``get()`` in every process notices and rebuilds. A lookup against a warm
+index therefore costs one cache read and no queries.
+"""
+import threading
+
+from django.core.cache import cache
+
+
+class LocalIndex:
+    def __init__(self, version_key, build):
+        self.version_key = version_key
+        self.build = build
+        self._index = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        version = cache.get(self.version_key, 0)
+        if self._index is None or self._version != version:
+            with self._lock:
+                if self._index is None or self._version != version:
+                    self._index = self.build()
+                    self._version = version
+        return self._index
+
+    def invalidate(self):
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            cache.set(self.version_key, 1, None)
@@ -0,0 +1,298 @@
+"""
+Small database-backed job queue.
+
+Tasks are plain functions registered with ``@job`` in an app's ``tasks.py``
+and queued with ``func.enqueue(*args, **kwargs)``. The ``run_workers``
+command drains the ``Job`` table with a pool of worker processes. On MySQL
+due rows are claimed with ``SELECT ... FOR UPDATE SKIP LOCKED``; SQLite has
+no row locks, so each row is claimed with a conditional ``UPDATE`` instead.
+A claimed job is locked for ``JOBS_LEASE_SECONDS``, or for its task's
+``timeout`` plus ``JOBS_LEASE_MARGIN`` when that is longer, so no other
+worker reclaims it while it may still be running.
+
+With ``JOBS_RUN_INLINE = True`` (the development default) ``enqueue`` runs the
+task immediately in-process, so nothing needs a worker to behave as before.
+"""
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, router, transaction
+from django.db.models import Avg, Count, F, Max, Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+class JobTimeout(Exception):
+    pass
+
+
+class Task:
+    def __init__(self, func, name, priority, max_attempts, timeout):
+        self.func = func
+        self.name = name
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+
+def job(name=None, priority=0, max_attempts=3, timeout=None):
+    """Register a function as a background task and give it an ``enqueue`` helper"""
+    def decorator(func):
+        task = Task(func, name or f'{func.__module__}.{func.__name__}', priority, max_attempts, timeout)
+        registry[task.name] = task
+        func.task_name = task.name
+        func.enqueue = lambda *args, **kwargs: enqueue(task.name, *args, **kwargs)
+        return func
+    return decorator
+
+
+def autodiscover():
+    autodiscover_modules('tasks')
+
+
+def jobs_setting(name, default):
+    return getattr(settings, f'JOBS_{name}', default)
+
+
+def enqueue(name, *args, priority=None, run_at=None, delay=None, **kwargs):
+    """
+    Queue task ``name`` and return the ``Job`` row (``None`` when run inline).
+
+    ``run_at`` or ``delay`` (seconds) schedule it for later; ``priority``
+    overrides the task's default.
+    """
+    task = registry.get(name)
+    if task is None:
+        autodiscover()
+        task = registry.get(name)
+    if jobs_setting('RUN_INLINE', False):
+        if task is None:
+            raise LookupError(f'Unknown task {name!r}')
+        task(*args, **kwargs)
+        return None
+
+    if run_at is None:
+        run_at = timezone.now() + timedelta(seconds=delay or 0)
+    return Job.objects.create(
+        name=name,
+        args=list(args),
+        kwargs=kwargs,
+        priority=task.priority if priority is None and task else priority or 0,
+        max_attempts=task.max_attempts if task else 3,
+        run_at=run_at,
+    )
+
+
+def enqueue_once(name, *args, **kwargs):
+    """
+    Like ``enqueue`` but skip it if an identical job is already waiting, so a
+    burst of triggers (e.g. many price edits) collapses into one run.
+    """
+    if not jobs_setting('RUN_INLINE', False):
+        job_kwargs = {key: value for key, value in kwargs.items() if key not in ('priority', 'run_at', 'delay')}
+        if Job.objects.filter(name=name, status='queued', args=list(args), kwargs=job_kwargs).exists():
+            return None
+    return enqueue(name, *args, **kwargs)
+
+
+def due_jobs(now):
+    return Job.objects.filter(
+        Q(status='queued') | Q(status='running', locked_until__lt=now),
+        run_at__lte=now,
+    )
+
+
+def lease_seconds(name):
+    """How long a claimed job stays locked: the lease, or longer for a task allowed to outrun it"""
+    lease = jobs_setting('LEASE_SECONDS', 600)
+    task = registry.get(name)
+    if task is not None and task.timeout:
+        return max(lease, task.timeout + jobs_setting('LEASE_MARGIN', 60))
+    return lease
+
+
+def check_leases():
+    """
+    Refuse to work when a task's time limit can't be enforced but reaches the lease.
+
+    The limit is a ``SIGALRM``, which only exists on POSIX and in the main
+    thread; without it such a job could still be running when its lease
+    runs out and another worker claims it again.
+    """
+    if hasattr(signal, 'SIGALRM') and threading.current_thread() is threading.main_thread():
+        return
+    lease = jobs_setting('LEASE_SECONDS', 600)
+    unbounded = sorted(task.name for task in registry.values() if task.timeout and task.timeout >= lease)
+    if unbounded:
+        raise ImproperlyConfigured(
+            f"Job time limits can't be enforced here, and {', '.join(unbounded)} may run past "
+            f"JOBS_LEASE_SECONDS ({lease}); raise the lease or run workers in their own processes"
+        )
+
+
+def claim_jobs(worker_id, limit=1):
+    """Atomically take up to ``limit`` due jobs for ``worker_id``"""
+    now = timezone.now()
+    claim = {
+        'status': 'running',
+        'locked_by': worker_id,
+        'started_at': now,
+        'attempts': F('attempts') + 1,
+    }
+    ordered = due_jobs(now).order_by('-priority', 'run_at', 'id')
+    connection = connections[router.db_for_write(Job)]
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic(using=connection.alias):
+            rows = list(ordered.select_for_update(skip_locked=True).values_list('id', 'name')[:limit])
+            ids = [job_id for job_id, _ in rows]
+            by_lease = {}
+            for job_id, name in rows:
+                by_lease.setdefault(lease_seconds(name), []).append(job_id)
+            for lease, lease_ids in by_lease.items():
+                Job.objects.filter(id__in=lease_ids).update(locked_until=now + timedelta(seconds=lease), **claim)
+    else:
+        # No row locks: over-fetch and keep only rows this worker flipped itself.
+        # Each UPDATE autocommits; wrapping them in one transaction would make
+        # SQLite upgrade a read lock to a write lock and fail with "locked".
+        ids = []
+        for job_id, name in ordered.values_list('id', 'name')[:limit * 4]:
+            locked_until = now + timedelta(seconds=lease_seconds(name))
+            if due_jobs(now).filter(id=job_id).update(locked_until=locked_until, **claim):
+                ids.append(job_id)
+                if len(ids) == limit:
+                    break
+    if not ids:
+        return []
+    return list(Job.objects.filter(id__in=ids).order_by('-priority', 'run_at', 'id'))
+
+
+def _alarm(signum, frame):
+    raise JobTimeout('Job exceeded its time limit')
+
+
+def run_job(job):
+    """Execute a claimed job and record outcome and timing"""
+    task = registry.get(job.name)
+    started = time.perf_counter()
+    # Measured before a retry moves run_at
+    job.wait_ms = max(0, int((job.started_at - job.run_at).total_seconds() * 1000))
+    use_alarm = (
+        task is not None and task.timeout
+        and hasattr(signal, 'SIGALRM')
+        and threading.current_thread() is threading.main_thread()
+    )
+    try:
+        if task is None:
+            raise LookupError(f'Unknown task {job.name!r}')
+        if use_alarm:
+            signal.signal(signal.SIGALRM, _alarm)
+            signal.setitimer(signal.ITIMER_REAL, task.timeout)
+        task(*job.args, **job.kwargs)
+    except Exception as exc:
+        job.last_error = f'{type(exc).__name__}: {exc}'[:2000]
+        if job.attempts >= job.max_attempts:
+            job.status = 'failed'
+        else:
+            job.status = 'queued'
+            job.run_at = timezone.now() + timedelta(
+                seconds=jobs_setting('RETRY_BACKOFF', 30) * 2 ** (job.attempts - 1)
+            )
+        logger.warning('Job %s #%s failed (attempt %s/%s): %s',
+                       job.name, job.pk, job.attempts, job.max_attempts, job.last_error)
+    else:
+        job.status = 'done'
+        job.last_error = ''
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+    job.finished_at = timezone.now()
+    job.duration_ms = int((time.perf_counter() - started) * 1000)
+    job.locked_until = None
+    job.save(update_fields=['status', 'run_at', 'last_error', 'finished_at', 'duration_ms', 'wait_ms', 'locked_until'])
+
+    if job.status != 'queued':
+        schedule_periodic(job.name)
+    return job.status == 'done'
+
+
+def schedule_periodic(name):
+    """Queue the next run of a ``JOBS_PERIODIC`` task unless one is pending"""
+    interval = jobs_setting('PERIODIC', {}).get(name)
+    if interval is None or Job.objects.filter(name=name, status__in=['queued', 'running']).exists():
+        return None
+    return enqueue(name, delay=interval)
+
+
+def ensure_periodic_jobs():
+    if jobs_setting('RUN_INLINE', False):
+        return
+    for name in jobs_setting('PERIODIC', {}):
+        if not Job.objects.filter(name=name, status__in=['queued', 'running']).exists():
+            enqueue(name)
+
+
+def default_worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def work(worker_id=None, batch_size=1, poll_interval=1.0, burst=False, stop_event=None):
+    """
+    Worker loop: claim, run, repeat. Returns the number of jobs processed.
+
+    ``burst`` exits as soon as the queue has no due jobs, which suits a cron
+    entry on hosts that can't keep a daemon alive.
+    """
+    autodiscover()
+    check_leases()
+    worker_id = worker_id or default_worker_id()
+    processed = 0
+    while not (stop_event and stop_event.is_set()):
+        jobs = claim_jobs(worker_id, batch_size)
+        if not jobs:
+            if burst:
+                break
+            if stop_event:
+                stop_event.wait(poll_interval)
+            else:
+                time.sleep(poll_interval)
+            continue
+        for claimed in jobs:
+            run_job(claimed)
+            processed += 1
+    return processed
+
+
+def job_stats(since=None):
+    """Per-task counts and timing aggregates for finished jobs"""
+    jobs = Job.objects.all()
+    if since is not None:
+        jobs = jobs.filter(created_at__gte=since)
+    return list(
+        jobs.values('name').annotate(
+            total=Count('id'),
+            done=Count('id', filter=Q(status='done')),
+            failed=Count('id', filter=Q(status='failed')),
+            pending=Count('id', filter=Q(status__in=['queued', 'running'])),
+            avg_duration_ms=Avg('duration_ms'),
+            max_duration_ms=Max('duration_ms'),
+            avg_wait_ms=Avg('wait_ms'),
+        ).order_by('name')
+    )
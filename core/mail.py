@@ -0,0 +1,141 @@
+"""
+Outbox email delivery.
+
+``OutboxEmailBackend`` is a drop-in ``EMAIL_BACKEND`` that renders messages
+and stores them in the ``OutboundEmail`` table instead of talking to SMTP, so
+views (allauth verification, inquiry notifications) return immediately.
+``deliver_queued`` is driven by the ``send_queued_mail`` command and pushes
+the queue out in batches over one persistent SMTP connection.
+"""
+import logging
+import smtplib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.backends.smtp import EmailBackend as SMTPEmailBackend
+from django.core.mail.message import sanitize_address
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+def outbox_setting(name, default):
+    return getattr(settings, f'OUTBOX_{name}', default)
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    """Queue messages in the database; the outbox worker sends them later"""
+
+    def send_messages(self, email_messages):
+        rows = []
+        for message in email_messages:
+            if not message.recipients():
+                continue
+            encoding = message.encoding or settings.DEFAULT_CHARSET
+            rows.append(OutboundEmail(
+                from_email=sanitize_address(message.from_email, encoding),
+                recipients=[sanitize_address(addr, encoding) for addr in message.recipients()],
+                subject=str(message.subject)[:255],
+                message=message.message().as_bytes(linesep='\r\n'),
+            ))
+        if not rows:
+            return 0
+        try:
+            OutboundEmail.objects.bulk_create(rows)
+        except Exception:
+            if not self.fail_silently:
+                raise
+            return 0
+        return len(rows)
+
+
+class OutboxDeliveryBackend(SMTPEmailBackend):
+    """SMTP backend that sends pre-rendered outbox rows over a reused connection"""
+
+    def send_outbound(self, email):
+        if self.connection is None:
+            self.open()
+        self.connection.sendmail(email.from_email, email.recipients, bytes(email.message))
+
+    def reset(self):
+        """Drop a broken connection so the next message reconnects"""
+        try:
+            self.close()
+        except (smtplib.SMTPException, OSError):
+            self.connection = None
+
+
+def claim_batch(batch_size):
+    """
+    Lock and lease up to ``batch_size`` due messages for this worker.
+
+    Rows are moved to ``sending`` with a lease in ``next_attempt_at``; if the
+    worker dies mid-batch, the lease expires and another worker picks them up.
+    ``skip_locked`` lets several workers drain the queue on MySQL; SQLite
+    ignores the row lock and serialises writers instead.
+    """
+    now = timezone.now()
+    lease = timedelta(seconds=outbox_setting('LEASE_SECONDS', 300))
+    with transaction.atomic():
+        ids = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status__in=['queued', 'sending'], next_attempt_at__lte=now)
+            .order_by('next_attempt_at')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        OutboundEmail.objects.filter(id__in=ids).update(status='sending', next_attempt_at=now + lease)
+    return list(OutboundEmail.objects.filter(id__in=ids).order_by('id'))
+
+
+def deliver_queued(batch_size=None, connection=None):
+    """
+    Send one batch of due messages and return ``(sent, failed)``.
+
+    Pass an already opened ``OutboxDeliveryBackend`` as ``connection`` to keep
+    the SMTP session alive across batches. Failed messages are retried with
+    exponential backoff until ``OUTBOX_MAX_ATTEMPTS`` is reached.
+    """
+    batch = claim_batch(batch_size or outbox_setting('BATCH_SIZE', 50))
+    if not batch:
+        return 0, 0
+
+    max_attempts = outbox_setting('MAX_ATTEMPTS', 5)
+    backoff = outbox_setting('RETRY_BACKOFF', 60)
+    backend = connection or OutboxDeliveryBackend(fail_silently=False)
+    sent = failed = 0
+    try:
+        for email in batch:
+            email.attempts += 1
+            try:
+                backend.send_outbound(email)
+            except (smtplib.SMTPException, OSError) as exc:
+                failed += 1
+                email.last_error = f'{type(exc).__name__}: {exc}'[:1000]
+                if email.attempts >= max_attempts:
+                    email.status = 'failed'
+                else:
+                    email.status = 'queued'
+                    email.next_attempt_at = timezone.now() + timedelta(
+                        seconds=backoff * 2 ** (email.attempts - 1)
+                    )
+                if not isinstance(exc, (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException)):
+                    backend.reset()
+                logger.warning('Outbox delivery of #%s failed: %s', email.pk, email.last_error)
+            else:
+                sent += 1
+                email.status = 'sent'
+                email.sent_at = timezone.now()
+                email.last_error = ''
+    finally:
+        OutboundEmail.objects.bulk_update(
+            batch, ['status', 'attempts', 'last_error', 'next_attempt_at', 'sent_at']
+        )
+        if connection is None:
+            backend.reset()
+    return sent, failed
@@ -0,0 +1,85 @@
+import multiprocessing
+import os
+import tempfile
+import time
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from core.sqlite_cache import SQLiteCache
+
+PAGE = b'<div class="glass p-6 rounded-3xl">dealer card</div>' * 600
+
+
+def backends(directory, max_entries):
+    options = {'OPTIONS': {'MAX_ENTRIES': max_entries}}
+    return [
+        ('locmem', (LocMemCache, 'bench', options)),
+        ('filebased', (FileBasedCache, os.path.join(directory, 'files'), options)),
+        ('sqlite', (SQLiteCache, os.path.join(directory, 'cache.sqlite3'), options)),
+    ]
+
+
+def hammer(backend, ops, worker):
+    """Page-cache traffic from one process: 80% reads, the rest writes and counters"""
+    backend_class, location, params = backend
+    cache = backend_class(location, params)
+    started = time.perf_counter()
+    for i in range(ops):
+        key = f'page:{(worker * 7 + i) % 200}'
+        if i % 10 == 0:
+            cache.set(key, PAGE)
+        elif i % 10 == 1:
+            cache.incr('hits')
+        else:
+            cache.get(key)
+    return time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = "Compare operations/sec of the SQLite, file-based and local-memory cache backends"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ops', type=int, default=2000, help="Operations per measurement")
+        parser.add_argument('--processes', type=int, default=4, help="Worker processes sharing one cache")
+        parser.add_argument('--max-entries', type=int, default=1000)
+
+    def timed(self, ops, operation):
+        started = time.perf_counter()
+        for i in range(ops):
+            operation(i)
+        return ops / (time.perf_counter() - started)
+
+    def handle(self, *args, **options):
+        ops = options['ops']
+        workers = options['processes']
+        with tempfile.TemporaryDirectory() as directory:
+            self.stdout.write(
+                f"{'backend':<10} {'set':>9} {'get':>9} {'miss':>9} {'get_many':>9} {'incr':>9} {'culling':>9} "
+                f"{f'{workers} procs':>9} {'shared':>7}"
+            )
+            for name, backend in backends(directory, options['max_entries']):
+                backend_class, location, params = backend
+                cache = backend_class(location, params)
+                cache.clear()
+                rates = [
+                    self.timed(ops, lambda i: cache.set(f'key:{i % 500}', PAGE)),
+                    self.timed(ops, lambda i: cache.get(f'key:{i % 500}')),
+                    self.timed(ops, lambda i: cache.get(f'missing:{i}')),
+                    self.timed(ops, lambda i: cache.get_many([f'key:{(i + j) % 500}' for j in range(10)])),
+                    self.timed(ops, lambda i: cache.incr('counter') if cache.has_key('counter') else cache.set('counter', 1)),
+                    # Every write past MAX_ENTRIES has to make room
+                    self.timed(ops, lambda i: cache.set(f'unique:{i}', PAGE)),
+                ]
+
+                cache.clear()
+                cache.set('hits', 0, None)
+                with multiprocessing.get_context('fork').Pool(workers) as pool:
+                    started = time.perf_counter()
+                    pool.starmap(hammer, [(backend, ops, worker) for worker in range(workers)])
+                    elapsed = time.perf_counter() - started
+                # Each process only sees its own LocMemCache
+                shared = cache.get('hits') == workers * ops // 10
+                rates.append(workers * ops / elapsed)
+                self.stdout.write(f"{name:<10} " + ' '.join(f'{rate:>9.0f}' for rate in rates) + f" {'yes' if shared else 'no':>7}")
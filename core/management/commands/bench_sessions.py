@@ -0,0 +1,55 @@
+import time
+from importlib import import_module
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+ENGINES = [
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+    'core.sessions',
+]
+
+
+class Command(BaseCommand):
+    help = "Measure the session work of one logged-in request for each session engine"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+
+    def request(self, store_class, session_key, save):
+        """What SessionMiddleware does for a logged-in request"""
+        session = store_class(session_key)
+        session.get('_auth_user_id')
+        if save:
+            # SESSION_SAVE_EVERY_REQUEST
+            session.save()
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        queries = []
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        self.stdout.write(f"{'engine':<45} {'save every request':<19} {'us/req':>8} {'queries/req':>12}")
+        # Benchmark sessions are rolled back
+        with transaction.atomic():
+            for engine in ENGINES:
+                store_class = import_module(engine).SessionStore
+                session = store_class()
+                session.update({'_auth_user_id': '1', '_auth_user_backend': 'accounts.auth.CachedModelBackend'})
+                session.create()
+                for save in [False, True]:
+                    self.request(store_class, session.session_key, save)
+                    queries.clear()
+                    with connection.execute_wrapper(count_query):
+                        started = time.perf_counter()
+                        for _ in range(count):
+                            self.request(store_class, session.session_key, save)
+                        elapsed = time.perf_counter() - started
+                    self.stdout.write(
+                        f"{engine:<45} {'yes' if save else 'no':<19} {elapsed / count * 1e6:>8.0f} {len(queries) / count:>12.2f}"
+                    )
+            transaction.set_rollback(True)
@@ -0,0 +1,70 @@
+import multiprocessing
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+
+MODES = {
+    # Django's defaults: rollback journal, deferred transactions, 5 second busy timeout
+    'default': {'PRAGMAS': {}},
+    'tuned': {'OPTIONS': {'transaction_mode': 'IMMEDIATE'}},
+}
+
+
+def bench_alias(path, mode):
+    """Register a connection alias for the benchmark database in this process"""
+    alias = f'bench_{mode}'
+    if alias not in connections.settings:
+        databases = connections.configure_settings({
+            'default': connections.settings['default'],
+            alias: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': path, **MODES[mode]},
+        })
+        connections.settings[alias] = databases[alias]
+    return alias
+
+
+def write(path, mode, worker, writes):
+    """Read-then-write transactions, like a view saving a form; returns (committed, locked)"""
+    alias = bench_alias(path, mode)
+    committed = locked = 0
+    for i in range(writes):
+        try:
+            with transaction.atomic(using=alias), connections[alias].cursor() as cursor:
+                cursor.execute('SELECT COUNT(*) FROM bench_write WHERE worker = %s', [worker])
+                cursor.execute('INSERT INTO bench_write (worker, n, payload) VALUES (%s, %s, %s)', [worker, i, 'x' * 200])
+            committed += 1
+        except OperationalError as exc:
+            if 'locked' not in str(exc):
+                raise
+            locked += 1
+    connections[alias].close()
+    return committed, locked
+
+
+class Command(BaseCommand):
+    help = "Compare SQLite write throughput of parallel workers with default and tuned settings"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help="Writer processes")
+        parser.add_argument('--writes', type=int, default=200, help="Transactions per worker")
+
+    def handle(self, *args, **options):
+        workers, writes = options['workers'], options['writes']
+        self.stdout.write(f"{'mode':<8} {'writes/s':>9} {'committed':>10} {'locked':>7}")
+        with tempfile.TemporaryDirectory() as directory:
+            for mode in MODES:
+                path = os.path.join(directory, f'{mode}.sqlite3')
+                alias = bench_alias(path, mode)
+                with connections[alias].cursor() as cursor:
+                    cursor.execute('CREATE TABLE bench_write (id INTEGER PRIMARY KEY, worker INTEGER, n INTEGER, payload TEXT)')
+                connections[alias].close()
+
+                with multiprocessing.get_context('fork').Pool(workers) as pool:
+                    started = time.perf_counter()
+                    results = pool.starmap(write, [(path, mode, worker, writes) for worker in range(workers)])
+                    elapsed = time.perf_counter() - started
+                committed = sum(result[0] for result in results)
+                locked = sum(result[1] for result in results)
+                self.stdout.write(f"{mode:<8} {committed / elapsed:>9.0f} {committed:>10} {locked:>7}")
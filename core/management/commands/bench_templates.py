@@ -0,0 +1,79 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from api.management.commands.bench_api import seed
+from accounts.models import User
+from core.warmup import precompile_templates
+
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def templates_with(loaders):
+    """``settings.TEMPLATES`` with the given loaders instead of ``APP_DIRS``"""
+    engine = {key: value for key, value in settings.TEMPLATES[0].items() if key != 'APP_DIRS'}
+    engine['OPTIONS'] = dict(engine['OPTIONS'], loaders=loaders)
+    return [engine]
+
+
+class Command(BaseCommand):
+    help = "Compare page render times with uncached, cached and precompiled templates"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100, help="Requests per page")
+        parser.add_argument('--dealers', type=int, default=50)
+        parser.add_argument('--materials', type=int, default=10)
+
+    def timed(self, client, url):
+        started = time.perf_counter()
+        response = client.get(url)
+        assert response.status_code == 200, (url, response.status_code)
+        return (time.perf_counter() - started) * 1000
+
+    def handle(self, *args, **options):
+        host = next((host for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost').lstrip('.')
+        client = Client(HTTP_HOST=host, secure=not settings.DEBUG)
+        count = options['requests']
+        uncached = templates_with(TEMPLATE_LOADERS)
+        cached = templates_with([('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)])
+        # Fragment caching would hide most of the template work
+        caches = dict(settings.CACHES, template_fragments={
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        })
+
+        # Benchmark rows are rolled back
+        with transaction.atomic(), override_settings(CACHES=caches):
+            dealer, _ = seed(options['dealers'], options['materials'])
+            client.force_login(User.objects.create_user(username='bench-buyer', email='bench-buyer@example.com'))
+            pages = [
+                ('home', reverse('home:home')),
+                ('dealer directory', reverse('accounts:dealers_directory')),
+                ('dealer detail', reverse('accounts:dealer_detail', args=[dealer.id])),
+                ('price comparison', reverse('accounts:price_comparison')),
+                ('marketplace', reverse('marketplace:home')),
+            ]
+            self.stdout.write(
+                f"{'page':<18} {'uncached ms/req':>16} {'first req cold':>15} {'first req precompiled':>22} {'cached ms/req':>14}"
+            )
+            for name, url in pages:
+                # Entering override_settings(TEMPLATES=...) starts a new engine, like a new worker
+                with override_settings(TEMPLATES=uncached):
+                    self.timed(client, url)
+                    uncached_ms = sum(self.timed(client, url) for _ in range(count)) / count
+                with override_settings(TEMPLATES=cached):
+                    cold_ms = self.timed(client, url)
+                with override_settings(TEMPLATES=cached):
+                    precompile_templates()
+                    precompiled_ms = self.timed(client, url)
+                    cached_ms = sum(self.timed(client, url) for _ in range(count)) / count
+                self.stdout.write(
+                    f"{name:<18} {uncached_ms:>16.2f} {cold_ms:>15.2f} {precompiled_ms:>22.2f} {cached_ms:>14.2f}"
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,22 @@
+import subprocess
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.assets import build_stylesheet, tailwind_setting
+
+
+class Command(BaseCommand):
+    help = "Build the purged, minified Tailwind stylesheet into static/css/app.css"
+
+    def handle(self, *args, **options):
+        try:
+            output = build_stylesheet()
+        except FileNotFoundError:
+            raise CommandError(
+                f"Tailwind CLI not found: {tailwind_setting('CLI', 'tailwindcss')!r}. "
+                "Install the standalone binary or set TAILWIND_CLI."
+            )
+        except subprocess.CalledProcessError as exc:
+            raise CommandError(f"Tailwind CLI failed with exit status {exc.returncode}")
+        if options['verbosity']:
+            self.stdout.write(f"Built {output} ({output.stat().st_size / 1024:.1f} KiB)")
@@ -0,0 +1,15 @@
+from django.contrib.staticfiles.management.commands.collectstatic import Command as CollectStaticCommand
+from django.core.management import call_command
+
+
+class Command(CollectStaticCommand):
+    help = "Build the Tailwind stylesheet, then collect static files into STATIC_ROOT"
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--skip-css', action='store_true', help="Collect the stylesheet already in static/css")
+
+    def handle(self, **options):
+        if not options['skip_css'] and not options['dry_run']:
+            call_command('build_css', verbosity=options['verbosity'], stdout=self.stdout)
+        return super().handle(**options)
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.urls import URLResolver, get_resolver
+
+from core.compression import compression_stats, reset_compression_stats
+
+
+def route_names(patterns, namespace=''):
+    """The view name ``request.resolver_match`` reports for each URL pattern"""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            prefix = f'{namespace}{pattern.namespace}:' if pattern.namespace else namespace
+            yield from route_names(pattern.url_patterns, prefix)
+        else:
+            yield namespace + (pattern.name or pattern.lookup_str)
+
+
+class Command(BaseCommand):
+    help = "Show compressed responses and bytes saved per route"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Zero the counters after printing them")
+
+    def handle(self, *args, **options):
+        routes = list(dict.fromkeys(route_names(get_resolver().url_patterns)))
+        self.stdout.write(f"{'route':<40} {'responses':>9} {'original KB':>12} {'sent KB':>9} {'saved':>7}")
+        for row in compression_stats(routes):
+            saved = f"{row['ratio']:.1%}" if row['ratio'] is not None else '-'
+            self.stdout.write(
+                f"{row['route']:<40} {row['responses']:>9} {row['original'] / 1024:>12.1f} "
+                f"{row['sent'] / 1024:>9.1f} {saved:>7}"
+            )
+        if options['reset']:
+            reset_compression_stats(routes)
+            self.stdout.write("Counters reset.")
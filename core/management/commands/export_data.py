@@ -0,0 +1,45 @@
+import time
+
+from django.apps import apps
+from django.contrib import admin
+from django.core.management.base import BaseCommand, CommandError
+
+from core.exports import EXPORT_CHUNK_SIZE, FORMATS, ExportMixin, export_rows
+
+
+class Command(BaseCommand):
+    help = "Stream a model's rows to CSV or JSON in constant memory (uses the admin's export fields)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', help="Model label, e.g. accounts.DealerInquiry or marketplace.Transaction")
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--output', '-o', default='-', help="File to write ('-' for stdout)")
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, help="Rows fetched per round trip")
+
+    def handle(self, *args, **options):
+        try:
+            model = apps.get_model(options['model'])
+        except (LookupError, ValueError) as e:
+            raise CommandError(str(e))
+
+        model_admin = admin.site._registry.get(model)
+        if isinstance(model_admin, ExportMixin):
+            fields = model_admin.get_export_fields()
+        else:
+            fields = [field.attname for field in model._meta.concrete_fields]
+        queryset = model._default_manager.order_by('pk')
+
+        started = time.perf_counter()
+        rows = export_rows(queryset, fields, options['format'], options['chunk_size'])
+        if options['output'] == '-':
+            for chunk in rows:
+                self.stdout.write(chunk, ending='')
+            return
+        try:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as handle:
+                for chunk in rows:
+                    handle.write(chunk)
+        except OSError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+        self.stderr.write(f"Exported {model._meta.label} to {options['output']} in {elapsed:.1f}s.")
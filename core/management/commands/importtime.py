@@ -0,0 +1,70 @@
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What passenger_wsgi does when Passenger starts a worker. Pillow and NumPy are kept out of
+# it: the models import Pillow in their resize methods, and marketplace.signals imports
+# matching and alerts (NumPy) in its receivers.
+STARTUP = '''
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+'''
+WARM_UP = '''
+from core.warmup import warm_up
+warm_up()
+'''
+
+
+def parse_importtime(stderr):
+    """(module, self us, cumulative us, depth) for each line of a ``-X importtime`` report"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+class Command(BaseCommand):
+    help = "Profile the imports of a cold web worker with python -X importtime"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help="Rows to show in each table")
+        parser.add_argument('--no-warm-up', action='store_true', help="Stop after loading the application")
+
+    def handle(self, *args, **options):
+        code = STARTUP if options['no_warm_up'] else STARTUP + WARM_UP
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE)},
+        )
+        elapsed = time.perf_counter() - started
+        if result.returncode:
+            raise CommandError(f"Starting the application failed:\n{result.stderr[-2000:]}")
+
+        rows = parse_importtime(result.stderr)
+        limit = options['limit']
+        self.stdout.write(f"Cold start: {elapsed * 1000:.0f} ms wall, {sum(row[1] for row in rows) / 1000:.0f} ms importing "
+                          f"{len(rows)} modules")
+
+        self.stdout.write(f"\n{'package':<40} {'ms':>8}")
+        packages = Counter()
+        for name, self_us, _, _ in rows:
+            packages[name.split('.')[0]] += self_us
+        for package, total_us in packages.most_common(limit):
+            self.stdout.write(f"{package:<40} {total_us / 1000:>8.1f}")
+
+        # Imports triggered directly by the startup code, with everything they pulled in
+        self.stdout.write(f"\n{'first imported by startup':<60} {'ms':>8}")
+        top_level = sorted((row for row in rows if row[3] == 0), key=lambda row: row[2], reverse=True)
+        for name, _, cumulative_us, _ in top_level[:limit]:
+            self.stdout.write(f"{name:<60} {cumulative_us / 1000:>8.1f}")
@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.jobs import job_stats
+
+
+class Command(BaseCommand):
+    help = "Show per-task job counts and timing metrics"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24, help="Only include jobs created in the last N hours (0 for all)")
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(hours=options['hours']) if options['hours'] else None
+        rows = job_stats(since)
+        if not rows:
+            self.stdout.write("No jobs.")
+            return
+        self.stdout.write(f"{'task':<45} {'total':>6} {'done':>6} {'failed':>6} {'pending':>7} {'avg ms':>8} {'max ms':>8} {'wait ms':>8}")
+        for row in rows:
+            self.stdout.write(
+                f"{row['name']:<45} {row['total']:>6} {row['done']:>6} {row['failed']:>6} {row['pending']:>7} "
+                f"{row['avg_duration_ms'] or 0:>8.0f} {row['max_duration_ms'] or 0:>8} {row['avg_wait_ms'] or 0:>8.0f}"
+            )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.urls import get_resolver
+
+from core.pagecache import page_cache_stats, reset_page_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Show anonymous page cache hits, misses and bypasses per view"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Zero the counters after printing them")
+
+    def handle(self, *args, **options):
+        # Importing the URLconf registers every cached view
+        get_resolver().url_patterns
+        rows = page_cache_stats()
+        self.stdout.write(f"{'view':<40} {'hits':>8} {'misses':>8} {'bypass':>8} {'hit rate':>9}")
+        for row in rows:
+            hit_rate = f"{row['hit_rate']:.1%}" if row['hit_rate'] is not None else '-'
+            self.stdout.write(
+                f"{row['view']:<40} {row['hit']:>8} {row['miss']:>8} {row['bypass']:>8} {hit_rate:>9}"
+            )
+        if options['reset']:
+            reset_page_cache_stats()
+            self.stdout.write("Counters reset.")
@@ -0,0 +1,73 @@
+import multiprocessing
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.jobs import default_worker_id, ensure_periodic_jobs, work
+
+
+def worker_main(index, stop_event, options):
+    import django
+    django.setup()
+    # Parent's SIGINT/SIGTERM handling sets stop_event; children just finish the current job
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    work(
+        worker_id=f'{default_worker_id()}/{index}',
+        batch_size=options['batch_size'],
+        poll_interval=options['interval'],
+        burst=options['burst'],
+        stop_event=stop_event,
+    )
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Run background jobs with a pool of worker processes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2, help="Number of worker processes (0 runs in this process)")
+        parser.add_argument('--batch-size', type=int, default=1, help="Jobs claimed per worker per poll")
+        parser.add_argument('--interval', type=float, default=1.0, help="Seconds between polls when the queue is empty")
+        parser.add_argument('--burst', action='store_true', help="Exit once no due jobs remain (for cron)")
+
+    def handle(self, *args, **options):
+        ensure_periodic_jobs()
+
+        if options['processes'] <= 0:
+            processed = work(batch_size=options['batch_size'], poll_interval=options['interval'], burst=options['burst'])
+            self.stdout.write(f"Processed {processed} jobs.")
+            return
+
+        # Forked children must not share the parent's database socket
+        connections.close_all()
+        context = multiprocessing.get_context()
+        stop_event = context.Event()
+
+        def request_stop(signum, frame):
+            stop_event.set()
+
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGTERM, request_stop)
+
+        def spawn(index):
+            process = context.Process(target=worker_main, args=(index, stop_event, options), daemon=True)
+            process.start()
+            return process
+
+        pool = {index: spawn(index) for index in range(options['processes'])}
+        self.stdout.write(f"Started {len(pool)} workers.")
+        while pool:
+            time.sleep(0.5)
+            for index, process in list(pool.items()):
+                if process.is_alive():
+                    continue
+                process.join()
+                if options['burst'] or stop_event.is_set():
+                    del pool[index]
+                else:
+                    self.stderr.write(f"Worker {index} exited with code {process.exitcode}; restarting.")
+                    pool[index] = spawn(index)
+        self.stdout.write("All workers stopped.")
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.mail import OutboxDeliveryBackend, deliver_queued
+
+
+class Command(BaseCommand):
+    help = "Deliver queued outbox emails in batches over one SMTP connection"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help="Messages per batch (default: OUTBOX_BATCH_SIZE)")
+        parser.add_argument('--loop', action='store_true', help="Keep polling the queue instead of exiting when it is empty")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds to sleep between polls in --loop mode")
+
+    def handle(self, *args, **options):
+        backend = OutboxDeliveryBackend(fail_silently=False)
+        total_sent = total_failed = 0
+        try:
+            while True:
+                sent, failed = deliver_queued(options['batch_size'], connection=backend)
+                total_sent += sent
+                total_failed += failed
+                if sent or failed:
+                    continue
+                if not options['loop']:
+                    break
+                # Don't hold an idle SMTP session open between polls
+                backend.reset()
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            backend.reset()
+        self.stdout.write(f"Sent {total_sent} emails, {total_failed} failed attempts.")
@@ -0,0 +1,117 @@
+from django.db import models
+from django.utils import timezone
+
+
+class ChangedFieldsMixin:
+    """Remembers the stored values of a model instance, to tell which fields a save changes"""
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._stored_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, update_fields=None, **kwargs):
+        super().save(*args, update_fields=update_fields, **kwargs)
+        stored = getattr(self, '_stored_values', {})
+        deferred = self.get_deferred_fields()
+        for field in self._meta.concrete_fields:
+            if field.attname not in deferred and (update_fields is None or field.name in update_fields):
+                stored[field.attname] = self._field_value(field)
+        self._stored_values = stored
+
+    def _field_value(self, field):
+        value = getattr(self, field.attname)
+        # Field files change in place, so compare by name
+        return value.name if isinstance(field, models.FileField) else value
+
+    def stored_value(self, name, default=None):
+        """The field's value as last loaded or saved (still the old one in ``post_save``)"""
+        return getattr(self, '_stored_values', {}).get(self._meta.get_field(name).attname, default)
+
+    def changed_fields(self, names, update_fields=None):
+        """The fields among ``names`` that a save with ``update_fields`` would write with a new value"""
+        if update_fields is not None:
+            names = [name for name in names if name in update_fields]
+        stored = getattr(self, '_stored_values', None)
+        if stored is None:
+            return list(names)
+        changed = []
+        for name in names:
+            field = self._meta.get_field(name)
+            if field.attname in stored:
+                if self._field_value(field) != stored[field.attname]:
+                    changed.append(name)
+            elif field.attname in self.__dict__:
+                # Deferred when loaded, then set
+                changed.append(name)
+        return changed
+
+
+class OutboundEmail(models.Model):
+    """Queued outgoing email, delivered in batches by the outbox worker"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField(default=list)
+    subject = models.CharField(max_length=255, blank=True)
+    message = models.BinaryField(help_text="Fully rendered MIME message")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} → {', '.join(self.recipients)} ({self.get_status_display()})"
+
+
+class Job(models.Model):
+    """Background job picked up by the `run_workers` process pool"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=200, help_text="Registered task name")
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    priority = models.IntegerField(default=0, help_text="Higher runs first")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now, help_text="Not picked up before this time")
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_until = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+
+    # Timing metrics
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    wait_ms = models.PositiveIntegerField(blank=True, null=True, help_text="Time from run_at until a worker started it")
+    duration_ms = models.PositiveIntegerField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-priority', 'run_at']
+        indexes = [
+            models.Index(fields=['status', 'priority', 'run_at']),
+            models.Index(fields=['name', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.get_status_display()})"
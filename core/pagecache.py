@@ -0,0 +1,166 @@
+"""
+Full-page cache for anonymous visitors.
+
+``cache_anonymous_page`` stores a view's rendered response in the shared
+cache, keyed by the path, the normalized query string (sorted, blank and
+tracking parameters dropped) and the current value of each of the view's
+tags. Tags are ``core.conditional`` clocks, which model signals move when a
+dealer, a price or the taxonomy changes. Moving a tag changes every key
+built from it, so stale pages are never served again and simply expire.
+
+Logged-in users, non-GET requests and responses that set cookies (or embed
+a CSRF token) bypass the cache. Hits, misses and bypasses are counted per
+view in process memory and added to the cache every
+``PAGE_CACHE_STATS_FLUSH_SECONDS`` (a minute), so a hit costs no cache
+write; see ``manage.py page_cache_stats``.
+"""
+import hashlib
+import threading
+import time
+from collections import Counter
+from functools import wraps
+from urllib.parse import urlencode
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from .conditional import aresolve_user, clock_values
+
+PAGE_PREFIX = 'page:'
+STATS_PREFIX = 'pagecache:stats:'
+OUTCOMES = ('hit', 'miss', 'bypass')
+IGNORED_PARAMS = {'fbclid', 'gclid', 'msclkid', 'ref'}
+
+cached_views = []
+
+_pending = Counter()
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def page_cache_setting(name, default):
+    return getattr(settings, f'PAGE_CACHE_{name}', default)
+
+
+def normalized_query(request):
+    """The query string with parameters sorted and blank or tracking ones dropped"""
+    params = sorted(
+        (key, value.strip())
+        for key, values in request.GET.lists()
+        if key not in IGNORED_PARAMS and not key.startswith('utm_')
+        for value in values
+        if value.strip()
+    )
+    return urlencode(params)
+
+
+def page_key(request, versions):
+    parts = [request.path, normalized_query(request)]
+    parts += [f'{name}={versions[name].isoformat()}' for name in sorted(versions)]
+    return PAGE_PREFIX + hashlib.md5('|'.join(parts).encode(), usedforsecurity=False).hexdigest()
+
+
+def record(view_name, outcome):
+    """Count a lookup outcome; the counts reach the cache with the next flush"""
+    with _pending_lock:
+        _pending[f'{STATS_PREFIX}{view_name}:{outcome}'] += 1
+        due = time.monotonic() - _last_flush >= page_cache_setting('STATS_FLUSH_SECONDS', 60)
+    if due:
+        flush_page_cache_stats()
+
+
+def flush_page_cache_stats():
+    """Add this process's counts since the last flush to the shared counters"""
+    global _last_flush
+    with _pending_lock:
+        pending = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+    for key, value in pending.items():
+        if not cache.add(key, value, None):
+            try:
+                cache.incr(key, value)
+            except ValueError:
+                pass
+
+
+def page_cache_stats():
+    """Per-view hit/miss/bypass counts since the last reset"""
+    flush_page_cache_stats()
+    rows = []
+    for view_name in cached_views:
+        counts = cache.get_many([f'{STATS_PREFIX}{view_name}:{outcome}' for outcome in OUTCOMES])
+        row = {'view': view_name}
+        row.update({outcome: counts.get(f'{STATS_PREFIX}{view_name}:{outcome}', 0) for outcome in OUTCOMES})
+        looked_up = row['hit'] + row['miss']
+        row['hit_rate'] = row['hit'] / looked_up if looked_up else None
+        rows.append(row)
+    return rows
+
+
+def reset_page_cache_stats():
+    with _pending_lock:
+        _pending.clear()
+    cache.delete_many([f'{STATS_PREFIX}{view_name}:{outcome}' for view_name in cached_views for outcome in OUTCOMES])
+
+
+def cache_anonymous_page(tags=None, timeout=None):
+    """
+    Serve anonymous GET/HEAD requests from the cache.
+
+    ``tags(request, *args, **kwargs)`` returns the clock names the page is
+    built from; ``timeout`` defaults to ``PAGE_CACHE_TIMEOUT`` (10 minutes).
+    """
+    def decorator(view):
+        view_name = f'{view.__module__}.{view.__name__}'
+        if view_name not in cached_views:
+            cached_views.append(view_name)
+
+        def lookup(request, *args, **kwargs):
+            """The page's key and cached response; no key when the request bypasses the cache"""
+            if request.method not in ('GET', 'HEAD') or request.user.is_authenticated:
+                record(view_name, 'bypass')
+                return None, None
+            versions = clock_values(*tags(request, *args, **kwargs)) if tags else {}
+            if versions:
+                # core.db.read_only_view reads from default while these are newer than a replica may be
+                request._changed_at = max(versions.values())
+            key = page_key(request, versions)
+            response = cache.get(key)
+            record(view_name, 'miss' if response is None else 'hit')
+            return key, response
+
+        def store(request, key, response, csrf_used):
+            # A page embedding a CSRF token belongs to one visitor
+            embeds_token = not csrf_used and request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+            if response.status_code == 200 and not response.streaming and not response.cookies and not embeds_token:
+                cache.set(key, response, timeout or page_cache_setting('TIMEOUT', 600))
+
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                await aresolve_user(request)
+                # The cache backend is synchronous (a file or SQLite on shared hosting)
+                key, response = await sync_to_async(lookup)(request, *args, **kwargs)
+                if key is None:
+                    return await view(request, *args, **kwargs)
+                if response is None:
+                    csrf_used = request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+                    response = await view(request, *args, **kwargs)
+                    await sync_to_async(store)(request, key, response, csrf_used)
+                return response
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key, response = lookup(request, *args, **kwargs)
+            if key is None:
+                return view(request, *args, **kwargs)
+            if response is None:
+                csrf_used = request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+                response = view(request, *args, **kwargs)
+                store(request, key, response, csrf_used)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,60 @@
+"""
+Paginator for very large, append-only tables.
+
+An exact ``COUNT(*)`` over an unfiltered table scans the whole table (or an
+index) on every changelist page. ``EstimatedCountPaginator`` asks the
+database's table statistics instead when nothing is filtered and the table
+is big enough for the difference to matter. Filtered querysets and small
+tables still get an exact count.
+"""
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections, transaction
+from django.utils.functional import cached_property
+
+ESTIMATE_THRESHOLD = 100000
+
+ESTIMATE_SQL = {
+    'postgresql': "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+    'mysql': (
+        "SELECT table_rows FROM information_schema.tables "
+        "WHERE table_schema = DATABASE() AND table_name = %s"
+    ),
+    # Filled in by ANALYZE; the first number of any row is the table's row count
+    'sqlite': "SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1",
+}
+
+
+def estimated_count(model, using='default'):
+    """Row count of ``model``'s table from database statistics, or None if unavailable"""
+    connection = connections[using]
+    sql = ESTIMATE_SQL.get(connection.vendor)
+    if sql is None:
+        return None
+    try:
+        # A savepoint, so a missing statistics table doesn't break an open transaction
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute(sql, [model._meta.db_table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if not row or row[0] is None:
+        return None
+    try:
+        estimate = int(str(row[0]).split()[0])
+    except ValueError:
+        return None
+    return estimate if estimate >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    threshold = ESTIMATE_THRESHOLD
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if query is not None and not query.where and not query.distinct and not query.combinator:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= self.threshold:
+                return estimate
+        return super().count
@@ -0,0 +1,70 @@
+"""
+Cached database sessions that write behind the cache.
+
+Like Django's ``cached_db`` engine, sessions are read from the cache and
+fall back to ``django_session``. With ``SESSION_SAVE_EVERY_REQUEST`` every
+request also pushes the expiry forward; when that is the only change, the
+new expiry goes to the cache alone and reaches the database at most every
+``SESSION_DB_WRITE_INTERVAL`` seconds (5 minutes). A session evicted from
+the cache therefore loses at most that much of its idle lifetime. The row's
+``expire_date`` is padded by the same interval, so ``clear_expired()`` never
+deletes a row whose cached session is still live. Any change to the session
+data is written through at once.
+
+``clear_expired()`` deletes expired rows in bounded batches; it backs
+``manage.py clearsessions`` and the ``core.tasks.clear_expired_sessions``
+periodic job.
+
+    SESSION_ENGINE = 'core.sessions'
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+
+PERSISTED_KEY = '_session_persisted_at'
+
+
+def session_setting(name, default):
+    return getattr(settings, f'SESSION_{name}', default)
+
+
+class SessionStore(CachedDBStore):
+    cache_key_prefix = 'core.sessions:'
+
+    def save(self, must_create=False):
+        persisted_at = self._session.get(PERSISTED_KEY, 0)
+        if must_create or self.modified or time.time() - persisted_at >= session_setting('DB_WRITE_INTERVAL', 300):
+            self._session[PERSISTED_KEY] = int(time.time())
+            super().save(must_create)
+        else:
+            self._cache.set(self.cache_key, self._session, self.get_expiry_age())
+
+    def create_model_instance(self, data):
+        obj = super().create_model_instance(data)
+        # The row outlives the cached copy, whose expiry runs up to one interval ahead
+        obj.expire_date += timedelta(seconds=session_setting('DB_WRITE_INTERVAL', 300))
+        return obj
+
+    @classmethod
+    def clear_expired(cls):
+        clear_expired()
+
+
+def clear_expired(batch_size=None, max_batches=None):
+    """Delete expired sessions ``batch_size`` rows per statement; return how many went"""
+    batch_size = batch_size or session_setting('CLEAR_BATCH_SIZE', 1000)
+    now = timezone.now()
+    deleted = batches = 0
+    while max_batches is None or batches < max_batches:
+        keys = list(Session.objects.filter(expire_date__lt=now).values_list('pk', flat=True)[:batch_size])
+        if not keys:
+            break
+        deleted += Session.objects.filter(pk__in=keys).delete()[0]
+        batches += 1
+        if len(keys) < batch_size:
+            break
+    return deleted
@@ -0,0 +1,191 @@
+"""
+Cache backend shared by the processes of one host through a SQLite file.
+
+``FileBasedCache`` opens and unpickles a file per read and lists and stats
+the whole directory whenever it culls. Here every entry is a row in one
+WAL-mode database: reads are an indexed lookup that never blocks on
+writers, and each Passenger process keeps its own connection.
+
+Integers are stored as SQL integers so ``incr()`` is a single atomic
+``UPDATE`` across processes; everything else is pickled. Once the table
+holds ``MAX_ENTRIES`` rows, the next write first drops expired rows, then
+the least recently read ``1 / CULL_FREQUENCY`` of the rest. Read times are
+only written back when older than ``ACCESS_RESOLUTION`` seconds, so hot
+keys don't turn every ``get()`` into a write.
+
+    CACHES = {'default': {
+        'BACKEND': 'core.sqlite_cache.SQLiteCache',
+        'LOCATION': BASE_DIR / 'cache.sqlite3',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }}
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entry (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cache_entry_accessed ON cache_entry (accessed);
+CREATE INDEX IF NOT EXISTS cache_entry_expires ON cache_entry (expires);
+"""
+LIVE = '(expires IS NULL OR expires > ?)'
+
+
+def encode(value):
+    # bool is an int subclass but must come back as a bool
+    if type(value) is int and -2 ** 63 <= value < 2 ** 63:
+        return value
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def decode(value):
+    return value if isinstance(value, int) else pickle.loads(value)
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.path = str(location)
+        self.access_resolution = options.get('ACCESS_RESOLUTION', 60)
+        self.busy_timeout = options.get('BUSY_TIMEOUT', 5)
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        local = self._local
+        # A forked worker must not share its parent's connection
+        if getattr(local, 'pid', None) != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            # Losing the last writes in a power cut is fine for a cache
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript(SCHEMA)
+            local.connection, local.pid = connection, os.getpid()
+        return local.connection
+
+    def write(self, statements):
+        """Run ``[(sql, params)]`` in one write transaction and return the last one's rows"""
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            for sql, params in statements:
+                rows = connection.execute(sql, params).fetchall()
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return rows
+
+    def expiry(self, timeout):
+        return self.get_backend_timeout(timeout)
+
+    def cull_statements(self, now):
+        """Make room before a write once the table holds ``MAX_ENTRIES`` rows"""
+        full = '(SELECT COUNT(*) FROM cache_entry) >= ?'
+        return [
+            (f'DELETE FROM cache_entry WHERE expires <= ? AND {full}', [now, self._max_entries]),
+            (f"""DELETE FROM cache_entry WHERE {full} AND key IN (
+                SELECT key FROM cache_entry ORDER BY accessed
+                LIMIT max(1, (SELECT COUNT(*) FROM cache_entry) / ?))""",
+             [self._max_entries, self._cull_frequency]),
+        ]
+
+    def get_many(self, keys, version=None):
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if not key_map:
+            return {}
+        now = time.time()
+        placeholders = ', '.join('?' * len(key_map))
+        rows = self.connection.execute(
+            f'SELECT key, value, accessed FROM cache_entry WHERE key IN ({placeholders}) AND {LIVE}',
+            [*key_map, now],
+        ).fetchall()
+        stale = [key for key, _, accessed in rows if accessed < now - self.access_resolution]
+        if stale:
+            self.connection.execute(
+                f"UPDATE cache_entry SET accessed = ? WHERE key IN ({', '.join('?' * len(stale))})", [now, *stale],
+            )
+        return {key_map[key]: decode(value) for key, value, _ in rows}
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if not data:
+            return []
+        expires, now = self.expiry(timeout), time.time()
+        rows = [(self.make_and_validate_key(key, version=version), encode(value), expires, now) for key, value in data.items()]
+        self.write(self.cull_statements(now) + [
+            ('INSERT OR REPLACE INTO cache_entry (key, value, expires, accessed) VALUES (?, ?, ?, ?)', row) for row in rows
+        ])
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        expires, now = self.expiry(timeout), time.time()
+        rows = self.write(self.cull_statements(now) + [
+            (f'DELETE FROM cache_entry WHERE key = ? AND NOT {LIVE}', [key, now]),
+            ('INSERT OR IGNORE INTO cache_entry (key, value, expires, accessed) VALUES (?, ?, ?, ?)',
+             [key, encode(value), expires, now]),
+            ('SELECT changes()', []),
+        ])
+        return rows[0][0] == 1
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self.connection.execute(
+            f'UPDATE cache_entry SET expires = ? WHERE key = ? AND {LIVE}', [self.expiry(timeout), key, time.time()],
+        )
+        return cursor.rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        cache_key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        rows = self.write([
+            (f"UPDATE cache_entry SET value = value + ? WHERE key = ? AND typeof(value) = 'integer' AND {LIVE}",
+             [delta, cache_key, now]),
+            (f'SELECT value FROM cache_entry WHERE key = ? AND {LIVE}', [cache_key, now]),
+        ])
+        if not rows:
+            raise ValueError("Key '%s' not found" % key)
+        if not isinstance(rows[0][0], int):
+            raise TypeError("Key '%s' does not hold an integer" % key)
+        return rows[0][0]
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self.connection.execute('DELETE FROM cache_entry WHERE key = ?', [key]).rowcount == 1
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        if keys:
+            self.connection.execute(f"DELETE FROM cache_entry WHERE key IN ({', '.join('?' * len(keys))})", keys)
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self.connection.execute(
+            f'SELECT 1 FROM cache_entry WHERE key = ? AND {LIVE}', [key, time.time()],
+        ).fetchone() is not None
+
+    def clear(self):
+        self.connection.execute('DELETE FROM cache_entry')
+
+    def close(self, **kwargs):
+        # Connections are kept for the life of the process
+        pass
@@ -0,0 +1,20 @@
+from .jobs import job
+from .mail import OutboxDeliveryBackend, deliver_queued
+from .sessions import clear_expired
+
+
+@job(priority=10, max_attempts=1, timeout=300)
+def deliver_outbox():
+    """Drain the outbox email queue over one SMTP connection"""
+    backend = OutboxDeliveryBackend(fail_silently=False)
+    try:
+        while any(deliver_queued(connection=backend)):
+            pass
+    finally:
+        backend.reset()
+
+
+@job(max_attempts=1, timeout=600)
+def clear_expired_sessions():
+    """Delete expired sessions in bounded batches"""
+    clear_expired()
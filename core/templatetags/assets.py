@@ -0,0 +1,14 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from core.assets import CDN_URL, STYLESHEET, tailwind_setting
+
+register = template.Library()
+
+
+@register.simple_tag
+def tailwind_stylesheet():
+    if tailwind_setting('CDN', False):
+        return format_html('<script src="{}"></script>', CDN_URL)
+    return format_html('<link rel="stylesheet" href="{}">', static(STYLESHEET))
@@ -0,0 +1,758 @@
+import csv
+import gzip
+import io
+import json
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+import brotli
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.models import Session
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import connection, connections, router, transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.template import Context, Template, engines
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .compression import STATS_PREFIX, UNRESOLVED, CompressionMiddleware, compression_stats, flush_compression_stats, negotiate, reset_compression_stats
+from .conditional import CLOCK_PREFIX, move_clocks, touch_clocks
+from .db import PIN_COOKIE, PinAfterWriteMiddleware, read_only_view
+from .pagecache import (
+    STATS_PREFIX as PAGE_STATS_PREFIX, cache_anonymous_page, flush_page_cache_stats, page_cache_stats,
+    reset_page_cache_stats,
+)
+from .exports import export_rows, streaming_export
+from .pagination import EstimatedCountPaginator, estimated_count
+from .management.commands.importtime import STARTUP, parse_importtime
+from .jobs import check_leases, claim_jobs, due_jobs, ensure_periodic_jobs, job, job_stats, work
+from .mail import OutboxDeliveryBackend, deliver_queued
+from .sessions import PERSISTED_KEY, SessionStore, clear_expired
+from .sqlite_cache import SQLiteCache
+from .warmup import project_templates, warm_up
+from accounts.models import ScrapCategory
+from .models import OutboundEmail, Job
+
+User = get_user_model()
+
+
+class StubSMTPServer(socketserver.ThreadingTCPServer):
+    """Minimal local SMTP server recording connections and delivered messages"""
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, reject=()):
+        self.connections = 0
+        self.messages = []
+        self.reject = set(reject)
+        super().__init__(('127.0.0.1', 0), StubSMTPHandler)
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+
+class StubSMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.reply('220 stub ESMTP')
+        sender, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip()
+            verb = command[:4].upper()
+            if verb in ('EHLO', 'HELO'):
+                self.reply('250 stub')
+            elif verb == 'MAIL':
+                sender, recipients = command.split(':', 1)[1].strip(' <>'), []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                address = command.split(':', 1)[1].strip(' <>')
+                if address in server.reject:
+                    self.reply('550 No such user')
+                else:
+                    recipients.append(address)
+                    self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if chunk in (b'.\r\n', b''):
+                        break
+                    data.append(chunk)
+                server.messages.append((sender, recipients, b''.join(data)))
+                self.reply('250 Queued')
+            elif verb == 'RSET':
+                sender, recipients = None, []
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class OutboxTestMixin:
+    def setUp(self):
+        self.smtp = StubSMTPServer(reject={'nobody@example.com'})
+        thread = threading.Thread(target=self.smtp.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.smtp.server_close)
+        self.addCleanup(self.smtp.shutdown)
+        settings_override = override_settings(
+            EMAIL_BACKEND='core.mail.OutboxEmailBackend',
+            EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=self.smtp.port,
+            EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER='',
+            EMAIL_HOST_PASSWORD='',
+            OUTBOX_RETRY_BACKOFF=60,
+            OUTBOX_MAX_ATTEMPTS=2,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class OutboxEmailBackendTests(OutboxTestMixin, TestCase):
+    def test_send_mail_only_enqueues(self):
+        sent = mail.send_mail('Verify your email', 'Hello', 'noreply@akrionline.com', ['user@example.com'])
+        self.assertEqual(sent, 1)
+        self.assertEqual(self.smtp.connections, 0)
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.status, 'queued')
+        self.assertEqual(email.recipients, ['user@example.com'])
+        self.assertIn(b'Subject: Verify your email', bytes(email.message))
+
+    def test_batch_is_sent_over_one_connection(self):
+        messages = [
+            mail.EmailMessage(f'Message {i}', 'Body', 'noreply@akrionline.com', [f'user{i}@example.com'])
+            for i in range(5)
+        ]
+        mail.get_connection().send_messages(messages)
+
+        sent, failed = deliver_queued(batch_size=10)
+
+        self.assertEqual((sent, failed), (5, 0))
+        self.assertEqual(self.smtp.connections, 1)
+        self.assertEqual(len(self.smtp.messages), 5)
+        self.assertFalse(OutboundEmail.objects.exclude(status='sent').exists())
+
+    def test_connection_is_reused_across_batches(self):
+        for i in range(4):
+            mail.send_mail(f'Message {i}', 'Body', 'noreply@akrionline.com', [f'user{i}@example.com'])
+        backend = OutboxDeliveryBackend(fail_silently=False)
+        self.addCleanup(backend.reset)
+
+        self.assertEqual(deliver_queued(batch_size=2, connection=backend), (2, 0))
+        self.assertEqual(deliver_queued(batch_size=2, connection=backend), (2, 0))
+
+        self.assertEqual(self.smtp.connections, 1)
+
+    def test_failed_message_is_retried_with_backoff_then_given_up(self):
+        mail.send_mail('Bounce', 'Body', 'noreply@akrionline.com', ['nobody@example.com'])
+        mail.send_mail('Fine', 'Body', 'noreply@akrionline.com', ['user@example.com'])
+
+        with self.assertLogs('core.mail', 'WARNING'):
+            self.assertEqual(deliver_queued(), (1, 1))
+        bounced = OutboundEmail.objects.get(subject='Bounce')
+        self.assertEqual(bounced.status, 'queued')
+        self.assertEqual(bounced.attempts, 1)
+        self.assertGreater(bounced.next_attempt_at, timezone.now() + timedelta(seconds=30))
+        self.assertIn('SMTPRecipientsRefused', bounced.last_error)
+
+        # Not due yet
+        self.assertEqual(deliver_queued(), (0, 0))
+
+        OutboundEmail.objects.filter(pk=bounced.pk).update(next_attempt_at=timezone.now())
+        with self.assertLogs('core.mail', 'WARNING'):
+            self.assertEqual(deliver_queued(), (0, 1))
+        bounced.refresh_from_db()
+        self.assertEqual(bounced.status, 'failed')
+
+    def test_expired_lease_is_reclaimed(self):
+        mail.send_mail('Stuck', 'Body', 'noreply@akrionline.com', ['user@example.com'])
+        OutboundEmail.objects.update(status='sending', next_attempt_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(deliver_queued(), (1, 0))
+
+
+calls = []
+
+
+@job(name='tests.record', priority=1, max_attempts=2)
+def record(value):
+    calls.append(value)
+
+
+@job(name='tests.slow', timeout=120)
+def slow():
+    calls.append('slow')
+
+
+@job(name='tests.explode', max_attempts=2)
+def explode():
+    raise RuntimeError('boom')
+
+
+@override_settings(JOBS_RUN_INLINE=False, JOBS_RETRY_BACKOFF=60, JOBS_PERIODIC={})
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_inline_mode_runs_immediately(self):
+        with self.settings(JOBS_RUN_INLINE=True):
+            self.assertIsNone(record.enqueue('now'))
+        self.assertEqual(calls, ['now'])
+        self.assertFalse(Job.objects.exists())
+
+    def test_jobs_run_by_priority_and_record_timing(self):
+        record.enqueue('low', priority=0)
+        record.enqueue('high', priority=9)
+
+        self.assertEqual(work(burst=True), 2)
+
+        self.assertEqual(calls, ['high', 'low'])
+        for row in Job.objects.all():
+            self.assertEqual(row.status, 'done')
+            self.assertEqual(row.attempts, 1)
+            self.assertIsNotNone(row.duration_ms)
+            self.assertIsNotNone(row.wait_ms)
+
+    def test_scheduled_job_waits_until_due(self):
+        row = record.enqueue('later', delay=3600)
+
+        self.assertEqual(work(burst=True), 0)
+        Job.objects.filter(pk=row.pk).update(run_at=timezone.now())
+        self.assertEqual(work(burst=True), 1)
+        self.assertEqual(calls, ['later'])
+
+    def test_failed_job_is_retried_then_marked_failed(self):
+        row = explode.enqueue()
+        Job.objects.filter(pk=row.pk).update(run_at=timezone.now() - timedelta(seconds=5))
+
+        with self.assertLogs('core.jobs', 'WARNING'):
+            work(burst=True)
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), ('queued', 1))
+        self.assertGreater(row.run_at, timezone.now())
+        self.assertGreaterEqual(row.wait_ms, 5000)
+        self.assertIn('RuntimeError: boom', row.last_error)
+
+        Job.objects.filter(pk=row.pk).update(run_at=timezone.now())
+        with self.assertLogs('core.jobs', 'WARNING'):
+            work(burst=True)
+        row.refresh_from_db()
+        self.assertEqual(row.status, 'failed')
+
+    def test_claimed_job_is_not_claimed_twice(self):
+        record.enqueue('once')
+
+        self.assertEqual(len(claim_jobs('worker-a', 5)), 1)
+        self.assertEqual(claim_jobs('worker-b', 5), [])
+
+    def test_tasks_with_a_longer_timeout_are_leased_for_it(self):
+        with self.settings(JOBS_LEASE_SECONDS=60, JOBS_LEASE_MARGIN=30):
+            slow.enqueue()
+            record.enqueue('quick')
+            claimed = {row.name: row for row in claim_jobs('worker-a', 5)}
+            now = timezone.now()
+
+            self.assertGreater(claimed['tests.slow'].locked_until, now + timedelta(seconds=140))
+            self.assertLess(claimed['tests.record'].locked_until, now + timedelta(seconds=61))
+            # The quick job's lease has run out, the slow one's hasn't
+            self.assertEqual(list(due_jobs(now + timedelta(seconds=90)).values_list('name', flat=True)), ['tests.record'])
+
+    def test_workers_that_cannot_enforce_time_limits_refuse_long_tasks(self):
+        def check_in_thread():
+            errors = []
+
+            def check():
+                try:
+                    check_leases()
+                except ImproperlyConfigured as exc:
+                    errors.append(exc)
+            # Time limits are a SIGALRM, which only the main thread gets
+            thread = threading.Thread(target=check)
+            thread.start()
+            thread.join()
+            return errors
+
+        with self.settings(JOBS_LEASE_SECONDS=60):
+            [error] = check_in_thread()
+        self.assertIn('tests.slow', str(error))
+        with self.settings(JOBS_LEASE_SECONDS=3600):
+            self.assertEqual(check_in_thread(), [])
+
+    def test_periodic_job_reschedules_itself(self):
+        with self.settings(JOBS_PERIODIC={'tests.record': 300}):
+            ensure_periodic_jobs()
+            ensure_periodic_jobs()
+            self.assertEqual(Job.objects.count(), 1)
+            Job.objects.update(args=['tick'])
+            work(burst=True)
+
+        pending = Job.objects.get(status='queued')
+        self.assertGreater(pending.run_at, timezone.now() + timedelta(seconds=200))
+        self.assertEqual(job_stats()[0]['done'], 1)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        Job.objects.bulk_create([Job(name=f'task.{i}', args=[i]) for i in range(25)])
+        Job.objects.filter(name='task.0').update(name='=HYPERLINK("x")')
+        self.queryset = Job.objects.order_by('pk')
+        self.fields = ['id', 'name', 'priority', 'run_at']
+
+    def test_csv_is_streamed_in_chunks_of_rows(self):
+        with self.assertNumQueries(1):
+            chunks = list(export_rows(self.queryset, self.fields, chunk_size=10))
+
+        # Header, then one chunk per 10 rows
+        self.assertEqual(len(chunks), 4)
+        rows = list(csv.reader(io.StringIO(''.join(chunks))))
+        self.assertEqual(rows[0], self.fields)
+        self.assertEqual(len(rows), 26)
+        self.assertEqual(rows[1][1], '\'=HYPERLINK("x")')
+        self.assertEqual(rows[2][1], 'task.1')
+
+    def test_json_response_streams_a_valid_document(self):
+        response = streaming_export(self.queryset, self.fields, 'jobs', 'json')
+
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment; filename="jobs-', response['Content-Disposition'])
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(data), 25)
+        self.assertEqual(data[1]['name'], 'task.1')
+        self.assertEqual(set(data[0]), set(self.fields))
+
+    def test_export_command_writes_all_rows(self):
+        out = io.StringIO()
+        call_command('export_data', 'core.Job', '--format', 'json', '--chunk-size', '7', stdout=out)
+
+        self.assertEqual(len(json.loads(out.getvalue())), 25)
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    def setUp(self):
+        Job.objects.bulk_create([Job(name='task', args=[i]) for i in range(40)])
+
+    def test_unfiltered_count_comes_from_table_statistics(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        Job.objects.bulk_create([Job(name='late', args=[i]) for i in range(5)])
+        paginator = EstimatedCountPaginator(Job.objects.order_by('-pk'), 10)
+        paginator.threshold = 10
+
+        self.assertEqual(estimated_count(Job), 40)
+        self.assertEqual(paginator.count, 40)
+        self.assertEqual(paginator.num_pages, 4)
+
+        filtered = EstimatedCountPaginator(Job.objects.filter(name='late'), 10)
+        filtered.threshold = 10
+        self.assertEqual(filtered.count, 5)
+
+    def test_small_or_unanalyzed_tables_get_an_exact_count(self):
+        paginator = EstimatedCountPaginator(Job.objects.all(), 10)
+
+        self.assertEqual(paginator.count, 40)
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_page_cache_stats()
+        self.renders = []
+
+        @cache_anonymous_page(lambda request: ['test:listing'])
+        def view(request):
+            self.renders.append(request.get_full_path())
+            return HttpResponse(f'render {len(self.renders)}')
+        self.view = view
+        self.factory = RequestFactory()
+
+    def get(self, path, user=None):
+        request = self.factory.get(path)
+        request.user = user or AnonymousUser()
+        return self.view(request)
+
+    def test_equivalent_queries_share_a_page_until_a_tag_moves(self):
+        first = self.get('/dealers/?city=Pune&category=Metals')
+        again = self.get('/dealers/?category=Metals&utm_source=mail&city=Pune+&page=')
+
+        self.assertEqual(again.content, first.content)
+        self.assertEqual(len(self.renders), 1)
+        self.get('/dealers/?city=Delhi')
+        self.assertEqual(len(self.renders), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            touch_clocks('test:listing')
+        self.assertEqual(self.get('/dealers/?city=Pune&category=Metals').content, b'render 3')
+
+        stats = {row['view']: row for row in page_cache_stats()}
+        row = stats[f'{__name__}.view']
+        self.assertEqual((row['hit'], row['miss']), (1, 3))
+
+    def test_hits_do_not_write_to_the_cache_until_the_counts_are_flushed(self):
+        self.get('/dealers/')
+        flush_page_cache_stats()
+        with mock.patch.object(cache, 'add') as add, mock.patch.object(cache, 'incr') as incr:
+            for _ in range(3):
+                self.get('/dealers/')
+        self.assertFalse(add.called or incr.called)
+
+        with self.settings(PAGE_CACHE_STATS_FLUSH_SECONDS=0):
+            self.get('/dealers/')
+        self.assertEqual(cache.get(f'{PAGE_STATS_PREFIX}{__name__}.view:hit'), 4)
+
+    def test_logged_in_users_and_cookie_setting_pages_bypass_the_cache(self):
+        user = User(username='member')
+        self.get('/dealers/', user=user)
+        self.get('/dealers/', user=user)
+        self.assertEqual(len(self.renders), 2)
+
+        @cache_anonymous_page()
+        def csrf_view(request):
+            self.renders.append('csrf')
+            return HttpResponse(get_token(request))
+        for _ in range(2):
+            request = self.factory.get('/contact/')
+            request.user = AnonymousUser()
+            csrf_view(request)
+        self.assertEqual(self.renders.count('csrf'), 2)
+
+
+class SQLiteCacheTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = f'{directory.name}/cache.sqlite3'
+        self.cache = self.make_cache()
+
+    def make_cache(self, **options):
+        return SQLiteCache(self.location, {'OPTIONS': options})
+
+    def test_values_round_trip_and_expire(self):
+        self.cache.set('page', HttpResponse('cached'))
+        self.cache.set_many({'flag': True, 'count': 3})
+        self.cache.set('short', 'gone', 0.01)
+
+        self.assertEqual(self.cache.get('page').content, b'cached')
+        self.assertEqual(self.cache.get_many(['flag', 'count', 'missing']), {'flag': True, 'count': 3})
+        self.assertFalse(self.cache.add('count', 5))
+        time.sleep(0.02)
+        self.assertIsNone(self.cache.get('short'))
+        self.assertTrue(self.cache.add('short', 'again'))
+        self.assertTrue(self.cache.delete('short'))
+        self.assertFalse(self.cache.has_key('short'))
+
+    def test_incr_is_atomic_across_connections(self):
+        self.cache.set('hits', 0, None)
+
+        def hammer():
+            # Each thread (like each worker process) opens its own connection
+            cache = self.make_cache()
+            for _ in range(200):
+                cache.incr('hits')
+
+        threads = [threading.Thread(target=hammer) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.cache.get('hits'), 800)
+        self.assertRaises(ValueError, self.cache.incr, 'missing')
+        self.cache.set('flag', True)
+        self.assertRaises(TypeError, self.cache.incr, 'flag')
+
+    def test_least_recently_read_entries_are_culled(self):
+        cache = self.make_cache(MAX_ENTRIES=10, CULL_FREQUENCY=2, ACCESS_RESOLUTION=0)
+        cache.set('expired', 'old', 0.01)
+        for i in range(9):
+            cache.set(f'key:{i}', i)
+        time.sleep(0.02)
+        cache.get('key:0')
+
+        # Full: the expired row goes first, then the older half of what is left
+        cache.set('new', 'value')
+        cache.set('newer', 'value')
+
+        remaining = cache.get_many(['expired', 'new', 'newer'] + [f'key:{i}' for i in range(9)])
+        self.assertEqual(sorted(remaining), ['key:0', 'key:6', 'key:7', 'key:8', 'new', 'newer'])
+
+
+class SessionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.session = SessionStore()
+        self.session['_auth_user_id'] = '1'
+        self.session.create()
+
+    def test_expiry_refresh_is_written_behind_the_cache(self):
+        stored_expiry = Session.objects.get().expire_date
+        session = SessionStore(self.session.session_key)
+        self.assertEqual(session['_auth_user_id'], '1')
+        with self.assertNumQueries(0):
+            session.save()
+
+        session = SessionStore(self.session.session_key)
+        # As if the row was last written one interval ago
+        session._session[PERSISTED_KEY] -= 300
+        session.save()
+        self.assertGreater(Session.objects.get().expire_date, stored_expiry)
+
+        session = SessionStore(self.session.session_key)
+        session['cart'] = [3]
+        session.save()
+        cache.clear()
+        self.assertEqual(SessionStore(self.session.session_key)['cart'], [3])
+
+    @override_settings(SESSION_DB_WRITE_INTERVAL=300)
+    def test_row_outlives_the_cached_expiry_it_lags(self):
+        # Refreshed in the cache alone just before the interval is up
+        latest_cached_expiry = timezone.now() + timedelta(seconds=300 + self.session.get_expiry_age())
+
+        clear_expired()
+        self.assertGreaterEqual(Session.objects.get().expire_date, latest_cached_expiry - timedelta(seconds=5))
+
+    def test_expired_sessions_are_cleared_in_batches(self):
+        expired = timezone.now() - timedelta(minutes=1)
+        Session.objects.bulk_create([Session(session_key=f'expired{i}', session_data='', expire_date=expired) for i in range(5)])
+
+        self.assertEqual(clear_expired(batch_size=2, max_batches=1), 2)
+        with self.assertNumQueries(4):
+            self.assertEqual(clear_expired(batch_size=2), 3)
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), [self.session.session_key])
+
+
+class SQLiteTuningTests(SimpleTestCase):
+    def test_get_requests_read_from_the_read_only_alias(self):
+        view = read_only_view(lambda request: router.db_for_read(User))
+        factory = RequestFactory()
+
+        self.assertEqual(view(factory.get('/dealers/')), 'readonly')
+        self.assertEqual(view(factory.post('/dealers/')), 'default')
+        self.assertEqual(router.db_for_read(User), 'default')
+
+    def test_parallel_writers_are_not_locked_out(self):
+        # In a fresh process: the benchmark registers connections to its own files
+        result = subprocess.run(
+            [sys.executable, 'manage.py', 'bench_sqlite', '--workers', '4', '--writes', '25'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        )
+
+        mode, rate, committed, locked = result.stdout.splitlines()[-1].split()
+        self.assertEqual((mode, committed, locked), ('tuned', '100', '0'))
+
+
+@override_settings(DATABASE_READ_ONLY_ALIAS='replica')
+class ReplicaRoutingTests(TransactionTestCase):
+    @classmethod
+    def setUpClass(cls):
+        # A second SQLite file stands in for a MySQL replica that hasn't caught up.
+        # It is added here rather than in `databases`, which the runner would try to create.
+        cls.directory = tempfile.TemporaryDirectory()
+        connections.settings['replica'] = connections.configure_settings({
+            'default': connections.settings['default'],
+            'replica': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': f'{cls.directory.name}/replica.sqlite3'},
+        })['replica']
+        with connections['replica'].schema_editor() as editor:
+            editor.create_model(ScrapCategory)
+        ScrapCategory.objects.using('replica').create(name='Metals')
+        cls.databases = {'default', 'replica'}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        cls.directory.cleanup()
+
+    def setUp(self):
+        ScrapCategory.objects.create(name='Metals')
+        ScrapCategory.objects.create(name='Plastic')
+
+        @read_only_view
+        def categories(request):
+            return HttpResponse(','.join(ScrapCategory.objects.values_list('name', flat=True)))
+        self.view = PinAfterWriteMiddleware(categories)
+        self.factory = RequestFactory()
+
+    def test_reads_go_to_the_replica_until_the_client_writes(self):
+        self.assertEqual(self.view(self.factory.get('/')).content, b'Metals')
+
+        response = self.view(self.factory.post('/'))
+        self.assertEqual(response.content, b'Metals,Plastic')
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 15)
+
+        pinned = self.factory.get('/')
+        pinned.COOKIES[PIN_COOKIE] = '1'
+        self.assertEqual(self.view(pinned).content, b'Metals,Plastic')
+
+    def test_reads_inside_a_transaction_stay_on_the_primary(self):
+        with transaction.atomic():
+            self.assertEqual(self.view(self.factory.get('/')).content, b'Metals,Plastic')
+
+    def test_cached_pages_are_read_from_the_primary_until_the_replica_catches_up(self):
+        cache.clear()
+
+        @cache_anonymous_page(lambda request: ['test:categories'])
+        @read_only_view
+        def categories(request):
+            return HttpResponse(','.join(ScrapCategory.objects.values_list('name', flat=True)))
+
+        def get():
+            request = self.factory.get('/categories/')
+            request.user = AnonymousUser()
+            return categories(request).content
+
+        cache.set(CLOCK_PREFIX + 'test:categories', timezone.now() - timedelta(minutes=1), None)
+        self.assertEqual(get(), b'Metals')
+
+        # Plastic was just added; the replica may not have it yet
+        move_clocks('test:categories')
+        self.assertEqual(get(), b'Metals,Plastic')
+        with self.settings(DATABASE_PIN_SECONDS=0):
+            self.assertEqual(get(), b'Metals,Plastic')
+
+
+class StaticAssetsTests(SimpleTestCase):
+    template = Template('{% load assets %}{% tailwind_stylesheet %}')
+
+    @override_settings(TAILWIND_CDN=False)
+    def test_pages_link_the_built_stylesheet(self):
+        self.assertEqual(self.template.render(Context()), '<link rel="stylesheet" href="/static/css/app.css">')
+
+    @override_settings(TAILWIND_CDN=True)
+    def test_unbuilt_checkouts_use_the_cdn(self):
+        self.assertIn('cdn.tailwindcss.com', self.template.render(Context()))
+
+    def test_build_css_runs_the_tailwind_cli(self):
+        # Stands in for the CLI: writes the --output file it is given
+        cli = f'{sys.executable} -c "import sys; open(sys.argv[sys.argv.index(\'--output\') + 1], \'w\').write(\'.p-6{{}}\')"'
+        with tempfile.TemporaryDirectory() as directory, override_settings(BASE_DIR=Path(directory), TAILWIND_CLI=cli):
+            (Path(directory) / 'static' / 'css').mkdir(parents=True)
+            call_command('build_css', stdout=io.StringIO())
+
+            self.assertEqual((Path(directory) / 'static' / 'css' / 'app.css').read_text(), '.p-6{}')
+
+    @override_settings(TAILWIND_CLI='no-such-tailwindcss')
+    def test_build_css_without_the_cli(self):
+        with self.assertRaisesMessage(CommandError, 'Tailwind CLI not found'):
+            call_command('build_css')
+
+
+class CompressionTests(SimpleTestCase):
+    page = b'<div class="glass p-6 rounded-3xl">dealer card</div>' * 100
+
+    def setUp(self):
+        cache.clear()
+        reset_compression_stats([])
+        self.factory = RequestFactory()
+
+    def respond(self, response, accept_encoding):
+        return CompressionMiddleware(lambda request: response)(
+            self.factory.get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        )
+
+    def test_negotiation(self):
+        self.assertEqual(negotiate('gzip, deflate, br'), 'br')
+        self.assertEqual(negotiate('br;q=0.5, gzip'), 'gzip')
+        self.assertEqual(negotiate('br;q=0, *'), 'gzip')
+        self.assertIsNone(negotiate('identity'))
+        self.assertIsNone(negotiate(''))
+
+    def test_pages_are_compressed_and_counted(self):
+        response = self.respond(HttpResponse(self.page), 'gzip, br')
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(brotli.decompress(response.content), self.page)
+        [row] = compression_stats([])
+        self.assertEqual((row['responses'], row['original'], row['sent']), (1, len(self.page), len(response.content)))
+
+    def test_counts_are_flushed_to_the_cache_periodically(self):
+        flush_compression_stats()
+        for _ in range(3):
+            self.respond(HttpResponse(self.page), 'gzip')
+        self.assertIsNone(cache.get(f'{STATS_PREFIX}{UNRESOLVED}:responses'))
+
+        with self.settings(COMPRESSION_STATS_FLUSH_SECONDS=0):
+            self.respond(HttpResponse(self.page), 'gzip')
+        self.assertEqual(cache.get(f'{STATS_PREFIX}{UNRESOLVED}:responses'), 4)
+
+    def test_small_and_binary_responses_are_left_alone(self):
+        self.assertFalse(self.respond(HttpResponse(b'<p>ok</p>'), 'br').has_header('Content-Encoding'))
+        png = HttpResponse(self.page, content_type='image/png')
+        self.assertFalse(self.respond(png, 'br').has_header('Content-Encoding'))
+
+    def test_strong_etags_become_weak(self):
+        response = HttpResponse(self.page)
+        response['ETag'] = '"v1"'
+
+        self.assertEqual(self.respond(response, 'gzip')['ETag'], 'W/"v1"')
+
+    def test_streaming_exports_are_compressed_as_they_stream(self):
+        chunks = [b'id,name\n'] + [f'{i},dealer {i}\n'.encode() for i in range(1000)]
+        response = self.respond(StreamingHttpResponse(iter(chunks), content_type='text/csv'), 'gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(compression_stats([]), [])
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b''.join(chunks))
+        [row] = compression_stats([])
+        self.assertEqual(row['original'], len(b''.join(chunks)))
+
+
+class ColdStartTests(SimpleTestCase):
+    def test_workers_start_without_numpy_or_pillow(self):
+        # In a fresh process: this one has imported everything already
+        result = subprocess.run(
+            [sys.executable, '-c', STARTUP + "import sys; print(sorted({'numpy', 'PIL'} & set(sys.modules)))"],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        )
+
+        self.assertEqual(result.stdout.strip(), '[]')
+
+    def test_warm_up_precompiles_every_project_template(self):
+        loader = engines['django'].engine.template_loaders[0]
+        loader.reset()
+        warm_up()
+
+        templates = project_templates()
+        self.assertIn('accounts/email/price_alerts.txt', templates)
+        self.assertLessEqual(set(templates), set(loader.get_template_cache))
+
+    def test_parse_importtime(self):
+        report = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |     numpy._core\n'
+            'import time:      3335 |       3455 |   numpy\n'
+            'import time:       318 |       3773 | marketplace.pricing\n'
+        )
+
+        self.assertEqual(parse_importtime(report), [
+            ('numpy._core', 120, 120, 2), ('numpy', 3335, 3455, 1), ('marketplace.pricing', 318, 3773, 0),
+        ])
@@ -0,0 +1,61 @@
+"""
+Warm-up for a freshly started web worker.
+
+Passenger stops idle workers, so the first request to a new one used to
+pay for building the URL resolvers, parsing its templates and opening the
+cache connection. ``passenger_wsgi`` calls ``warm_up()`` right after loading
+the application, before that first request arrives. It compiles every
+template under the ``TEMPLATES`` ``DIRS`` (``templates/``) into the cached
+loader, so no page render in the worker parses a template again. The
+database is deliberately left alone: Passenger may fork workers from the
+warmed process, and forked children must not share a connection.
+
+``manage.py importtime`` shows what loading and warming a worker costs, and
+``manage.py bench_templates`` what precompiling saves per page.
+"""
+import logging
+import time
+from pathlib import Path
+
+from django.core.cache import cache
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+def project_templates(engine=None):
+    """Names of every template file in the engine's ``DIRS``"""
+    engine = engine or engines['django'].engine
+    names = []
+    for directory in map(Path, engine.dirs):
+        names += sorted(path.relative_to(directory).as_posix() for path in directory.rglob('*') if path.is_file())
+    return names
+
+
+def precompile_templates(engine=None):
+    """Parse every project template into the engine's cached loader; return how many compiled"""
+    engine = engine or engines['django'].engine
+    compiled = 0
+    for name in project_templates(engine):
+        try:
+            engine.get_template(name)
+        except (TemplateDoesNotExist, TemplateSyntaxError) as exc:
+            logger.warning("Could not precompile template %s: %s", name, exc)
+        else:
+            compiled += 1
+    return compiled
+
+
+def warm_up():
+    """Build the URL resolvers, compile the templates and open the cache; return the seconds taken"""
+    started = time.perf_counter()
+    resolver = get_resolver()
+    # Fills the reverse and namespace lookups that ``reverse`` and ``{% url %}`` use
+    resolver.reverse_dict, resolver.namespace_dict
+
+    precompile_templates()
+    cache.get('warmup')
+    elapsed = time.perf_counter() - started
+    logger.info("Worker warmed up in %.0f ms", elapsed * 1000)
+    return elapsed
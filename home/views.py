@@ -1,5 +1,7 @@
 from django.shortcuts import render
+from core.pagecache import cache_anonymous_page
 
+@cache_anonymous_page()
 def home(request):
     """
     Home page view with platform statistics and overview
@@ -1,3 +1,40 @@
 from django.contrib import admin
+from core.exports import ExportMixin
+from core.pagination import EstimatedCountPaginator
+from .models import SavedSearch, Transaction, EcoPointsHistory
 
-# Register your models here.
+@admin.register(Transaction)
+class TransactionAdmin(ExportMixin, admin.ModelAdmin):
+    list_display = ['id', 'buyer', 'seller', 'quantity', 'unit_price', 'total_amount', 'status', 'payment_status', 'created_at']
+    list_filter = ['status', 'payment_status', 'created_at']
+    search_fields = ['buyer__username', 'seller__username']
+    raw_id_fields = ['buyer', 'seller', 'scrap_listing', 'reusable_listing']
+    readonly_fields = ['created_at']
+    list_select_related = ['buyer', 'seller']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    export_fields = [
+        'id', 'buyer__username', 'seller__username', 'scrap_listing_id', 'reusable_listing_id', 'quantity',
+        'unit_price', 'total_amount', 'seller_eco_points', 'buyer_eco_points', 'status', 'payment_status',
+        'created_at', 'confirmed_at', 'completed_at',
+    ]
+
+@admin.register(EcoPointsHistory)
+class EcoPointsHistoryAdmin(ExportMixin, admin.ModelAdmin):
+    list_display = ['user', 'transaction_type', 'points', 'description', 'reference_id', 'created_at']
+    list_filter = ['transaction_type', 'created_at']
+    search_fields = ['user__username', 'description', 'reference_id']
+    raw_id_fields = ['user']
+    readonly_fields = ['created_at']
+    list_select_related = ['user']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    export_fields = ['id', 'user__username', 'transaction_type', 'points', 'description', 'reference_id', 'created_at']
+
+@admin.register(SavedSearch)
+class SavedSearchAdmin(admin.ModelAdmin):
+    list_display = ['user', 'name', 'listing_type', 'material', 'category', 'grade', 'city', 'max_price', 'is_active', 'created_at']
+    list_filter = ['listing_type', 'is_active', 'created_at']
+    search_fields = ['user__username', 'name', 'city']
+    raw_id_fields = ['user']
+    list_select_related = ['user', 'material__category', 'category']
@@ -0,0 +1,138 @@
+"""
+Saved-search alerts for new listings.
+
+Instead of running every saved search against each new listing, the active
+searches are inverted into a ``PercolatorIndex``: one posting list per
+(listing type, material/category, grade, city) key, where a blank criterion
+is stored under a wildcard. A listing probes at most eight keys (each
+criterion exact or wildcard) and each posting list is sorted by
+``max_price``, so a bisect leaves only the searches that actually match.
+The cost is proportional to the number of matching subscriptions, not the
+number of saved searches.
+
+Matches are stored as ``SearchAlert`` rows and mailed in batches by
+``send_alerts``, one email per user however many listings matched.
+"""
+from bisect import bisect_left
+from collections import defaultdict
+from itertools import product
+
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template.loader import get_template
+from django.utils import timezone
+
+from core.indexes import LocalIndex
+from .models import SavedSearch, SearchAlert, ScrapListing
+from .pricing import normalize_city
+
+ANY = None
+ALERT_CHUNK_SIZE = 100
+ALERT_SUBJECT = "New listings matching your saved searches"
+
+
+class PercolatorIndex:
+    """Active saved searches inverted into price-sorted posting lists"""
+
+    def __init__(self, postings):
+        self.postings = postings
+
+    @classmethod
+    def build(cls):
+        entries = defaultdict(list)
+        for search_id, user_id, listing_type, material_id, category_id, grade, city, max_price in (
+            SavedSearch.objects.filter(is_active=True).values_list(
+                'id', 'user_id', 'listing_type', 'material_id', 'category_id', 'grade', 'city', 'max_price',
+            )
+        ):
+            target = material_id if listing_type == 'scrap' else category_id
+            key = (listing_type, target, grade or ANY, normalize_city(city) or ANY)
+            limit = float('inf') if max_price is None else float(max_price)
+            entries[key].append((limit, search_id, user_id))
+
+        postings = {}
+        for key, rows in entries.items():
+            rows.sort()
+            postings[key] = ([limit for limit, _, _ in rows], [(search_id, user_id) for _, search_id, user_id in rows])
+        return cls(postings)
+
+    def percolate(self, listing_type, target, grade, city, price):
+        """Return ``(search_id, user_id)`` for every saved search the listing satisfies"""
+        price = float(price or 0)
+        hits = []
+        for key in set(product((target, ANY), (grade or ANY, ANY), (normalize_city(city) or ANY, ANY))):
+            posting = self.postings.get((listing_type,) + key)
+            if posting:
+                limits, searches = posting
+                hits.extend(searches[bisect_left(limits, price):])
+        return hits
+
+
+percolator_index = LocalIndex('marketplace:percolator_version', PercolatorIndex.build)
+get_index = percolator_index.get
+invalidate_index = percolator_index.invalidate
+
+
+def matching_searches(listing):
+    """Return ``(search_id, user_id)`` pairs for a scrap or reusable listing instance"""
+    if isinstance(listing, ScrapListing):
+        return get_index().percolate(
+            'scrap', listing.material_id, listing.quality_grade, listing.city, listing.expected_price,
+        )
+    return get_index().percolate(
+        'reusable', listing.category_id, listing.condition, listing.city, listing.price,
+    )
+
+
+def queue_alerts(listings):
+    """Queue a ``SearchAlert`` for every saved search each listing matches; returns how many"""
+    alerts = []
+    for listing in listings:
+        if listing.status != 'active':
+            continue
+        field = 'scrap_listing' if isinstance(listing, ScrapListing) else 'reusable_listing'
+        for search_id, user_id in matching_searches(listing):
+            # Sellers don't need to hear about their own listings
+            if user_id != listing.seller_id:
+                alerts.append(SearchAlert(saved_search_id=search_id, **{field: listing}))
+    SearchAlert.objects.bulk_create(alerts, batch_size=1000, ignore_conflicts=True)
+    return len(alerts)
+
+
+def send_alerts(now=None, chunk_size=ALERT_CHUNK_SIZE, connection=None):
+    """Email all pending alerts, one message per user; returns the number of emails sent"""
+    now = now or timezone.now()
+    pending = defaultdict(list)
+    for alert in (SearchAlert.objects
+                  .filter(sent_at__isnull=True)
+                  .exclude(saved_search__user__email='')
+                  .select_related('saved_search__user', 'scrap_listing__material', 'reusable_listing__category')
+                  .order_by('created_at')):
+        pending[alert.saved_search.user].append(alert)
+    if not pending:
+        return 0
+
+    text_template = get_template('marketplace/email/search_alerts.txt')
+    html_template = get_template('marketplace/email/search_alerts.html')
+
+    batches = []
+    for user, alerts in pending.items():
+        context = {'user': user, 'alerts': alerts}
+        message = EmailMultiAlternatives(ALERT_SUBJECT, text_template.render(context), to=[user.email])
+        message.attach_alternative(html_template.render(context), 'text/html')
+        batches.append((message, [alert.id for alert in alerts]))
+
+    connection = connection or get_connection()
+    sent_ids = []
+    emails = 0
+    connection.open()
+    try:
+        for start in range(0, len(batches), chunk_size):
+            chunk = batches[start:start + chunk_size]
+            connection.send_messages([message for message, _ in chunk])
+            for _, alert_ids in chunk:
+                sent_ids.extend(alert_ids)
+            emails += len(chunk)
+    finally:
+        connection.close()
+        SearchAlert.objects.filter(id__in=sent_ids).update(sent_at=now)
+    return emails
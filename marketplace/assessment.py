@@ -0,0 +1,221 @@
+"""
+Batch AI quality assessment for listing images.
+
+``AssessmentEngine`` hashes every image, answers what it can from the
+``ImageAssessment`` cache in one query, and only decodes and runs the model
+for cache misses, in micro-batches of ``AI_ASSESSMENT_BATCH_SIZE``. Saving a
+listing again with the same pictures therefore never re-runs inference.
+
+The model is pluggable through ``AI_ASSESSMENT_MODEL``; any class with a
+``version`` string, an ``input_size`` and a batch ``predict(images)`` method
+works. The default ``ColorStatsModel`` is a deterministic, CPU-only stand-in
+built on Pillow image statistics.
+"""
+import hashlib
+import io
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from PIL import Image, ImageFilter, ImageStat
+
+from .models import ImageAssessment, ScrapListing, ReusableItemListing
+
+
+def score_to_quality_grade(score):
+    if score >= 0.75:
+        return 'A'
+    if score >= 0.5:
+        return 'B'
+    if score >= 0.25:
+        return 'C'
+    return 'D'
+
+
+def score_to_condition_grade(score):
+    if score >= 0.8:
+        return 'like_new'
+    if score >= 0.6:
+        return 'excellent'
+    if score >= 0.4:
+        return 'good'
+    if score >= 0.2:
+        return 'fair'
+    return 'poor'
+
+
+class BaseAssessmentModel:
+    version = 'base'
+    input_size = 224
+
+    def predict(self, images):
+        """
+        Return one ``{'quality_score', 'material_type', 'confidence'}`` dict per
+        preprocessed RGB image in ``images``.
+        """
+        raise NotImplementedError
+
+
+class ColorStatsModel(BaseAssessmentModel):
+    """
+    Deterministic stand-in model.
+
+    Quality is scored from edge detail, contrast and exposure; the material
+    guess comes from the mean hue/saturation/value. Same pixels, same answer.
+    """
+    version = 'colorstats-1'
+    input_size = 128
+
+    def predict(self, images):
+        return [self._predict_one(image) for image in images]
+
+    def _predict_one(self, image):
+        rgb = ImageStat.Stat(image)
+        hue, saturation, value = ImageStat.Stat(image.convert('HSV')).mean
+        edges = ImageStat.Stat(image.convert('L').filter(ImageFilter.FIND_EDGES)).mean[0]
+        contrast = sum(rgb.stddev) / 3
+
+        detail = min(edges / 40, 1.0)
+        spread = min(contrast / 64, 1.0)
+        exposure = max(0.0, 1 - abs(value - 150) / 150)
+        quality = round(0.4 * detail + 0.3 * spread + 0.3 * exposure, 4)
+
+        if saturation < 40:
+            material, margin = 'Metal', (40 - saturation) / 40
+        elif 8 <= hue <= 30 and saturation >= 90:
+            material, margin = 'Copper/Brass', min((saturation - 90) / 90, 1.0)
+        elif 15 <= hue <= 40 and value >= 120:
+            material, margin = 'Paper/Cardboard', min((value - 120) / 120, 1.0)
+        elif 60 <= hue <= 110:
+            material, margin = 'E-waste', 1 - abs(hue - 85) / 25
+        else:
+            material, margin = 'Plastic', min((saturation - 40) / 160, 1.0)
+        confidence = round(0.5 + 0.45 * max(0.0, min(margin, 1.0)), 4)
+
+        return {'quality_score': quality, 'material_type': material, 'confidence': confidence}
+
+
+@lru_cache(maxsize=None)
+def get_model(path=None):
+    path = path or getattr(settings, 'AI_ASSESSMENT_MODEL', 'marketplace.assessment.ColorStatsModel')
+    return import_string(path)()
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class AssessmentEngine:
+    def __init__(self, model=None, batch_size=None):
+        self.model = model or get_model()
+        self.batch_size = batch_size or getattr(settings, 'AI_ASSESSMENT_BATCH_SIZE', 16)
+        self.inferred = 0
+        self.cache_hits = 0
+
+    def preprocess(self, data):
+        image = Image.open(io.BytesIO(data))
+        # Let the JPEG decoder downscale while decoding; far cheaper than a full decode
+        image.draft('RGB', (self.model.input_size, self.model.input_size))
+        image = image.convert('RGB')
+        image.thumbnail((self.model.input_size, self.model.input_size))
+        return image
+
+    def assess_blobs(self, blobs):
+        """Return ``{content_hash: result}`` for raw image bytes, using the cache"""
+        return self.assess_hashed({content_hash(data): data for data in blobs})
+
+    def assess_hashed(self, by_hash):
+        results = {
+            row['content_hash']: row
+            for row in ImageAssessment.objects.filter(
+                model_version=self.model.version, content_hash__in=by_hash,
+            ).values('content_hash', 'quality_score', 'material_type', 'confidence')
+        }
+        self.cache_hits += len(results)
+
+        misses = [digest for digest in by_hash if digest not in results]
+        for start in range(0, len(misses), self.batch_size):
+            chunk = []
+            images = []
+            for digest in misses[start:start + self.batch_size]:
+                try:
+                    images.append(self.preprocess(by_hash[digest]))
+                except (OSError, Image.DecompressionBombError):
+                    continue
+                chunk.append(digest)
+            if not images:
+                continue
+            predictions = self.model.predict(images)
+            self.inferred += len(images)
+            rows = []
+            for digest, prediction in zip(chunk, predictions):
+                results[digest] = dict(prediction, content_hash=digest)
+                rows.append(ImageAssessment(content_hash=digest, model_version=self.model.version, **prediction))
+            ImageAssessment.objects.bulk_create(rows, ignore_conflicts=True)
+        return results
+
+    def assess_listings(self, listings):
+        """Assess and update a batch of scrap/reusable listings; returns how many changed"""
+        by_hash = {}
+        hashes_by_listing = {}
+        for listing in listings:
+            hashes = []
+            for field_name in listing.IMAGE_FIELDS:
+                image_field = getattr(listing, field_name)
+                if not image_field:
+                    continue
+                try:
+                    with image_field.open('rb') as handle:
+                        data = handle.read()
+                except OSError:
+                    continue
+                digest = content_hash(data)
+                by_hash[digest] = data
+                hashes.append(digest)
+            if hashes:
+                hashes_by_listing[listing] = hashes
+
+        results = self.assess_hashed(by_hash)
+
+        scrap, reusable = [], []
+        for listing, hashes in hashes_by_listing.items():
+            predictions = [results[digest] for digest in hashes if digest in results]
+            if not predictions:
+                continue
+            score = sum(p['quality_score'] for p in predictions) / len(predictions)
+            best = max(predictions, key=lambda p: p['confidence'])
+            listing.ai_confidence_score = round(sum(p['confidence'] for p in predictions) / len(predictions), 4)
+            if isinstance(listing, ScrapListing):
+                listing.ai_quality_grade = score_to_quality_grade(score)
+                listing.ai_material_type = best['material_type']
+                scrap.append(listing)
+            else:
+                listing.ai_condition_grade = score_to_condition_grade(score)
+                reusable.append(listing)
+
+        # bulk_update skips save(), so this never re-triggers the image jobs
+        if scrap:
+            ScrapListing.objects.bulk_update(scrap, ['ai_quality_grade', 'ai_material_type', 'ai_confidence_score'])
+        if reusable:
+            ReusableItemListing.objects.bulk_update(reusable, ['ai_condition_grade', 'ai_confidence_score'])
+        return len(scrap) + len(reusable)
+
+
+def benchmark(blobs, batch_size=None):
+    """Time a cold (inference) and a warm (cache) pass; returns images/sec for each"""
+    engine = AssessmentEngine(batch_size=batch_size)
+    started = time.perf_counter()
+    engine.assess_blobs(blobs)
+    cold = time.perf_counter() - started
+
+    started = time.perf_counter()
+    engine.assess_blobs(blobs)
+    warm = time.perf_counter() - started
+    return {
+        'images': len(blobs),
+        'batch_size': engine.batch_size,
+        'cold_images_per_sec': len(blobs) / cold if cold else float('inf'),
+        'warm_images_per_sec': len(blobs) / warm if warm else float('inf'),
+        'inferred': engine.inferred,
+    }
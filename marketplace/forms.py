@@ -0,0 +1,40 @@
+from django import forms
+from accounts.models import ScrapMaterial
+from .models import SavedSearch, ScrapListing, ReusableItemCategory, ReusableItemListing
+
+class SavedSearchForm(forms.ModelForm):
+    GRADE_CHOICES = [('', 'Any grade / condition')] + ScrapListing.QUALITY_GRADES + ReusableItemListing.CONDITION_GRADES
+    
+    grade = forms.ChoiceField(choices=GRADE_CHOICES, required=False)
+    
+    class Meta:
+        model = SavedSearch
+        fields = ['name', 'listing_type', 'material', 'category', 'grade', 'city', 'max_price']
+        widgets = {
+            'name': forms.TextInput(attrs={'placeholder': 'e.g., Copper in Pune'}),
+            'city': forms.TextInput(attrs={'placeholder': 'Any city'}),
+            'max_price': forms.NumberInput(attrs={'step': '0.01', 'min': '0'}),
+        }
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['material'].queryset = ScrapMaterial.objects.filter(is_active=True)
+        self.fields['material'].empty_label = "Any material"
+        self.fields['category'].queryset = ReusableItemCategory.objects.filter(is_active=True)
+        self.fields['category'].empty_label = "Any category"
+        for field in self.fields:
+            self.fields[field].widget.attrs.update({'class': 'form-control'})
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        listing_type = cleaned_data.get('listing_type')
+        grade = cleaned_data.get('grade')
+        if listing_type == 'scrap':
+            cleaned_data['category'] = None
+            if grade and grade not in dict(ScrapListing.QUALITY_GRADES):
+                self.add_error('grade', 'Choose a quality grade for scrap materials.')
+        elif listing_type == 'reusable':
+            cleaned_data['material'] = None
+            if grade and grade not in dict(ReusableItemListing.CONDITION_GRADES):
+                self.add_error('grade', 'Choose a condition for reusable items.')
+        return cleaned_data
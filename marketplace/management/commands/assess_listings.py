@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from marketplace.assessment import AssessmentEngine
+from marketplace.models import ScrapListing, ReusableItemListing
+
+
+class Command(BaseCommand):
+    help = "Run the AI image assessment over listings in micro-batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Reassess every active listing, not only unassessed ones")
+        parser.add_argument('--chunk-size', type=int, default=200, help="Listings loaded per round")
+        parser.add_argument('--batch-size', type=int, default=None, help="Images per model call (default: AI_ASSESSMENT_BATCH_SIZE)")
+
+    def handle(self, *args, **options):
+        engine = AssessmentEngine(batch_size=options['batch_size'])
+        started = time.perf_counter()
+        updated = 0
+        for model, pending in ((ScrapListing, {'ai_quality_grade': ''}), (ReusableItemListing, {'ai_condition_grade': ''})):
+            listings = model.objects.filter(status='active')
+            if not options['all']:
+                listings = listings.filter(**pending)
+            batch = []
+            for listing in listings.iterator(chunk_size=options['chunk_size']):
+                batch.append(listing)
+                if len(batch) == options['chunk_size']:
+                    updated += engine.assess_listings(batch)
+                    batch = []
+            if batch:
+                updated += engine.assess_listings(batch)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Updated {updated} listings in {elapsed:.1f}s "
+            f"({engine.inferred} images inferred, {engine.cache_hits} served from cache)."
+        )
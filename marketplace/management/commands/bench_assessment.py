@@ -0,0 +1,46 @@
+import io
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from PIL import Image, ImageDraw
+
+from marketplace.assessment import benchmark
+
+
+def synthetic_images(count, size, seed=42):
+    """Deterministic JPEGs with varied colours and shapes"""
+    rng = random.Random(seed)
+    blobs = []
+    for _ in range(count):
+        image = Image.new('RGB', (size, size), tuple(rng.randrange(256) for _ in range(3)))
+        draw = ImageDraw.Draw(image)
+        for _ in range(12):
+            x, y = rng.randrange(size), rng.randrange(size)
+            draw.rectangle([x, y, x + rng.randrange(size // 2), y + rng.randrange(size // 2)],
+                           fill=tuple(rng.randrange(256) for _ in range(3)))
+        buffer = io.BytesIO()
+        image.save(buffer, 'JPEG', quality=85)
+        blobs.append(buffer.getvalue())
+    return blobs
+
+
+class Command(BaseCommand):
+    help = "Measure AI assessment throughput (images/sec) for cold and cached passes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--images', type=int, default=200)
+        parser.add_argument('--size', type=int, default=800, help="Edge length of the synthetic photos in pixels")
+        parser.add_argument('--batch-sizes', default='1,8,32', help="Comma-separated micro-batch sizes to compare")
+
+    def handle(self, *args, **options):
+        blobs = synthetic_images(options['images'], options['size'])
+        self.stdout.write(f"{'batch':>6} {'cold img/s':>11} {'cached img/s':>13}")
+        for batch_size in [int(value) for value in options['batch_sizes'].split(',')]:
+            # Cache rows written by the benchmark are rolled back
+            with transaction.atomic():
+                result = benchmark(blobs, batch_size=batch_size)
+                transaction.set_rollback(True)
+            self.stdout.write(
+                f"{batch_size:>6} {result['cold_images_per_sec']:>11.1f} {result['warm_images_per_sec']:>13.1f}"
+            )
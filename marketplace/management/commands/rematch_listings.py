@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from marketplace.matching import get_index, match_listing, rematch_listings
+from marketplace.models import ScrapListing
+
+
+class Command(BaseCommand):
+    help = "Re-rank verified dealers for every active scrap listing"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--material', type=int, default=None, help="Only rematch listings of this material id")
+        parser.add_argument('--grade', default=None, help="Only rematch this quality grade")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        index = get_index()
+        built = time.perf_counter() - started
+        self.stdout.write(f"Dealer index: {len(index.groups)} material/grade groups in {built * 1000:.1f}ms.")
+
+        started = time.perf_counter()
+        matched = rematch_listings(material_id=options['material'], quality_grade=options['grade'])
+        elapsed = time.perf_counter() - started
+        rate = matched / elapsed if elapsed else 0
+        self.stdout.write(f"Rematched {matched} listings in {elapsed:.2f}s ({rate:.0f} listings/sec).")
+
+        listing = ScrapListing.objects.filter(status='active').first()
+        if listing:
+            runs = 1000
+            started = time.perf_counter()
+            for _ in range(runs):
+                match_listing(listing)
+            per_match = (time.perf_counter() - started) / runs
+            self.stdout.write(f"Single listing match (warm index): {per_match * 1000:.3f}ms.")
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from marketplace.pricing import reprice_listings
+
+
+class Command(BaseCommand):
+    help = "Recompute the AI suggested price of every active listing"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--material', type=int, default=None, help="Only reprice scrap listings of this material id")
+        parser.add_argument('--grade', default=None, help="Only reprice this quality grade")
+        parser.add_argument('--chunk-size', type=int, default=5000, help="Listings priced per vectorized batch")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written = reprice_listings(
+            material_id=options['material'],
+            quality_grade=options['grade'],
+            chunk_size=options['chunk_size'],
+        )
+        elapsed = time.perf_counter() - started
+        rate = written / elapsed if elapsed else 0
+        self.stdout.write(f"Repriced {written} listings in {elapsed:.2f}s ({rate:.0f} listings/sec).")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from marketplace.alerts import ALERT_CHUNK_SIZE, send_alerts
+
+
+class Command(BaseCommand):
+    help = "Email pending saved-search alerts, one message per user"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=ALERT_CHUNK_SIZE, help="Messages sent per SMTP batch")
+
+    def handle(self, *args, **options):
+        sent = send_alerts(chunk_size=options['chunk_size'])
+        self.stdout.write(f"Sent {sent} saved-search alert emails.")
@@ -0,0 +1,152 @@
+"""
+Listing-to-dealer matching.
+
+Dealers are ranked for a scrap listing by net offer: their ``price_per_unit``
+for the listing's material and grade times the listing quantity, minus a
+per-km pickup cost. Only verified dealers offering pickup whose
+``minimum_quantity`` the listing meets are considered.
+
+Quotes live in a per-process ``DealerIndex`` mapping (material, grade) to
+NumPy arrays, so matching one new listing is a few vector operations with no
+database access. The index is rebuilt lazily whenever the shared
+version in the cache moves (see ``core.indexes``), which the signals bump on
+every dealer or price change. Rematching many listings runs as one matrix per
+(material, grade) group.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+
+from accounts.models import DealerPrice
+from core.indexes import LocalIndex
+from .models import ListingMatch, ScrapListing
+from .pricing import as_float_array, distance_matrix, normalize_city, to_decimal
+
+COST_PER_KM = 10.0  # ₹ of pickup cost per km, subtracted from the offer
+MATCHES_PER_LISTING = 5
+
+
+class DealerIndex:
+    """Active verified pickup quotes grouped by (material_id, quality_grade)"""
+
+    def __init__(self, groups):
+        self.groups = groups
+
+    @classmethod
+    def build(cls):
+        rows = defaultdict(list)
+        for row in DealerPrice.objects.filter(
+            is_active=True,
+            dealer__verification_status='verified',
+            dealer__pickup_available=True,
+        ).values_list(
+            'material_id', 'quality_grade', 'dealer_id', 'price_per_unit', 'minimum_quantity',
+            'dealer__latitude', 'dealer__longitude', 'dealer__user__city',
+        ):
+            rows[(row[0], row[1])].append(row[2:])
+
+        groups = {}
+        for key, quotes in rows.items():
+            dealer_ids, prices, minimums, lats, lons, cities = zip(*quotes)
+            groups[key] = {
+                'dealer_ids': np.array(dealer_ids, dtype=np.int64),
+                'prices': as_float_array(prices),
+                'minimum_quantities': as_float_array(minimums),
+                'latitudes': as_float_array(lats),
+                'longitudes': as_float_array(lons),
+                'cities': np.array([normalize_city(city) for city in cities]),
+            }
+        return cls(groups)
+
+    def rank(self, material_id, quality_grade, quantities, latitudes, longitudes, cities, limit=MATCHES_PER_LISTING):
+        """
+        Rank dealers for a batch of listings sharing one material and grade.
+
+        Returns one list of ``(dealer_id, net_offer, price_per_unit, distance_km)``
+        tuples per listing, best offer first.
+        """
+        group = self.groups.get((material_id, quality_grade))
+        if group is None:
+            return [[] for _ in quantities]
+
+        quantities = as_float_array(quantities)
+        distances = distance_matrix(
+            as_float_array(latitudes), as_float_array(longitudes), [normalize_city(city) for city in cities],
+            group['latitudes'], group['longitudes'], group['cities'],
+        )
+        offers = quantities[:, None] * group['prices'][None, :] - distances * COST_PER_KM
+        eligible = (quantities[:, None] >= group['minimum_quantities'][None, :]) & (offers > 0)
+        offers = np.where(eligible, offers, -np.inf)
+
+        limit = min(limit, offers.shape[1])
+        order = np.argsort(-offers, axis=1, kind='stable')[:, :limit]
+        ranked = []
+        for row, columns in enumerate(order):
+            ranked.append([
+                (int(group['dealer_ids'][column]), offers[row, column],
+                 group['prices'][column], float(distances[row, column]))
+                for column in columns if np.isfinite(offers[row, column])
+            ])
+        return ranked
+
+
+dealer_index = LocalIndex('marketplace:dealer_index_version', DealerIndex.build)
+get_index = dealer_index.get
+invalidate_index = dealer_index.invalidate
+
+
+def match_listing(listing, limit=MATCHES_PER_LISTING):
+    """Rank dealers for a single listing (model instance) from the in-memory index"""
+    return get_index().rank(
+        listing.material_id, listing.quality_grade,
+        [listing.quantity], [listing.latitude], [listing.longitude], [listing.city],
+        limit=limit,
+    )[0]
+
+
+def rematch_listings(material_id=None, quality_grade=None, listing_ids=None, material_ids=None, limit=MATCHES_PER_LISTING):
+    """
+    Recompute and store ``ListingMatch`` rows for active scrap listings.
+
+    Listings are ranked one (material, grade) group at a time as a single
+    matrix; the old matches for those listings are replaced in one
+    transaction. Returns the number of listings matched.
+    """
+    listings = ScrapListing.objects.filter(status='active')
+    if material_id is not None:
+        listings = listings.filter(material_id=material_id)
+    if material_ids is not None:
+        listings = listings.filter(material_id__in=material_ids)
+    if quality_grade is not None:
+        listings = listings.filter(quality_grade=quality_grade)
+    if listing_ids is not None:
+        listings = listings.filter(id__in=listing_ids)
+
+    groups = defaultdict(list)
+    for row in listings.values_list('id', 'material_id', 'quality_grade', 'quantity', 'latitude', 'longitude', 'city'):
+        groups[(row[1], row[2])].append(row)
+
+    index = get_index()
+    matches = []
+    matched_ids = []
+    for (group_material, group_grade), rows in groups.items():
+        ids, _, _, quantities, lats, lons, cities = zip(*rows)
+        ranked = index.rank(group_material, group_grade, quantities, lats, lons, cities, limit=limit)
+        for listing_id, dealers in zip(ids, ranked):
+            matched_ids.append(listing_id)
+            for position, (dealer_id, net_offer, price, distance) in enumerate(dealers, start=1):
+                matches.append(ListingMatch(
+                    listing_id=listing_id,
+                    dealer_id=dealer_id,
+                    rank=position,
+                    net_offer=to_decimal(net_offer),
+                    price_per_unit=Decimal(str(price)).quantize(Decimal('0.01')),
+                    distance_km=round(distance, 2),
+                ))
+
+    with transaction.atomic():
+        ListingMatch.objects.filter(listing_id__in=matched_ids).delete()
+        ListingMatch.objects.bulk_create(matches, batch_size=1000)
+    return len(matched_ids)
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-19 04:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageAssessment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('model_version', models.CharField(max_length=50)),
+                ('quality_score', models.FloatField(help_text='0 (poor) to 1 (excellent)')),
+                ('material_type', models.CharField(blank=True, max_length=100)),
+                ('confidence', models.FloatField(default=0.0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'unique_together': {('content_hash', 'model_version')},
+            },
+        ),
+    ]
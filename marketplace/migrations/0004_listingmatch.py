@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-19 04:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_dealerprofile_digest'),
+        ('marketplace', '0003_scraplisting_location'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveIntegerField()),
+                ('net_offer', models.DecimalField(decimal_places=2, help_text='Price × quantity minus distance cost', max_digits=12)),
+                ('price_per_unit', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('distance_km', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('dealer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='listing_matches', to='accounts.dealerprofile')),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dealer_matches', to='marketplace.scraplisting')),
+            ],
+            options={
+                'verbose_name_plural': 'Listing Matches',
+                'ordering': ['listing', 'rank'],
+                'unique_together': {('listing', 'dealer')},
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.3 on 2026-10-19 04:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_dealerprofile_digest'),
+        ('marketplace', '0004_listingmatch'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SavedSearch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, max_length=100)),
+                ('listing_type', models.CharField(choices=[('scrap', 'Scrap Materials'), ('reusable', 'Reusable Items')], default='scrap', max_length=10)),
+                ('grade', models.CharField(blank=True, help_text='Quality grade (scrap) or condition (reusable); blank matches any', max_length=20)),
+                ('city', models.CharField(blank=True, help_text='Blank matches any city', max_length=100)),
+                ('max_price', models.DecimalField(blank=True, decimal_places=2, help_text='Per unit for scrap materials', max_digits=10, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='marketplace.reusableitemcategory')),
+                ('material', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='accounts.scrapmaterial')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_searches', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Saved Searches',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('reusable_listing', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='marketplace.reusableitemlisting')),
+                ('saved_search', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alerts', to='marketplace.savedsearch')),
+                ('scrap_listing', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='marketplace.scraplisting')),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['sent_at'], name='marketplace_sent_at_4bcba7_idx')],
+                'constraints': [models.UniqueConstraint(fields=('saved_search', 'scrap_listing'), name='unique_scrap_alert'), models.UniqueConstraint(fields=('saved_search', 'reusable_listing'), name='unique_reusable_alert')],
+            },
+        ),
+    ]
@@ -1,12 +1,13 @@
 from django.db import models
 from django.contrib.auth import get_user_model
-from accounts.models import ScrapCategory, ScrapMaterial
-from PIL import Image
+from accounts.models import DealerProfile, ScrapCategory, ScrapMaterial
+from core.jobs import enqueue
+from core.models import ChangedFieldsMixin
 import uuid
 
 User = get_user_model()
 
-class ScrapListing(models.Model):
+class ScrapListing(ChangedFieldsMixin, models.Model):
     """User listings for selling scrap materials"""
     LISTING_STATUS = [
         ('active', 'Active'),
@@ -36,6 +37,8 @@ class ScrapListing(models.Model):
     city = models.CharField(max_length=100)
     state = models.CharField(max_length=100)
     pincode = models.CharField(max_length=10)
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, blank=True, null=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, blank=True, null=True)
     
     # Images
     image1 = models.ImageField(upload_to='scrap_listings/', blank=True, null=True)
@@ -62,17 +65,43 @@ class ScrapListing(models.Model):
     def __str__(self):
         return f"{self.title} by {self.seller.username}"
     
+    IMAGE_FIELDS = ['image1', 'image2', 'image3']
+    # What the suggested price is computed from
+    PRICING_FIELDS = ['material', 'quality_grade', 'latitude', 'longitude', 'city', 'status']
+    # What the dealer matches are computed from
+    MATCHING_FIELDS = PRICING_FIELDS + ['quantity']
+    
     def save(self, *args, **kwargs):
+        adding = self._state.adding
+        new_images = [name for name in self.changed_fields(self.IMAGE_FIELDS, kwargs.get('update_fields')) if getattr(self, name)]
+        repricing = self.changed_fields(self.PRICING_FIELDS, kwargs.get('update_fields'))
+        rematching = self.changed_fields(self.MATCHING_FIELDS, kwargs.get('update_fields'))
         super().save(*args, **kwargs)
         
-        # Resize images
-        for field_name in ['image1', 'image2', 'image3']:
+        # Alert saved searches about new listings
+        if adding:
+            enqueue('marketplace.tasks.percolate_listing', self._meta.label, str(self.pk))
+        
+        # Resize new images in the background
+        if new_images:
+            enqueue('marketplace.tasks.resize_listing_images', self._meta.label, str(self.pk))
+        
+        # Refresh the AI suggested price and the ranked dealer matches
+        if repricing:
+            enqueue('marketplace.tasks.reprice_listings', listing_ids=[str(self.pk)])
+        if rematching:
+            enqueue('marketplace.tasks.match_listings', listing_ids=[str(self.pk)])
+    
+    def resize_images(self):
+        for field_name in self.IMAGE_FIELDS:
             image_field = getattr(self, field_name)
             if image_field:
                 self._resize_image(image_field)
     
     def _resize_image(self, image_field):
         """Resize uploaded images"""
+        from PIL import Image
+        
         try:
             img = Image.open(image_field.path)
             if img.height > 800 or img.width > 800:
@@ -82,6 +111,39 @@ class ScrapListing(models.Model):
         except Exception:
             pass
 
+class ImageAssessment(models.Model):
+    """Cached AI assessment of one image, keyed by content hash and model version"""
+    content_hash = models.CharField(max_length=64)
+    model_version = models.CharField(max_length=50)
+    quality_score = models.FloatField(help_text="0 (poor) to 1 (excellent)")
+    material_type = models.CharField(max_length=100, blank=True)
+    confidence = models.FloatField(default=0.0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['content_hash', 'model_version']
+    
+    def __str__(self):
+        return f"{self.content_hash[:12]} ({self.model_version}) - {self.quality_score:.2f}"
+
+class ListingMatch(models.Model):
+    """A verified dealer ranked as a buyer for a scrap listing"""
+    listing = models.ForeignKey(ScrapListing, on_delete=models.CASCADE, related_name='dealer_matches')
+    dealer = models.ForeignKey(DealerProfile, on_delete=models.CASCADE, related_name='listing_matches')
+    rank = models.PositiveIntegerField()
+    net_offer = models.DecimalField(max_digits=12, decimal_places=2, help_text="Price × quantity minus distance cost")
+    price_per_unit = models.DecimalField(max_digits=10, decimal_places=2)
+    distance_km = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['listing', 'dealer']
+        ordering = ['listing', 'rank']
+        verbose_name_plural = "Listing Matches"
+    
+    def __str__(self):
+        return f"#{self.rank} {self.dealer.business_name} for {self.listing.title} - ₹{self.net_offer}"
+
 class ReusableItemCategory(models.Model):
     """Categories for reusable items"""
     name = models.CharField(max_length=100, unique=True)
@@ -97,7 +159,7 @@ class ReusableItemCategory(models.Model):
     def __str__(self):
         return self.name
 
-class ReusableItemListing(models.Model):
+class ReusableItemListing(ChangedFieldsMixin, models.Model):
     """User listings for reusable items"""
     TRANSACTION_TYPES = [
         ('sale', 'For Sale'),
@@ -167,17 +229,38 @@ class ReusableItemListing(models.Model):
     def __str__(self):
         return f"{self.title} - {self.get_transaction_type_display()}"
     
+    IMAGE_FIELDS = ['image1', 'image2', 'image3', 'image4']
+    # What the suggested price is computed from
+    PRICING_FIELDS = ['category', 'condition', 'transaction_type', 'status']
+    
     def save(self, *args, **kwargs):
+        adding = self._state.adding
+        new_images = [name for name in self.changed_fields(self.IMAGE_FIELDS, kwargs.get('update_fields')) if getattr(self, name)]
+        repricing = self.changed_fields(self.PRICING_FIELDS, kwargs.get('update_fields'))
         super().save(*args, **kwargs)
         
-        # Resize images
-        for field_name in ['image1', 'image2', 'image3', 'image4']:
+        # Alert saved searches about new listings
+        if adding:
+            enqueue('marketplace.tasks.percolate_listing', self._meta.label, str(self.pk))
+        
+        # Resize new images in the background
+        if new_images:
+            enqueue('marketplace.tasks.resize_listing_images', self._meta.label, str(self.pk))
+        
+        # Refresh the AI suggested price
+        if repricing:
+            enqueue('marketplace.tasks.reprice_listings', listing_ids=[str(self.pk)])
+    
+    def resize_images(self):
+        for field_name in self.IMAGE_FIELDS:
             image_field = getattr(self, field_name)
             if image_field:
                 self._resize_image(image_field)
     
     def _resize_image(self, image_field):
         """Resize uploaded images"""
+        from PIL import Image
+        
         try:
             img = Image.open(image_field.path)
             if img.height > 800 or img.width > 800:
@@ -312,4 +395,52 @@ class EcoPointsHistory(models.Model):
     
     def __str__(self):
         action = "Earned" if self.points > 0 else "Spent"
-        return f"{self.user.username} {action} {abs(self.points)} points - {self.get_transaction_type_display()}"
\ No newline at end of file
+        return f"{self.user.username} {action} {abs(self.points)} points - {self.get_transaction_type_display()}"
+
+class SavedSearch(models.Model):
+    """A standing search; new listings that match it are sent to the user as alerts"""
+    LISTING_TYPES = [
+        ('scrap', 'Scrap Materials'),
+        ('reusable', 'Reusable Items'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='saved_searches')
+    name = models.CharField(max_length=100, blank=True)
+    listing_type = models.CharField(max_length=10, choices=LISTING_TYPES, default='scrap')
+    material = models.ForeignKey(ScrapMaterial, on_delete=models.CASCADE, blank=True, null=True)
+    category = models.ForeignKey(ReusableItemCategory, on_delete=models.CASCADE, blank=True, null=True)
+    grade = models.CharField(max_length=20, blank=True, help_text="Quality grade (scrap) or condition (reusable); blank matches any")
+    city = models.CharField(max_length=100, blank=True, help_text="Blank matches any city")
+    max_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True, help_text="Per unit for scrap materials")
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name_plural = "Saved Searches"
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.name or self.get_listing_type_display()}"
+
+class SearchAlert(models.Model):
+    """A new listing matched by a saved search, waiting to be emailed"""
+    saved_search = models.ForeignKey(SavedSearch, on_delete=models.CASCADE, related_name='alerts')
+    scrap_listing = models.ForeignKey(ScrapListing, on_delete=models.CASCADE, blank=True, null=True)
+    reusable_listing = models.ForeignKey(ReusableItemListing, on_delete=models.CASCADE, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        ordering = ['created_at']
+        indexes = [models.Index(fields=['sent_at'])]
+        constraints = [
+            models.UniqueConstraint(fields=['saved_search', 'scrap_listing'], name='unique_scrap_alert'),
+            models.UniqueConstraint(fields=['saved_search', 'reusable_listing'], name='unique_reusable_alert'),
+        ]
+    
+    @property
+    def listing(self):
+        return self.scrap_listing or self.reusable_listing
+    
+    def __str__(self):
+        return f"{self.saved_search} - {self.listing}"
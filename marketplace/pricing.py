@@ -0,0 +1,224 @@
+"""
+AI suggested prices for listings.
+
+Scrap listings are priced from the live ``DealerPrice`` book for their
+material and grade: each verified dealer's quote is weighted by its rating
+and by an exponential distance decay, then blended with the median unit price
+of recently completed transactions. Reusable items, which dealers don't
+quote, are priced from transaction history for the same category and
+condition.
+
+Everything is computed per (material, grade) group over NumPy arrays, so a
+whole batch of listings is priced with a handful of queries and a few matrix
+operations, and ``reprice_listings`` can refresh every active listing right
+after a market move.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.utils import timezone
+
+from accounts.models import DealerPrice
+from .models import ScrapListing, ReusableItemListing, Transaction
+
+EARTH_RADIUS_KM = 6371.0
+DISTANCE_SCALE_KM = 25.0  # a dealer this far away counts e^-1 as much as one next door
+SAME_CITY_DISTANCE_KM = 5.0  # assumed when coordinates are missing but the city matches
+UNKNOWN_DISTANCE_KM = 50.0  # assumed when coordinates are missing and the city differs
+TRANSACTION_WINDOW_DAYS = 90
+TRANSACTION_PRIOR = 5  # with this many recent sales, history gets half the weight (before the cap)
+MAX_TRANSACTION_WEIGHT = 0.5
+CENT = Decimal('0.01')
+
+
+def haversine_matrix(lat1, lon1, lat2, lon2):
+    """Pairwise great-circle distances (km) between two sets of points; NaN where unknown"""
+    lat1, lon1, lat2, lon2 = (np.radians(values) for values in (lat1, lon1, lat2, lon2))
+    dlat = lat2[None, :] - lat1[:, None]
+    dlon = lon2[None, :] - lon1[:, None]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1)[:, None] * np.cos(lat2)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def as_float_array(values):
+    return np.array([np.nan if value is None else float(value) for value in values], dtype=float)
+
+
+def normalize_city(city):
+    return (city or '').strip().lower()
+
+
+def distance_matrix(lat1, lon1, cities1, lat2, lon2, cities2):
+    """
+    Pairwise distances (km) between listings and dealers.
+
+    Where either side has no coordinates, fall back to a nominal distance
+    depending on whether the (normalized) cities match.
+    """
+    distances = haversine_matrix(lat1, lon1, lat2, lon2)
+    same_city = np.asarray(cities1)[:, None] == np.asarray(cities2)[None, :]
+    return np.where(
+        np.isnan(distances),
+        np.where(same_city, SAME_CITY_DISTANCE_KM, UNKNOWN_DISTANCE_KM),
+        distances,
+    )
+
+
+def dealer_weighted_prices(listings, quotes):
+    """
+    Weighted dealer price for each listing in one (material, grade) group.
+
+    ``listings`` and ``quotes`` are lists of value dicts; returns an array with
+    one suggested price per listing.
+    """
+    distances = distance_matrix(
+        as_float_array([l['latitude'] for l in listings]),
+        as_float_array([l['longitude'] for l in listings]),
+        [normalize_city(l['city']) for l in listings],
+        as_float_array([q['dealer__latitude'] for q in quotes]),
+        as_float_array([q['dealer__longitude'] for q in quotes]),
+        [normalize_city(q['dealer__user__city']) for q in quotes],
+    )
+
+    prices = as_float_array([q['price_per_unit'] for q in quotes])
+    # A 0-5 star average maps to a 0.5-1.5 weight, so unrated dealers still count
+    rating_weight = 0.5 + as_float_array([q['dealer__average_rating'] for q in quotes]) / 5
+    weights = np.exp(-distances / DISTANCE_SCALE_KM) * rating_weight[None, :]
+    return (weights @ prices) / weights.sum(axis=1)
+
+
+def blend_with_transactions(dealer_prices, history):
+    """Blend dealer-derived prices with the median recent transaction price"""
+    if not len(history):
+        return dealer_prices
+    median = float(np.median(history))
+    if dealer_prices is None:
+        return median
+    weight = min(len(history) / (len(history) + TRANSACTION_PRIOR), MAX_TRANSACTION_WEIGHT)
+    return (1 - weight) * dealer_prices + weight * median
+
+
+def to_decimal(value):
+    return Decimal(str(round(float(value), 2))).quantize(CENT)
+
+
+def suggest_scrap_prices(listings):
+    """Return ``{listing_id: Decimal or None}`` for a batch of scrap listing value dicts"""
+    groups = defaultdict(list)
+    for listing in listings:
+        groups[(listing['material_id'], listing['quality_grade'])].append(listing)
+    if not groups:
+        return {}
+
+    material_ids = {material_id for material_id, _ in groups}
+    quotes = defaultdict(list)
+    for quote in DealerPrice.objects.filter(
+        material_id__in=material_ids,
+        is_active=True,
+        dealer__verification_status='verified',
+    ).values(
+        'material_id', 'quality_grade', 'price_per_unit',
+        'dealer__latitude', 'dealer__longitude', 'dealer__average_rating', 'dealer__user__city',
+    ):
+        quotes[(quote['material_id'], quote['quality_grade'])].append(quote)
+
+    history = defaultdict(list)
+    for material_id, grade, unit_price in Transaction.objects.filter(
+        status='completed',
+        completed_at__gte=timezone.now() - timedelta(days=TRANSACTION_WINDOW_DAYS),
+        scrap_listing__material_id__in=material_ids,
+    ).values_list('scrap_listing__material_id', 'scrap_listing__quality_grade', 'unit_price'):
+        history[(material_id, grade)].append(float(unit_price))
+
+    suggestions = {}
+    for key, group in groups.items():
+        dealer_prices = dealer_weighted_prices(group, quotes[key]) if quotes[key] else None
+        prices = blend_with_transactions(dealer_prices, np.array(history[key]))
+        for index, listing in enumerate(group):
+            if prices is None:
+                suggestions[listing['id']] = None
+            elif np.ndim(prices) == 0:
+                suggestions[listing['id']] = to_decimal(prices)
+            else:
+                suggestions[listing['id']] = to_decimal(prices[index])
+    return suggestions
+
+
+def suggest_reusable_prices(listings):
+    """Return ``{listing_id: Decimal or None}`` for a batch of reusable item value dicts"""
+    category_ids = {listing['category_id'] for listing in listings}
+    history = defaultdict(list)
+    for category_id, condition, unit_price in Transaction.objects.filter(
+        status='completed',
+        completed_at__gte=timezone.now() - timedelta(days=TRANSACTION_WINDOW_DAYS),
+        reusable_listing__category_id__in=category_ids,
+        reusable_listing__transaction_type='sale',
+    ).values_list('reusable_listing__category_id', 'reusable_listing__condition', 'unit_price'):
+        history[(category_id, condition)].append(float(unit_price))
+        history[(category_id, None)].append(float(unit_price))
+
+    medians = {key: float(np.median(values)) for key, values in history.items()}
+    suggestions = {}
+    for listing in listings:
+        if listing['transaction_type'] == 'free':
+            suggestions[listing['id']] = Decimal('0.00')
+            continue
+        if listing['transaction_type'] != 'sale':
+            suggestions[listing['id']] = None
+            continue
+        median = medians.get((listing['category_id'], listing['condition']))
+        if median is None:
+            median = medians.get((listing['category_id'], None))
+        suggestions[listing['id']] = None if median is None else to_decimal(median)
+    return suggestions
+
+
+def _apply(model, suggestions, batch_size):
+    changed = [
+        model(id=listing_id, ai_suggested_price=price)
+        for listing_id, price in suggestions.items()
+    ]
+    model.objects.bulk_update(changed, ['ai_suggested_price'], batch_size=batch_size)
+    return len(changed)
+
+
+def reprice_listings(material_id=None, quality_grade=None, listing_ids=None, material_ids=None, chunk_size=5000):
+    """
+    Recompute ``ai_suggested_price`` for active listings and return how many were written.
+
+    With ``material_id``/``quality_grade`` (or several ``material_ids``) only that
+    slice of the scrap market is repriced (and reusable items are left alone);
+    ``listing_ids`` limits the run to specific listings of either kind.
+    """
+    scrap = ScrapListing.objects.filter(status='active')
+    reusable = ReusableItemListing.objects.filter(status='active')
+    if material_id is not None:
+        scrap = scrap.filter(material_id=material_id)
+        reusable = reusable.none()
+    if material_ids is not None:
+        scrap = scrap.filter(material_id__in=material_ids)
+        reusable = reusable.none()
+    if quality_grade is not None:
+        scrap = scrap.filter(quality_grade=quality_grade)
+    if listing_ids is not None:
+        scrap = scrap.filter(id__in=listing_ids)
+        reusable = reusable.filter(id__in=listing_ids)
+
+    written = 0
+    scrap_rows = scrap.values('id', 'material_id', 'quality_grade', 'latitude', 'longitude', 'city')
+    reusable_rows = reusable.values('id', 'category_id', 'condition', 'transaction_type')
+    for rows, suggest, model in (
+        (scrap_rows, suggest_scrap_prices, ScrapListing),
+        (reusable_rows, suggest_reusable_prices, ReusableItemListing),
+    ):
+        batch = []
+        for row in rows.iterator(chunk_size=chunk_size):
+            batch.append(row)
+            if len(batch) == chunk_size:
+                written += _apply(model, suggest(batch), chunk_size)
+                batch = []
+        if batch:
+            written += _apply(model, suggest(batch), chunk_size)
+    return written
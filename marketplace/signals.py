@@ -0,0 +1,58 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from accounts.models import DealerPrice, DealerProfile
+from accounts.signals import prices_bulk_updated
+from core.jobs import enqueue_once
+from .models import ListingMatch, SavedSearch, ScrapListing
+
+
+@receiver([post_save, post_delete], sender=DealerPrice)
+def reprice_after_dealer_price_change(sender, instance, **kwargs):
+    """A dealer quote moved: refresh suggested prices and matches for that material and grade"""
+    from .matching import invalidate_index
+    invalidate_index()
+    for task in ('marketplace.tasks.reprice_listings', 'marketplace.tasks.match_listings'):
+        enqueue_once(
+            task,
+            material_id=instance.material_id,
+            quality_grade=instance.quality_grade,
+            delay=5,
+        )
+
+
+@receiver(prices_bulk_updated)
+def reprice_after_bulk_price_upload(sender, dealer, changes, **kwargs):
+    """One repricing and one rematching job per upload, covering every material it touched"""
+    from .matching import invalidate_index
+    invalidate_index()
+    material_ids = sorted({price.material_id for price, _ in changes})
+    for task in ('marketplace.tasks.reprice_listings', 'marketplace.tasks.match_listings'):
+        enqueue_once(task, material_ids=material_ids, delay=5)
+
+
+@receiver([post_save, post_delete], sender=DealerProfile)
+def invalidate_matches_after_dealer_change(sender, instance, **kwargs):
+    """Verification, pickup or location changes alter who can be matched"""
+    from .matching import invalidate_index
+    invalidate_index()
+    if kwargs['signal'] is post_save and (instance.verification_status != 'verified' or not instance.pickup_available):
+        # Drop the dealer from its listings now and re-rank them, rather than at the hourly rematch
+        matches = ListingMatch.objects.filter(dealer=instance)
+        listing_ids = sorted(str(listing_id) for listing_id in matches.values_list('listing_id', flat=True))
+        if listing_ids:
+            matches.delete()
+            enqueue_once('marketplace.tasks.match_listings', listing_ids=listing_ids, delay=5)
+
+
+@receiver(post_save, sender=ScrapListing)
+def drop_matches_of_inactive_listing(sender, instance, **kwargs):
+    """Sold, cancelled or expired listings are no longer offered to dealers"""
+    if instance.status != 'active':
+        ListingMatch.objects.filter(listing=instance).delete()
+
+
+@receiver([post_save, post_delete], sender=SavedSearch)
+def invalidate_percolator_after_search_change(sender, instance, **kwargs):
+    from . import alerts
+    alerts.invalidate_index()
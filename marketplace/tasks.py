@@ -0,0 +1,44 @@
+from django.apps import apps
+
+from core.jobs import job
+from . import alerts, matching, pricing
+from .assessment import AssessmentEngine
+
+
+@job(max_attempts=2, timeout=120)
+def resize_listing_images(model_label, listing_id):
+    """Resize a listing's images, then fill in its AI assessment"""
+    listing = apps.get_model(model_label).objects.filter(pk=listing_id).first()
+    if listing:
+        listing.resize_images()
+        AssessmentEngine().assess_listings([listing])
+
+
+@job(priority=3, timeout=600)
+def reprice_listings(material_id=None, quality_grade=None, listing_ids=None, material_ids=None):
+    """Refresh AI suggested prices, optionally for one material/grade, some materials or a few listings"""
+    pricing.reprice_listings(
+        material_id=material_id, quality_grade=quality_grade, listing_ids=listing_ids, material_ids=material_ids,
+    )
+
+
+@job(priority=3, timeout=600)
+def match_listings(material_id=None, quality_grade=None, listing_ids=None, material_ids=None):
+    """Re-rank dealers for scrap listings, optionally for one material/grade, some materials or a few listings"""
+    matching.rematch_listings(
+        material_id=material_id, quality_grade=quality_grade, listing_ids=listing_ids, material_ids=material_ids,
+    )
+
+
+@job(priority=5)
+def percolate_listing(model_label, listing_id):
+    """Queue saved-search alerts for a newly posted listing"""
+    listing = apps.get_model(model_label).objects.filter(pk=listing_id).first()
+    if listing:
+        alerts.queue_alerts([listing])
+
+
+@job(timeout=600)
+def send_search_alerts():
+    """Email pending saved-search alerts, one message per user"""
+    alerts.send_alerts()
@@ -1,3 +1,398 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from decimal import Decimal
 
-# Create your tests here.
+import numpy as np
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from accounts.models import User, DealerProfile, ScrapCategory, ScrapMaterial, DealerPrice
+from . import alerts, matching
+from core.models import Job
+from .assessment import AssessmentEngine, ColorStatsModel, get_model
+from .matching import COST_PER_KM, match_listing
+from .models import ImageAssessment, ListingMatch, SavedSearch, SearchAlert, ScrapListing, ReusableItemCategory, ReusableItemListing, Transaction
+from .pricing import DISTANCE_SCALE_KM, haversine_matrix, reprice_listings, suggest_scrap_prices
+
+
+def jpeg_bytes(color, size=(64, 64), stripes=False):
+    image = Image.new('RGB', size, color)
+    if stripes:
+        for x in range(0, size[0], 4):
+            for y in range(size[1]):
+                image.putpixel((x, y), (0, 0, 0))
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+class CountingModel(ColorStatsModel):
+    calls = 0
+
+    def predict(self, images):
+        CountingModel.calls += len(images)
+        return super().predict(images)
+
+
+class MediaTestMixin:
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+
+class ListingFixturesMixin:
+    def setUp(self):
+        super().setUp()
+        # Test rollbacks don't send signals, so drop indexes built from earlier tests' rows
+        matching.invalidate_index()
+        alerts.invalidate_index()
+
+    def make_seller(self, username='seller'):
+        return User.objects.create_user(username=username, email=f'{username}@example.com')
+
+    def make_scrap_listing(self, seller, material, **kwargs):
+        defaults = {
+            'title': 'Copper wire',
+            'description': 'Clean copper',
+            'quantity': 50,
+            'quality_grade': 'A',
+            'expected_price': 600,
+            'pickup_address': 'Market Road',
+            'city': 'Pune',
+            'state': 'Maharashtra',
+            'pincode': '411001',
+        }
+        defaults.update(kwargs)
+        return ScrapListing.objects.create(seller=seller, material=material, **defaults)
+
+    def make_material(self, name='Copper', category='Metals'):
+        category, _ = ScrapCategory.objects.get_or_create(name=category)
+        return ScrapMaterial.objects.create(category=category, name=name)
+
+
+class AssessmentEngineTests(MediaTestMixin, ListingFixturesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        CountingModel.calls = 0
+        self.engine = AssessmentEngine(model=CountingModel(), batch_size=2)
+
+    def test_stand_in_model_is_deterministic(self):
+        blobs = [jpeg_bytes((180, 90, 30)), jpeg_bytes((128, 128, 128), stripes=True)]
+        first = AssessmentEngine(model=ColorStatsModel()).assess_blobs(blobs)
+        ImageAssessment.objects.all().delete()
+        second = AssessmentEngine(model=ColorStatsModel()).assess_blobs(blobs)
+        self.assertEqual(first, second)
+
+    def test_cache_hits_skip_inference(self):
+        blobs = [jpeg_bytes((200, 20, 20)), jpeg_bytes((20, 200, 20)), jpeg_bytes((20, 20, 200))]
+
+        self.engine.assess_blobs(blobs)
+        self.engine.assess_blobs(blobs + [blobs[0]])
+
+        self.assertEqual(CountingModel.calls, 3)
+        self.assertEqual(self.engine.cache_hits, 3)
+        self.assertEqual(ImageAssessment.objects.count(), 3)
+
+    @override_settings(AI_ASSESSMENT_MODEL='marketplace.tests.CountingModel')
+    def test_listing_save_fills_ai_fields_and_resave_does_not_reinfer(self):
+        get_model.cache_clear()
+        self.addCleanup(get_model.cache_clear)
+        seller = self.make_seller()
+        listing = self.make_scrap_listing(
+            seller, self.make_material(),
+            image1=SimpleUploadedFile('wire.jpg', jpeg_bytes((190, 100, 40)), content_type='image/jpeg'),
+        )
+
+        listing.refresh_from_db()
+        self.assertIn(listing.ai_quality_grade, {'A', 'B', 'C', 'D'})
+        self.assertNotEqual(listing.ai_material_type, '')
+        self.assertGreater(listing.ai_confidence_score, 0)
+        self.assertEqual(CountingModel.calls, 1)
+
+        listing.title = 'Copper wire (updated)'
+        listing.save()
+        self.assertEqual(CountingModel.calls, 1)
+
+    def test_reusable_listing_gets_condition_grade(self):
+        seller = self.make_seller()
+        category = ReusableItemCategory.objects.create(name='Furniture')
+        listing = ReusableItemListing(
+            seller=seller, category=category, title='Chair', description='Wooden chair',
+            condition='good', transaction_type='sale', price=500,
+            pickup_address='Market Road', city='Pune', state='Maharashtra', pincode='411001',
+        )
+        listing.image1.save('chair.jpg', SimpleUploadedFile('chair.jpg', jpeg_bytes((120, 80, 40), stripes=True)), save=False)
+        ReusableItemListing.objects.bulk_create([listing])
+
+        self.assertEqual(self.engine.assess_listings([listing]), 1)
+        listing.refresh_from_db()
+        self.assertIn(listing.ai_condition_grade, dict(ReusableItemListing.CONDITION_GRADES))
+
+
+@override_settings(JOBS_RUN_INLINE=False)
+class ListingSaveJobTests(MediaTestMixin, ListingFixturesMixin, TestCase):
+    def queued(self, task):
+        """How many ``task`` jobs were queued since the last call"""
+        count = Job.objects.filter(name=f'marketplace.tasks.{task}').count()
+        Job.objects.all().delete()
+        return count
+
+    def make_listing(self):
+        listing = self.make_scrap_listing(
+            self.make_seller(), self.make_material(),
+            image1=SimpleUploadedFile('wire.jpg', jpeg_bytes((190, 100, 40)), content_type='image/jpeg'),
+        )
+        return listing, ScrapListing.objects.get(pk=listing.pk)
+
+    def test_only_new_images_are_resized(self):
+        _, listing = self.make_listing()
+        Job.objects.all().delete()
+
+        listing.title = 'Copper wire (updated)'
+        listing.save()
+        listing.views_count += 1
+        listing.save(update_fields=['views_count'])
+        self.assertEqual(self.queued('resize_listing_images'), 0)
+
+        listing.image2 = SimpleUploadedFile('more.jpg', jpeg_bytes((90, 90, 90)), content_type='image/jpeg')
+        listing.save()
+        self.assertEqual(self.queued('resize_listing_images'), 1)
+
+    def test_only_pricing_changes_reprice(self):
+        _, listing = self.make_listing()
+        Job.objects.all().delete()
+
+        listing.title = 'Copper wire (updated)'
+        listing.save()
+        listing.quantity = Decimal('80')
+        listing.save()
+        self.assertEqual(self.queued('reprice_listings'), 0)
+
+        listing.quality_grade = 'B'
+        listing.save()
+        self.assertEqual(self.queued('reprice_listings'), 1)
+
+    def test_only_matching_changes_rematch(self):
+        _, listing = self.make_listing()
+        Job.objects.all().delete()
+
+        listing.title = 'Copper wire (updated)'
+        listing.save()
+        self.assertEqual(self.queued('match_listings'), 0)
+
+        listing.quantity = Decimal('80')
+        listing.save()
+        self.assertEqual(self.queued('match_listings'), 1)
+
+
+class DealerFixturesMixin:
+    def make_dealer(self, username, **kwargs):
+        user = User.objects.create_user(username=username, user_type='dealer', city='Pune')
+        return DealerProfile.objects.create(
+            user=user, business_name=username, business_registration_number=username,
+            business_address='Market Road', business_phone='+919876543210',
+            business_email=f'{username}@example.com', specialization='Metals',
+            verification_status='verified', **kwargs,
+        )
+
+
+class PricingTests(DealerFixturesMixin, ListingFixturesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.copper = self.make_material()
+        self.seller = self.make_seller()
+        self.near = self.make_dealer('near', latitude=18.52, longitude=73.85, average_rating=5)
+        self.far = self.make_dealer('far', latitude=19.07, longitude=72.87, average_rating=0)
+        self.near_price = DealerPrice.objects.create(dealer=self.near, material=self.copper, quality_grade='A', price_per_unit=600)
+        DealerPrice.objects.create(dealer=self.far, material=self.copper, quality_grade='A', price_per_unit=700)
+
+    def test_price_is_weighted_towards_near_well_rated_dealers(self):
+        listing = self.make_scrap_listing(self.seller, self.copper, latitude=18.52, longitude=73.85)
+
+        listing.refresh_from_db()
+        far_km = haversine_matrix(np.array([18.52]), np.array([73.85]), np.array([19.07]), np.array([72.87]))[0, 0]
+        near_weight, far_weight = 1.5, 0.5 * np.exp(-far_km / DISTANCE_SCALE_KM)
+        expected = (600 * near_weight + 700 * far_weight) / (near_weight + far_weight)
+        self.assertAlmostEqual(float(listing.ai_suggested_price), expected, places=2)
+        self.assertLess(listing.ai_suggested_price, Decimal('650'))
+
+    def test_recent_transactions_are_blended_in(self):
+        listing = self.make_scrap_listing(self.seller, self.copper, latitude=18.52, longitude=73.85)
+        before = ScrapListing.objects.get(pk=listing.pk).ai_suggested_price
+        buyer = User.objects.create_user(username='buyer')
+        Transaction.objects.bulk_create([
+            Transaction(buyer=buyer, seller=self.seller, scrap_listing=listing, quantity=10, unit_price=900,
+                        total_amount=9000, status='completed', completed_at=timezone.now())
+            for _ in range(5)
+        ])
+
+        reprice_listings()
+
+        after = ScrapListing.objects.get(pk=listing.pk).ai_suggested_price
+        self.assertAlmostEqual(float(after), 0.5 * float(before) + 0.5 * 900, places=1)
+
+    def test_batch_is_priced_with_two_queries(self):
+        listings = [
+            {'id': i, 'material_id': self.copper.id, 'quality_grade': 'A', 'latitude': None, 'longitude': None, 'city': 'Pune'}
+            for i in range(200)
+        ]
+        with self.assertNumQueries(2):
+            prices = suggest_scrap_prices(listings)
+        self.assertEqual(len(set(prices.values())), 1)
+
+    def test_dealer_price_change_reprices_listings(self):
+        listing = self.make_scrap_listing(self.seller, self.copper, city='Pune')
+        before = ScrapListing.objects.get(pk=listing.pk).ai_suggested_price
+
+        self.near_price.price_per_unit = 800
+        self.near_price.save()
+
+        self.assertGreater(ScrapListing.objects.get(pk=listing.pk).ai_suggested_price, before)
+
+    def test_listing_without_quotes_or_history_has_no_suggestion(self):
+        listing = self.make_scrap_listing(self.seller, self.copper, quality_grade='D')
+        self.assertIsNone(ScrapListing.objects.get(pk=listing.pk).ai_suggested_price)
+
+
+class MatchingTests(DealerFixturesMixin, ListingFixturesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.copper = self.make_material()
+        self.seller = self.make_seller()
+        self.near = self.make_dealer('near', latitude=18.52, longitude=73.85)
+        self.far = self.make_dealer('far', latitude=19.07, longitude=72.87)
+        DealerPrice.objects.create(dealer=self.near, material=self.copper, quality_grade='A', price_per_unit=600)
+        DealerPrice.objects.create(dealer=self.far, material=self.copper, quality_grade='A', price_per_unit=610)
+
+    def test_dealers_are_ranked_by_net_offer(self):
+        listing = self.make_scrap_listing(self.seller, self.copper, quantity=50, latitude=18.52, longitude=73.85)
+
+        matches = list(listing.dealer_matches.all())
+        self.assertEqual([m.dealer_id for m in matches], [self.near.id, self.far.id])
+        self.assertEqual(matches[0].net_offer, Decimal('30000.00'))
+        far_km = haversine_matrix(np.array([18.52]), np.array([73.85]), np.array([19.07]), np.array([72.87]))[0, 0]
+        self.assertAlmostEqual(float(matches[1].net_offer), 50 * 610 - far_km * COST_PER_KM, places=1)
+
+    def test_large_loads_favour_the_better_price(self):
+        listing = self.make_scrap_listing(self.seller, self.copper, quantity=5000, latitude=18.52, longitude=73.85)
+        self.assertEqual(listing.dealer_matches.first().dealer_id, self.far.id)
+
+    def test_minimum_quantity_pickup_and_verification_gate_dealers(self):
+        DealerPrice.objects.filter(dealer=self.far).update(minimum_quantity=100)
+        self.make_dealer('nopickup', pickup_available=False)
+        pending = self.make_dealer('pending')
+        pending.verification_status = 'pending'
+        pending.save()
+        for dealer in DealerProfile.objects.exclude(pk__in=[self.near.pk, self.far.pk]):
+            DealerPrice.objects.create(dealer=dealer, material=self.copper, quality_grade='A', price_per_unit=900)
+
+        listing = self.make_scrap_listing(self.seller, self.copper, quantity=50)
+
+        self.assertEqual(list(listing.dealer_matches.values_list('dealer_id', flat=True)), [self.near.id])
+
+    def test_warm_match_needs_no_queries(self):
+        listing = self.make_scrap_listing(self.seller, self.copper, quantity=50)
+        match_listing(listing)
+        with self.assertNumQueries(0):
+            ranked = match_listing(listing)
+        self.assertEqual(len(ranked), 2)
+
+    def test_price_change_rematches_listings(self):
+        listing = self.make_scrap_listing(self.seller, self.copper, quantity=50, latitude=18.52, longitude=73.85)
+
+        DealerPrice.objects.filter(dealer=self.far).delete()
+
+        self.assertEqual(list(ListingMatch.objects.filter(listing=listing).values_list('dealer_id', flat=True)), [self.near.id])
+
+    def test_matches_go_when_the_listing_closes_or_the_dealer_is_suspended(self):
+        listing = self.make_scrap_listing(self.seller, self.copper, quantity=50, latitude=18.52, longitude=73.85)
+
+        self.far.verification_status = 'suspended'
+        self.far.save()
+        self.assertEqual(list(listing.dealer_matches.values_list('dealer_id', flat=True)), [self.near.id])
+
+        listing.status = 'sold'
+        listing.save()
+        self.assertFalse(listing.dealer_matches.exists())
+
+
+class SavedSearchAlertTests(ListingFixturesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.copper = self.make_material()
+        self.seller = self.make_seller()
+        self.buyer = User.objects.create_user(username='buyer', email='buyer@example.com')
+
+    def search(self, user=None, **kwargs):
+        return SavedSearch.objects.create(user=user or self.buyer, **kwargs)
+
+    def test_wildcards_city_and_max_price(self):
+        exact = self.search(material=self.copper, grade='A', city='pune ', max_price=700)
+        anywhere = self.search(material=self.copper)
+        self.search(material=self.copper, max_price=500)
+        self.search(city='Mumbai')
+        self.search(grade='C')
+
+        listing = self.make_scrap_listing(self.seller, self.copper, expected_price=600, city='Pune')
+
+        matched = set(SearchAlert.objects.filter(scrap_listing=listing).values_list('saved_search_id', flat=True))
+        self.assertEqual(matched, {exact.id, anywhere.id})
+
+    def test_reusable_listings_match_category_and_condition(self):
+        furniture = ReusableItemCategory.objects.create(name='Furniture')
+        search = self.search(listing_type='reusable', category=furniture, grade='good', max_price=1000)
+        self.search(material=self.copper)
+
+        listing = ReusableItemListing.objects.create(
+            seller=self.seller, category=furniture, title='Chair', description='Wooden chair',
+            condition='good', transaction_type='sale', price=500,
+            pickup_address='Market Road', city='Pune', state='Maharashtra', pincode='411001',
+        )
+
+        self.assertEqual(list(SearchAlert.objects.values_list('saved_search_id', 'reusable_listing_id')), [(search.id, listing.id)])
+
+    def test_own_listings_edits_and_paused_searches_do_not_alert(self):
+        self.search(user=self.seller, material=self.copper)
+        self.search(material=self.copper, is_active=False)
+
+        listing = self.make_scrap_listing(self.seller, self.copper)
+        self.search(material=self.copper)
+        listing.save()
+
+        self.assertFalse(SearchAlert.objects.exists())
+
+    def test_percolation_cost_tracks_matches_not_subscriptions(self):
+        SavedSearch.objects.bulk_create([
+            SavedSearch(user=self.buyer, grade='D', city=f'City {i}') for i in range(2000)
+        ])
+        self.search(material=self.copper, city='Pune')
+        alerts.invalidate_index()
+        alerts.get_index()
+        listing = self.make_scrap_listing(self.seller, self.copper)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(len(alerts.matching_searches(listing)), 1)
+
+    def test_alerts_are_batched_into_one_email_per_user(self):
+        self.search(material=self.copper)
+        self.search(city='Pune')
+        other = User.objects.create_user(username='other', email='other@example.com')
+        self.search(user=other, material=self.copper)
+        for title in ('Copper wire', 'Copper pipe'):
+            self.make_scrap_listing(self.seller, self.copper, title=title)
+
+        self.assertEqual(alerts.send_alerts(), 2)
+
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['buyer@example.com', 'other@example.com'])
+        buyer_mail = next(message for message in mail.outbox if message.to == ['buyer@example.com'])
+        self.assertIn('Copper pipe', buyer_mail.body)
+        self.assertFalse(SearchAlert.objects.filter(sent_at__isnull=True).exists())
+        self.assertEqual(alerts.send_alerts(), 0)
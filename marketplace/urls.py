@@ -6,4 +6,9 @@ app_name = 'marketplace'
 urlpatterns = [
     # Marketplace URLs will be added here
     path('', views.marketplace_home, name='home'),
-]
\ No newline at end of file
+    
+    # Saved searches
+    path('searches/', views.saved_searches, name='saved_searches'),
+    path('searches/<int:search_id>/toggle/', views.toggle_saved_search, name='toggle_saved_search'),
+    path('searches/<int:search_id>/delete/', views.delete_saved_search, name='delete_saved_search'),
+]
@@ -1,5 +1,50 @@
-from django.shortcuts import render
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth.decorators import login_required
+from django.contrib import messages
+from django.views.decorators.http import require_http_methods
+from .forms import SavedSearchForm
+from .models import SavedSearch
 
 def marketplace_home(request):
     """Marketplace home view - placeholder"""
-    return render(request, 'marketplace/home.html')
\ No newline at end of file
+    return render(request, 'marketplace/home.html')
+
+@login_required
+def saved_searches(request):
+    """List and create saved searches"""
+    if request.method == 'POST':
+        form = SavedSearchForm(request.POST)
+        if form.is_valid():
+            search = form.save(commit=False)
+            search.user = request.user
+            search.save()
+            messages.success(request, "Saved! We'll email you when matching listings are posted.")
+            return redirect('marketplace:saved_searches')
+    else:
+        form = SavedSearchForm()
+    
+    searches = request.user.saved_searches.select_related('material', 'category')
+    
+    context = {
+        'form': form,
+        'searches': searches,
+    }
+    return render(request, 'marketplace/saved_searches.html', context)
+
+@login_required
+@require_http_methods(["POST"])
+def toggle_saved_search(request, search_id):
+    """Pause or resume alerts for a saved search"""
+    search = get_object_or_404(SavedSearch, id=search_id, user=request.user)
+    search.is_active = not search.is_active
+    search.save(update_fields=['is_active'])
+    return redirect('marketplace:saved_searches')
+
+@login_required
+@require_http_methods(["POST"])
+def delete_saved_search(request, search_id):
+    """Delete a saved search"""
+    search = get_object_or_404(SavedSearch, id=search_id, user=request.user)
+    search.delete()
+    messages.info(request, 'Saved search deleted.')
+    return redirect('marketplace:saved_searches')
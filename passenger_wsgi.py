@@ -22,6 +22,10 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'akrionline.production_settings'
 try:
     from django.core.wsgi import get_wsgi_application
     application = get_wsgi_application()
+
+    # Build URL resolvers, templates and the cache connection before the first request
+    from core.warmup import warm_up
+    warm_up()
 except ImportError:
     # Fallback for debugging
     import traceback
@@ -0,0 +1,12 @@
+/** Tailwind keeps only the classes it finds in these files, see core/assets.py */
+module.exports = {
+  content: [
+    './templates/**/*.html',
+    './*/templates/**/*.html',
+    './*/forms.py',
+  ],
+  theme: {
+    extend: {},
+  },
+  plugins: [],
+}